@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import select, func, and_, insert, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config
+from inbox import Cursor, STATUS_TITLES, STATUS_ICONS, cursor_key
+from models import Application, Resume, Vacancy
+from pagination import fetch_keyset_rows
+from search import vacancy_active
+from ttl_cache import TTLCache
+
+# Отклики соискателя ("Мои отклики"). Экран открывают часто, поэтому
+# число откликов по статусам (один GROUP BY) кэшируется и сбрасывается,
+# когда отклик создается или работодатель меняет его статус (в этом процессе;
+# другие воркеры видят изменения по истечении короткого TTL). Сам список
+# загружается постранично одним запросом вместе с названиями вакансий.
+
+# user_id -> {статус: число откликов}
+status_counts_cache = TTLCache(config.APPLICATION_COUNTS_CACHE_SIZE, config.APPLICATION_COUNTS_CACHE_TTL)
+
+async def get_status_counts(session: AsyncSession, user_id: int) -> Dict[str, int]:
+    """Число откликов соискателя по статусам"""
+    counts = status_counts_cache.get(user_id)
+    if counts is None:
+        result = await session.execute(
+            select(Application.status, func.count())
+            .where(Application.user_id == user_id)
+            .group_by(Application.status)
+        )
+        counts = dict(result.all())
+        status_counts_cache.put(user_id, counts)
+    return counts
+
+def invalidate_status_counts(user_id: int):
+    status_counts_cache.invalidate(user_id)
+
+async def create_application(session: AsyncSession, user_id: int, vacancy_id: int, resume_id: int) -> Optional[int]:
+    """Создает отклик, если вакансия еще открыта, а резюме принадлежит
+    пользователю. Проверка и вставка - один запрос, поэтому карточкам из
+    кэша не доверяем. Возвращает id отклика или None"""
+    now = datetime.utcnow()
+    allowed = select(
+        literal(user_id), literal(vacancy_id), literal(resume_id), literal("new"), literal(now)
+    ).where(
+        select(Vacancy.id)
+        .where(Vacancy.id == vacancy_id, Vacancy.deleted_at.is_(None), vacancy_active(now))
+        .exists(),
+        select(Resume.id)
+        .where(Resume.id == resume_id, Resume.user_id == user_id, Resume.deleted_at.is_(None))
+        .exists()
+    )
+    result = await session.execute(
+        insert(Application)
+        .from_select(["user_id", "vacancy_id", "resume_id", "status", "created_at"], allowed)
+        .returning(Application.id)
+    )
+    application_id = result.scalar_one_or_none()
+    await session.commit()
+    if application_id is not None:
+        invalidate_status_counts(user_id)
+    return application_id
+
+@dataclass(frozen=True)
+class ApplicationItem:
+    application_id: int
+    status: str
+    created_at: datetime
+    vacancy_id: int
+    vacancy_title: Optional[str]  # None, если вакансия удалена
+
+@dataclass
+class ApplicationsPage:
+    items: List[ApplicationItem]
+    first: Optional[Cursor]
+    last: Optional[Cursor]
+    has_prev: bool
+    has_next: bool
+
+def _cursor(item: ApplicationItem) -> Cursor:
+    return item.created_at.isoformat(), item.application_id
+
+async def fetch_applications_page(
+    session: AsyncSession,
+    user_id: int,
+    after: Optional[Cursor] = None,
+    before: Optional[Cursor] = None,
+    limit: int = config.INBOX_PAGE_SIZE
+) -> ApplicationsPage:
+    """Страница откликов соискателя, новые сверху"""
+    stmt = (
+        select(
+            Application.id, Application.status, Application.created_at,
+            Application.vacancy_id, Vacancy.title
+        )
+        # Удаленная вакансия показывается в списке как удаленная
+        .outerjoin(Vacancy, and_(Vacancy.id == Application.vacancy_id, Vacancy.deleted_at.is_(None)))
+        .where(Application.user_id == user_id)
+    )
+
+    rows, has_prev, has_next = await fetch_keyset_rows(
+        session, stmt, (Application.created_at, Application.id),
+        after=cursor_key(after), before=cursor_key(before), limit=limit, descending=True
+    )
+    items = [ApplicationItem(*row) for row in rows]
+    if not items:
+        return ApplicationsPage([], None, None, has_prev, has_next)
+    return ApplicationsPage(items, _cursor(items[0]), _cursor(items[-1]), has_prev, has_next)
+
+def render_applications(page: ApplicationsPage, counts: Dict[str, int]) -> str:
+    """Текст экрана "Мои отклики": итоги по статусам и страница списка"""
+    total = sum(counts.values())
+    lines = [f"📨 Мои отклики: {total}"]
+    if total:
+        lines.append(" ".join(
+            f"{STATUS_ICONS[status]} {STATUS_TITLES[status]}: {counts.get(status, 0)}"
+            for status in STATUS_TITLES
+        ))
+    lines.append("")
+
+    if not page.items:
+        lines.append("Вы еще не откликались на вакансии.")
+        return "\n".join(lines)
+
+    for item in page.items:
+        icon = STATUS_ICONS.get(item.status, "•")
+        title = item.vacancy_title or "вакансия удалена"
+        lines.append(f"{icon} {item.created_at:%d.%m %H:%M} {title}")
+    return "\n".join(lines)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, delete, insert, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import ColumnElement
+from applications import invalidate_status_counts
+from attachments import attachment_store
+from cards import invalidate_vacancy_card
+from config import config
+from database import async_session
+from models import Application, ArchivedApplication, ArchivedVacancy, Vacancy
+from recommendations import recommender
+from search import VACANCY_TTL
+
+# Срок жизни вакансий. Вакансия активна VACANCY_TTL_DAYS дней после
+# создания или продления, затем фоновая архивация переносит ее вместе
+# с откликами в archived_vacancies и archived_applications. Рабочие
+# таблицы (и индекс поиска) содержат только активные вакансии.
+#
+# Вакансии переносятся пачками по ARCHIVE_BATCH_SIZE, каждая пачка -
+# одна транзакция: DELETE ... RETURNING сам решает, какие вакансии
+# ушли в архив, поэтому продленная в этот момент вакансия останется.
+# Локальная копия файла вакансии освобождается, file_id сохраняется.
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_VACANCY_COLUMNS = (
+    "user_id", "title", "description", "company", "salary",
+    "file_id", "file_type", "created_at", "expires_at"
+)
+ARCHIVED_APPLICATION_COLUMNS = ("user_id", "resume_id", "status", "created_at")
+
+def vacancy_expires_at() -> datetime:
+    """Срок новой или продленной вакансии"""
+    return datetime.utcnow() + VACANCY_TTL
+
+def expired(now: datetime) -> ColumnElement:
+    return or_(
+        Vacancy.expires_at <= now,
+        and_(Vacancy.expires_at.is_(None), Vacancy.created_at <= now - VACANCY_TTL)
+    )
+
+async def renew_vacancy(session: AsyncSession, vacancy_id: int, user_id: int) -> Optional[datetime]:
+    """Продлевает вакансию пользователя; возвращает новый срок или None"""
+    expires_at = vacancy_expires_at()
+    result = await session.execute(
+        update(Vacancy)
+        .where(Vacancy.id == vacancy_id, Vacancy.user_id == user_id, Vacancy.deleted_at.is_(None))
+        .values(expires_at=expires_at, version=Vacancy.version + 1)
+    )
+    await session.commit()
+    if not result.rowcount:
+        return None
+    invalidate_vacancy_card(vacancy_id)
+    return expires_at
+
+class VacancyArchiver:
+    def __init__(
+        self,
+        session_maker: sessionmaker = async_session,
+        interval: float = config.ARCHIVE_INTERVAL,
+        batch_size: int = config.ARCHIVE_BATCH_SIZE
+    ):
+        self.session_maker = session_maker
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def _archive_batch(self, session: AsyncSession, now: datetime) -> int:
+        """Переносит в архив одну пачку истекших вакансий; возвращает их число"""
+        result = await session.execute(
+            select(Vacancy.id)
+            .where(expired(now), Vacancy.deleted_at.is_(None))
+            .order_by(Vacancy.id)
+            .limit(self.batch_size)
+        )
+        candidates = result.scalars().all()
+        if not candidates:
+            return 0
+
+        # Условие срока проверяется еще раз: вакансию могли только что продлить
+        result = await session.execute(
+            delete(Vacancy)
+            .where(Vacancy.id.in_(candidates), expired(now), Vacancy.deleted_at.is_(None))
+            .returning(Vacancy.id, Vacancy.file_path, *[getattr(Vacancy, name) for name in ARCHIVED_VACANCY_COLUMNS])
+            .execution_options(synchronize_session=False)
+        )
+        vacancies = result.all()
+        if not vacancies:
+            await session.commit()
+            return 0
+        ids = [row.id for row in vacancies]
+        # Отклики ссылаются на строку архива: id удаленной вакансии может быть выдан повторно
+        result = await session.execute(insert(ArchivedVacancy).returning(ArchivedVacancy.id, ArchivedVacancy.vacancy_id), [
+            {"vacancy_id": row.id, "archived_at": now, **{name: getattr(row, name) for name in ARCHIVED_VACANCY_COLUMNS}}
+            for row in vacancies
+        ])
+        archived_ids = {row.vacancy_id: row.id for row in result.all()}
+
+        result = await session.execute(
+            delete(Application)
+            .where(Application.vacancy_id.in_(ids))
+            .returning(Application.id, Application.vacancy_id, *[getattr(Application, name) for name in ARCHIVED_APPLICATION_COLUMNS])
+            .execution_options(synchronize_session=False)
+        )
+        applications = result.all()
+        if applications:
+            await session.execute(insert(ArchivedApplication), [
+                {
+                    "application_id": row.id,
+                    "archived_vacancy_id": archived_ids[row.vacancy_id],
+                    "archived_at": now,
+                    **{name: getattr(row, name) for name in ARCHIVED_APPLICATION_COLUMNS}
+                }
+                for row in applications
+            ])
+        await session.commit()
+
+        for vacancy_id in ids:
+            invalidate_vacancy_card(vacancy_id)
+            recommender.remove(vacancy_id)
+        for user_id in {row.user_id for row in applications}:
+            invalidate_status_counts(user_id)
+        # В архиве хранится только file_id, локальная копия больше не нужна
+        for path in {row.file_path for row in vacancies if row.file_path}:
+            await attachment_store.release(session, path)
+        return len(vacancies)
+
+    async def run_once(self) -> int:
+        """Один проход архивации; возвращает число перенесенных вакансий"""
+        now = datetime.utcnow()
+        archived = 0
+        async with self.session_maker() as session:
+            while True:
+                count = await self._archive_batch(session, now)
+                archived += count
+                if count < self.batch_size:
+                    return archived
+                # Между пачками обрабатываются обновления
+                await asyncio.sleep(0)
+
+    async def _loop(self):
+        while True:
+            try:
+                archived = await self.run_once()
+                if archived:
+                    logger.info("В архив перенесено истекших вакансий: %s", archived)
+            except Exception:
+                logger.exception("Ошибка архивации истекших вакансий")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        """Запускает периодическую архивацию"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+vacancy_archiver = VacancyArchiver()
@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+from typing import Optional, Set
+from sqlalchemy import select, update, union, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config
+from database import async_session
+from models import Resume, Vacancy
+
+# Хранилище прикрепленных файлов с адресацией по содержимому: файл
+# называется по sha256 и лежит в подкаталогах по первым символам хэша
+# (ab/cd/abcd....pdf). Одинаковые файлы хранятся один раз, каталоги
+# остаются небольшими. Ссылки на файл - это Resume.file_path и
+# Vacancy.file_path; файл без ссылок удаляется, когда фоновая очистка
+# (cleanup.py) удаляет запись, а периодическая сборка мусора подбирает
+# все, что осталось.
+
+logger = logging.getLogger(__name__)
+
+TEMP_DIR = "tmp"
+CHUNK_SIZE = 1024 * 1024
+
+class AttachmentStore:
+    def __init__(
+        self,
+        root: str = config.ATTACHMENTS_DIR,
+        gc_interval: float = config.ATTACHMENTS_GC_INTERVAL,
+        gc_grace: float = config.ATTACHMENTS_GC_GRACE
+    ):
+        self.root = root
+        self.gc_interval = gc_interval
+        # Свежие файлы не трогаем: ссылку на них могли еще не записать в базу
+        self.gc_grace = gc_grace
+        self._gc_task: Optional[asyncio.Task] = None
+
+    def temp_path(self, name: str) -> str:
+        """Путь для временного файла внутри хранилища (та же файловая система)"""
+        directory = os.path.join(self.root, TEMP_DIR)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, name)
+
+    def blob_path(self, digest: str, extension: str = "") -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}{extension.lower()}")
+
+    def _put(self, source: str, extension: str, keep_source: bool) -> str:
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        path = self.blob_path(digest.hexdigest(), extension)
+
+        if os.path.exists(path):
+            # Такой файл уже есть; обновляем время, чтобы его не удалил сборщик мусора
+            os.utime(path)
+            if not keep_source:
+                os.remove(source)
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if keep_source:
+            partial = self.temp_path(os.path.basename(path))
+            shutil.copyfile(source, partial)
+            os.replace(partial, path)
+        else:
+            os.replace(source, path)
+        return path
+
+    async def put(self, source: str, extension: str = "", keep_source: bool = False) -> str:
+        """Помещает файл в хранилище и возвращает его путь"""
+        return await asyncio.to_thread(self._put, source, extension, keep_source)
+
+    async def release(self, session: AsyncSession, path: Optional[str]):
+        """Удаляет файл, если на него не ссылается ни одна запись"""
+        if not path:
+            return
+        for model in (Resume, Vacancy):
+            result = await session.execute(select(func.count()).select_from(model).where(model.file_path == path))
+            if result.scalar():
+                return
+        await asyncio.to_thread(_remove, path)
+
+    async def collect_garbage(self) -> int:
+        """Удаляет файлы хранилища без ссылок; возвращает число удаленных файлов"""
+        async with async_session() as session:
+            await self._import_legacy(session)
+            result = await session.execute(union(
+                select(Resume.file_path).where(Resume.file_path.isnot(None)),
+                select(Vacancy.file_path).where(Vacancy.file_path.isnot(None))
+            ))
+            referenced = set(result.scalars())
+        return await asyncio.to_thread(self._sweep, referenced)
+
+    def _sweep(self, referenced: Set[str]) -> int:
+        cutoff = time.time() - self.gc_grace
+        removed = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                if path in referenced:
+                    continue
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    async def _import_legacy(self, session: AsyncSession):
+        """Переносит файлы из старых каталогов (resumes/, vacancies/) в хранилище.
+
+        Старые пути без файла (вакансии хранили заглушку vacancy_files/...)
+        очищаются, чтобы не проверять их на каждом проходе; файл по file_id
+        скачает очередь загрузки при следующем запуске.
+        """
+        for model in (Resume, Vacancy):
+            result = await session.execute(
+                select(model.id, model.file_path).where(
+                    model.file_path.isnot(None),
+                    ~model.file_path.startswith(self.root + os.sep)
+                )
+            )
+            for record_id, file_path in result.all():
+                if not await asyncio.to_thread(os.path.exists, file_path):
+                    await session.execute(
+                        update(model)
+                        .where(model.id == record_id, model.file_path == file_path)
+                        .values(file_path=None)
+                    )
+                    await session.commit()
+                    continue
+                path = await self.put(file_path, os.path.splitext(file_path)[1], keep_source=True)
+                await session.execute(
+                    update(model)
+                    .where(model.id == record_id, model.file_path == file_path)
+                    .values(file_path=path)
+                )
+                await session.commit()
+                await self.release(session, file_path)
+
+    async def _gc_loop(self):
+        while True:
+            try:
+                removed = await self.collect_garbage()
+                if removed:
+                    logger.info("Сборка мусора: удалено файлов без ссылок: %s", removed)
+            except Exception:
+                logger.exception("Ошибка сборки мусора в хранилище файлов")
+            await asyncio.sleep(self.gc_interval)
+
+    async def start(self):
+        """Запускает периодическую сборку мусора"""
+        if self._gc_task is None and self.gc_interval > 0:
+            self._gc_task = asyncio.create_task(self._gc_loop())
+
+    async def close(self):
+        if self._gc_task is not None:
+            self._gc_task.cancel()
+            self._gc_task = None
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+        logger.debug("Файл удален: %s", path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        logger.exception("Ошибка при удалении файла %s", path)
+
+attachment_store = AttachmentStore()
@@ -0,0 +1,71 @@
+import json
+import math
+import os
+import sys
+from typing import Dict, List, Optional, Sequence
+
+# Общие функции бенчмарков. Модули бота импортируются как в main.py
+# (from config import config), поэтому каталог бота добавляется в sys.path,
+# а окружение нужно настроить до первого импорта config.
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def setup_environment(workdir: str, **env: str):
+    """Переходит в рабочий каталог бенчмарка и задает переменные окружения бота"""
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)
+    for key, value in env.items():
+        if value is not None:
+            os.environ[key] = str(value)
+    if BOT_DIR not in sys.path:
+        sys.path.insert(0, BOT_DIR)
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Перцентиль по методу ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """Сводка по выборкам времени (секунды) -> миллисекунды"""
+    summary = {}
+    for name, values in samples.items():
+        summary[name] = {
+            "count": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": max(values) * 1000 if values else 0.0
+        }
+    return summary
+
+def print_table(title: str, summary: Dict[str, Dict[str, float]]):
+    print(f"\n{title}")
+    print(f"{'':<34}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in sorted(summary.items(), key=lambda item: -item[1]["p99_ms"]):
+        print(
+            f"{name:<34}{row['count']:>8}{row['p50_ms']:>10.2f}"
+            f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.2f}"
+        )
+
+def save_report(path: str, report: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+def compare_with_baseline(report: dict, baseline_path: str, max_regression: float,
+                          section: str, metric: str = "p99_ms", min_ms: float = 1.0) -> List[str]:
+    """Сравнивает отчет с сохраненным; возвращает список регрессий"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, row in report.get(section, {}).items():
+        old: Optional[dict] = baseline.get(section, {}).get(name)
+        if not old:
+            continue
+        # Очень быстрые операции слишком шумные для сравнения в процентах
+        limit = max(old[metric] * (1 + max_regression), old[metric] + min_ms)
+        if row[metric] > limit:
+            regressions.append(f"{name}: {metric} {old[metric]:.2f} -> {row[metric]:.2f}")
+    return regressions
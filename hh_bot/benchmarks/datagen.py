@@ -0,0 +1,217 @@
+"""Генератор синтетических данных для схемы models.py: пользователи,
+вакансии, резюме и отклики с правдоподобными русскими текстами.
+Отклики распределены неравномерно (закон Ципфа): несколько вакансий и
+работодателей получают большую часть откликов, как в реальной базе.
+
+Запуск из каталога бота (база должна быть пустой):
+    python benchmarks/datagen.py --vacancies 1000000 --database sqlite+aiosqlite:///bench.sqlite3
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Callable, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import setup_environment
+
+LEVELS = ["", "", "Младший ", "Старший ", "Ведущий ", "Главный "]
+SPECIALTIES = [
+    "Python разработчик", "Java разработчик", "Frontend разработчик", "Бухгалтер", "Менеджер по продажам",
+    "Менеджер проектов", "Аналитик данных", "Системный администратор", "Инженер-конструктор",
+    "Водитель-экспедитор", "Кладовщик", "Дизайнер интерфейсов", "Юрист", "Маркетолог", "Оператор call-центра",
+    "Тестировщик", "Продавец-консультант", "Менеджер по закупкам", "HR-специалист", "Электромонтажник"
+]
+COMPANY_FORMS = ["ООО", "АО", "ПАО", "ИП"]
+COMPANY_ROOTS = [
+    "Ромашка", "Вектор", "СеверСталь", "Технопарк", "ТрансЛогистик", "Альфа-Софт", "Гранит", "Меридиан",
+    "Интегра", "Профстрой", "Сибирские сети", "Волга-Трейд", "Цифровые решения", "Агрохолдинг Заря"
+]
+CITIES = ["Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань", "Нижний Новгород", "удаленно"]
+SKILLS = [
+    "опыт работы от года", "знание 1С", "английский язык на уровне чтения документации", "SQL",
+    "умение работать в команде", "водительские права категории B", "высшее образование",
+    "навыки деловой переписки", "Docker и Linux", "знание Excel", "готовность к командировкам"
+]
+CONDITIONS = [
+    "официальное оформление", "ДМС", "гибкий график", "обучение за счет компании", "премии по итогам квартала",
+    "современный офис", "компенсация питания"
+]
+
+@dataclass
+class Scale:
+    users: int
+    vacancies: int
+    resumes: int
+    applications: int
+
+    @classmethod
+    def for_vacancies(cls, vacancies: int) -> "Scale":
+        """Соотношения, похожие на рабочую базу"""
+        return cls(
+            users=max(10, vacancies // 2),
+            vacancies=vacancies,
+            resumes=max(1, vacancies // 2),
+            applications=vacancies * 3
+        )
+
+# id пользователя совпадает с telegram_id: в колонках user_id бот хранит
+# telegram_id, а внешние ключи ссылаются на users.id
+USER_ID_BASE = 1_000_000
+
+def zipf_cum_weights(n: int, exponent: float = 1.1) -> List[float]:
+    return list(accumulate(1 / (rank + 1) ** exponent for rank in range(n)))
+
+def salary(rng: random.Random) -> str:
+    amount = rng.randrange(30, 400) * 1000
+    return rng.choice([
+        str(amount),
+        f"{amount:,} руб.".replace(",", " "),
+        f"от {amount}",
+        f"{amount} - {amount + rng.randrange(10, 100) * 1000}",
+        "По договоренности"
+    ])
+
+def vacancy_description(rng: random.Random) -> str:
+    return (
+        f"Город: {rng.choice(CITIES)}. Требования: {', '.join(rng.sample(SKILLS, 3))}. "
+        f"Условия: {', '.join(rng.sample(CONDITIONS, 2))}."
+    )
+
+def random_datetime(rng: random.Random, now: datetime) -> datetime:
+    return now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+def batches(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def generate(engine, scale: Scale, seed: int = 1, batch_size: int = 5000,
+                   progress: Callable[[str], None] = print):
+    """Заполняет пустую базу; id всех записей идут подряд с 1"""
+    from sqlalchemy import insert, text
+    from models import User, Vacancy, Resume, Application
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    employers = scale.users // 2 or 1
+    seekers = scale.users - employers or 1
+    employer_ids = [USER_ID_BASE + i for i in range(employers)]
+    seeker_ids = [USER_ID_BASE + employers + i for i in range(seekers)]
+
+    def users():
+        for i, user_id in enumerate(employer_ids + seeker_ids):
+            yield {
+                "id": user_id, "telegram_id": user_id, "username": f"user{user_id}",
+                "role": "employer" if i < employers else "job_seeker", "created_at": random_datetime(rng, now)
+            }
+
+    # Несколько крупных работодателей публикуют большую часть вакансий
+    employer_weights = zipf_cum_weights(employers, 0.8)
+
+    def vacancies():
+        for vacancy_id in range(1, scale.vacancies + 1):
+            yield {
+                "id": vacancy_id,
+                "user_id": rng.choices(employer_ids, cum_weights=employer_weights)[0],
+                "title": rng.choice(LEVELS) + rng.choice(SPECIALTIES),
+                "description": vacancy_description(rng),
+                "company": f"{rng.choice(COMPANY_FORMS)} «{rng.choice(COMPANY_ROOTS)}»",
+                "salary": salary(rng),
+                "created_at": random_datetime(rng, now)
+            }
+
+    resume_owners = [rng.choice(seeker_ids) for _ in range(scale.resumes)]
+
+    def resumes():
+        for resume_id, owner in enumerate(resume_owners, start=1):
+            yield {
+                "id": resume_id,
+                "user_id": owner,
+                "title": rng.choice(LEVELS) + rng.choice(SPECIALTIES),
+                "description": f"Навыки: {', '.join(rng.sample(SKILLS, 4))}.",
+                "experience": f"{rng.randrange(0, 25)} лет",
+                "created_at": random_datetime(rng, now)
+            }
+
+    # Популярность вакансий не связана с их id
+    popular_vacancies = list(range(1, scale.vacancies + 1))
+    rng.shuffle(popular_vacancies)
+    vacancy_weights = zipf_cum_weights(scale.vacancies)
+
+    def applications():
+        for application_id in range(1, scale.applications + 1):
+            resume_id = rng.randrange(1, scale.resumes + 1)
+            yield {
+                "id": application_id,
+                "user_id": resume_owners[resume_id - 1],
+                "vacancy_id": rng.choices(popular_vacancies, cum_weights=vacancy_weights)[0],
+                "resume_id": resume_id,
+                "status": rng.choices(["new", "invited", "rejected"], weights=[70, 10, 20])[0],
+                "created_at": random_datetime(rng, now)
+            }
+
+    for model, rows, total in (
+        (User, users(), scale.users),
+        (Vacancy, vacancies(), scale.vacancies),
+        (Resume, resumes(), scale.resumes),
+        (Application, applications(), scale.applications)
+    ):
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            for batch in batches(rows, batch_size):
+                await conn.execute(insert(model.__table__), batch)
+        elapsed = time.perf_counter() - started
+        progress(f"{model.__tablename__}: {total} строк за {elapsed:.1f} с ({total / elapsed:.0f} строк/с)")
+
+    async with engine.begin() as conn:
+        # Статистика для планировщика, как после обычного наполнения базы
+        await conn.execute(text("ANALYZE"))
+
+    if engine.dialect.name == "postgresql":
+        # id вставлены явно, двигаем последовательности, чтобы бот мог добавлять записи
+        async with engine.begin() as conn:
+            for model in (User, Vacancy, Resume, Application):
+                table = model.__tablename__
+                await conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+                ))
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vacancies", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=None, help="по умолчанию половина от числа вакансий")
+    parser.add_argument("--resumes", type=int, default=None, help="по умолчанию половина от числа вакансий")
+    parser.add_argument("--applications", type=int, default=None, help="по умолчанию втрое больше вакансий")
+    parser.add_argument("--database", default="sqlite+aiosqlite:///bench.sqlite3", help="DATABASE_URL")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+async def main(args: argparse.Namespace):
+    import database
+
+    scale = Scale.for_vacancies(args.vacancies)
+    scale.users = args.users or scale.users
+    scale.resumes = args.resumes or scale.resumes
+    scale.applications = args.applications if args.applications is not None else scale.applications
+
+    await database.init_db()
+    await generate(database.engine, scale, args.seed, args.batch_size)
+    await database.engine.dispose()
+
+if __name__ == "__main__":
+    args = parse_args()
+    setup_environment(os.getcwd(), DATABASE_URL=args.database)
+    asyncio.run(main(args))
@@ -0,0 +1,278 @@
+"""Сквозной бенчмарк обработчиков: воспроизводит сценарии пользователей
+через Dispatcher с локальной заменой Bot API (fake_telegram.py) и
+считает пропускную способность и задержки по обработчикам и сценариям.
+
+Запуск из каталога бота:
+    python benchmarks/replay.py --pairs 50 --concurrency 20 --rounds 3
+    python benchmarks/replay.py --json result.json
+    python benchmarks/replay.py --baseline result.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from common import setup_environment, summarize, print_table, save_report, compare_with_baseline
+
+TITLES = [
+    "Python разработчик", "Менеджер по продажам", "Бухгалтер", "Frontend разработчик",
+    "Менеджер проектов", "Водитель-экспедитор", "Аналитик данных", "Дизайнер интерфейсов"
+]
+COMPANIES = ["Ромашка", "Вектор", "СеверСталь", "Технопарк", "ТрансЛогистик", "Альфа-Софт"]
+SALARIES = ["80000", "120 000 руб.", "от 150000", "По договоренности"]
+QUERIES = ["разработчик", "менеджер", "аналитик", "продажам", "дизайнер"]
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=20, help="пар работодатель + соискатель за раунд")
+    parser.add_argument("--rounds", type=int, default=3, help="раундов, в каждом новые пользователи")
+    parser.add_argument("--concurrency", type=int, default=20, help="одновременно активных пользователей")
+    parser.add_argument("--rate", type=float, default=0, help="не больше обновлений в секунду, 0 - без ограничения")
+    parser.add_argument("--pages", type=int, default=3, help="переходов по результатам поиска")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="задержка ответа Bot API, секунд")
+    parser.add_argument("--database", default=None, help="DATABASE_URL, по умолчанию SQLite во временном каталоге")
+    parser.add_argument("--fsm", default=None, help="FSM_STORAGE: memory, sql или redis")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workdir", default=None, help="рабочий каталог (по умолчанию временный, удаляется)")
+    parser.add_argument("--json", default=None, help="сохранить отчет в JSON")
+    parser.add_argument("--baseline", default=None, help="сравнить с отчетом JSON и завершиться с ошибкой при регрессии")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="допустимый рост p99, доля")
+    return parser.parse_args()
+
+class HandlerTimingMiddleware:
+    """Inner middleware: время выполнения самого обработчика"""
+
+    def __init__(self, samples: Dict[str, List[float]], resolve: Optional[Callable[[Any], Any]] = None):
+        self.samples = samples
+        # Для кнопок: конкретный обработчик из таблицы вместо общего диспетчера
+        self.resolve = resolve
+
+    async def __call__(self, handler: Callable[..., Awaitable[Any]], event: Any, data: Dict[str, Any]) -> Any:
+        callback = (self.resolve(event) if self.resolve else None) or data["handler"].callback
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.samples[callback.__name__].append(time.perf_counter() - started)
+
+class Runner:
+    def __init__(self, args: argparse.Namespace):
+        # Модули бота импортируются только после настройки окружения
+        import fake_telegram
+        import handlers
+        import main
+        from aiogram import Bot
+        from aiogram.dispatcher.event.bases import UNHANDLED
+        from delivery import RateLimiter
+
+        self.args = args
+        self.fake = fake_telegram
+        self.unhandled_marker = UNHANDLED
+        self.callbacks = handlers.callbacks
+        self.session = fake_telegram.FakeTelegramSession(latency=args.api_latency)
+        self.bot = Bot(fake_telegram.FAKE_BOT_TOKEN, session=self.session)
+        self.dp = main.create_dispatcher()
+        self.limiter = RateLimiter(1 / args.rate) if args.rate else None
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+
+        self.handler_samples: Dict[str, List[float]] = defaultdict(list)
+        self.flow_samples: Dict[str, List[float]] = defaultdict(list)
+        self.unhandled: Dict[str, int] = defaultdict(int)
+        self.errors = 0
+        self.updates = 0
+
+        handlers.router.message.middleware(HandlerTimingMiddleware(self.handler_samples))
+        handlers.router.callback_query.middleware(HandlerTimingMiddleware(
+            self.handler_samples, lambda event: self.callbacks.handler_for(event.data)
+        ))
+
+    async def feed(self, update: Dict[str, Any], flow: str):
+        if self.limiter:
+            await self.limiter.wait()
+        started = time.perf_counter()
+        try:
+            result = await self.dp.feed_raw_update(self.bot, update)
+        except Exception as e:
+            self.errors += 1
+            if self.errors <= 5:
+                print(f"Ошибка в сценарии {flow}: {e!r}")
+            return
+        finally:
+            self.flow_samples[flow].append(time.perf_counter() - started)
+            self.updates += 1
+        if "callback_query" in update:
+            # Неизвестную кнопку диспетчер обрабатывает сам, отвечая "кнопка устарела"
+            if self.callbacks.handler_for(update["callback_query"]["data"]) is None:
+                self.unhandled[f"{flow} (callback)"] += 1
+        elif result is self.unhandled_marker:
+            self.unhandled[f"{flow} (message)"] += 1
+
+class User:
+    """Виртуальный пользователь: отправляет обновления по порядку"""
+
+    def __init__(self, runner: Runner, user_id: int):
+        self.runner = runner
+        self.user_id = user_id
+        self._message_ids = iter(range(1, 10 ** 6))
+
+    async def message(self, text: str, flow: str):
+        update = self.runner.fake.make_message_update(self.user_id, text, message_id=next(self._message_ids))
+        await self.runner.feed(update, flow)
+
+    async def document(self, file_name: str, flow: str):
+        update = self.runner.fake.make_document_update(self.user_id, file_name, message_id=next(self._message_ids))
+        await self.runner.feed(update, flow)
+
+    async def callback(self, data: Optional[str], flow: str):
+        if data is None:
+            return
+        update = self.runner.fake.make_callback_update(self.user_id, data, message_id=next(self._message_ids))
+        await self.runner.feed(update, flow)
+
+    def button(self, prefix: str, last_only: bool = True) -> Optional[str]:
+        buttons = self.runner.session.buttons(self.user_id, prefix, last_only=last_only)
+        return buttons[0] if buttons else None
+
+async def employer_post_vacancy(user: User, rng: random.Random):
+    await user.message("/start", "registration")
+    await user.callback("employer", "registration")
+    await user.callback("post_vacancy", "vacancy_wizard")
+    await user.message(rng.choice(TITLES), "vacancy_wizard")
+    await user.message("Требования: опыт от года, знание профильных инструментов.", "vacancy_wizard")
+    await user.message(rng.choice(COMPANIES), "vacancy_wizard")
+    await user.message(rng.choice(SALARIES), "vacancy_wizard")
+    await user.callback("skip_file", "vacancy_wizard")
+    await user.callback("confirm_skip_file", "vacancy_wizard")
+    await user.callback("my_vacancies", "my_vacancies")
+    from callbacks import ViewVacancy
+    await user.callback(user.button(f"{ViewVacancy.__prefix__}:"), "my_vacancies")
+
+async def seeker_create_resume(user: User, rng: random.Random):
+    await user.message("/start", "registration")
+    await user.callback("job_seeker", "registration")
+    await user.callback("create_resume", "resume_wizard")
+    await user.message(rng.choice(TITLES), "resume_wizard")
+    await user.message("Высшее образование, курсы повышения квалификации.", "resume_wizard")
+    await user.message(f"{rng.randint(1, 10)} лет", "resume_wizard")
+    await user.document("resume.pdf", "resume_wizard")
+
+async def seeker_search_and_apply(user: User, rng: random.Random, pages: int):
+    await user.callback("search_vacancies", "search")
+    await user.message(rng.choice(QUERIES), "search")
+    for _ in range(pages):
+        if not user.button("next_vacancy"):
+            break
+        await user.callback("next_vacancy", "search")
+    if user.button("prev_vacancy"):
+        await user.callback("prev_vacancy", "search")
+
+    from callbacks import ApplyVacancy, SelectResume
+    apply = user.button(f"{ApplyVacancy.__prefix__}:")
+    if apply:
+        await user.callback(apply, "apply")
+        await user.callback(user.button(f"{SelectResume.__prefix__}:"), "apply")
+
+async def employer_review(user: User, rng: random.Random):
+    from callbacks import InviteApplication, RejectApplication
+    # Уведомления об откликах приходят через очередь, поэтому смотрим все клавиатуры чата
+    for invite in user.runner.session.buttons(user.user_id, f"{InviteApplication.__prefix__}:", last_only=False):
+        if rng.random() < 0.5:
+            await user.callback(invite, "invite_reject")
+        else:
+            application_id = InviteApplication.unpack(invite).application_id
+            await user.callback(RejectApplication(application_id=application_id).pack(), "invite_reject")
+
+async def run_phase(runner: Runner, users: List[User], scenario: Callable[..., Awaitable[None]], *args: Any):
+    async def run_user(user: User):
+        async with runner.semaphore:
+            await scenario(user, random.Random(f"{runner.args.seed}-{user.user_id}"), *args)
+    await asyncio.gather(*(run_user(user) for user in users))
+
+async def run(args: argparse.Namespace) -> dict:
+    import database
+    from delivery import delivery_queue
+
+    await database.init_db()
+    runner = Runner(args)
+    started = time.perf_counter()
+
+    for round_number in range(args.rounds):
+        base = (round_number + 1) * 100_000
+        employers = [User(runner, 10_000_000 + base + i) for i in range(args.pairs)]
+        seekers = [User(runner, 20_000_000 + base + i) for i in range(args.pairs)]
+
+        await asyncio.gather(
+            run_phase(runner, employers, employer_post_vacancy),
+            run_phase(runner, seekers, seeker_create_resume)
+        )
+        await run_phase(runner, seekers, seeker_search_and_apply, args.pages)
+        # Дожидаемся, пока уведомления об откликах дойдут до работодателей
+        await delivery_queue.close()
+        await run_phase(runner, employers, employer_review)
+
+    elapsed = time.perf_counter() - started
+    await runner.dp.emit_shutdown()
+
+    report = {
+        "updates": runner.updates,
+        "seconds": elapsed,
+        "updates_per_second": runner.updates / elapsed if elapsed else 0.0,
+        "errors": runner.errors,
+        "unhandled": dict(runner.unhandled),
+        "bot_api_calls": len(runner.session.requests),
+        "handlers": summarize(runner.handler_samples),
+        "flows": summarize(runner.flow_samples)
+    }
+    return report
+
+def main():
+    args = parse_args()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="hh_bot_bench_")
+    # Пути отчетов считаем от каталога запуска, а не от рабочего каталога
+    args.json = args.json and os.path.abspath(args.json)
+    args.baseline = args.baseline and os.path.abspath(args.baseline)
+
+    setup_environment(
+        workdir,
+        DATABASE_URL=args.database,
+        FSM_STORAGE=args.fsm,
+        # Лимиты Telegram для фейкового API не нужны, иначе очередь уведомлений растет
+        DELIVERY_CHAT_INTERVAL="0",
+        DELIVERY_GLOBAL_RATE="1000000",
+        METRICS_PORT="0"
+    )
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Обновлений: {report['updates']} за {report['seconds']:.2f} с "
+          f"({report['updates_per_second']:.1f} обновлений/с), вызовов Bot API: {report['bot_api_calls']}")
+    print(f"Ошибок: {report['errors']}")
+    for name, count in report["unhandled"].items():
+        print(f"Необработанных обновлений в сценарии {name}: {count}")
+    print_table("Время обработчиков", report["handlers"])
+    print_table("Время обновления по сценариям (включая middleware)", report["flows"])
+
+    if args.json:
+        save_report(args.json, report)
+    if args.baseline:
+        regressions = compare_with_baseline(report, args.baseline, args.max_regression, "handlers")
+        if regressions:
+            print("\nРегрессии относительно " + args.baseline)
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+    if report["errors"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
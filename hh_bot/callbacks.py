@@ -0,0 +1,142 @@
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, NamedTuple, Optional, Type, Union
+from aiogram.filters.callback_data import CallbackData
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+from metrics import label_handler
+
+# Данные inline-кнопок. Кнопка с параметрами кодируется классом CallbackData
+# в виде "префикс:поле:поле" (aiogram проверяет лимит Telegram в 64 байта),
+# кнопка без параметров - просто строкой без ":". Обработчик находится по
+# части до первого ":" одним поиском в словаре, а не перебором фильтров
+# всех обработчиков; префиксы не пересекаются, повторная регистрация - ошибка.
+
+logger = logging.getLogger(__name__)
+
+SEPARATOR = ":"
+
+class ViewVacancy(CallbackData, prefix="vv"):
+    vacancy_id: int
+
+class DeleteVacancy(CallbackData, prefix="dv"):
+    vacancy_id: int
+
+class ConfirmDeleteVacancy(CallbackData, prefix="cdv"):
+    vacancy_id: int
+
+class RenewVacancy(CallbackData, prefix="rnv"):
+    vacancy_id: int
+
+class ViewResume(CallbackData, prefix="vr"):
+    resume_id: int
+
+class DeleteResume(CallbackData, prefix="dr"):
+    resume_id: int
+
+class ConfirmDeleteResume(CallbackData, prefix="cdr"):
+    resume_id: int
+
+class ApplyVacancy(CallbackData, prefix="av"):
+    vacancy_id: int
+
+class SelectResume(CallbackData, prefix="sr"):
+    resume_id: int
+    vacancy_id: int
+
+class BackToVacancy(CallbackData, prefix="bv"):
+    vacancy_id: int
+
+class RecommendedVacancy(CallbackData, prefix="rv"):
+    vacancy_id: int
+
+class Unsubscribe(CallbackData, prefix="us"):
+    search_id: int
+
+class VacancyResponses(CallbackData, prefix="vrs"):
+    vacancy_id: int
+
+class InboxStatus(CallbackData, prefix="is"):
+    status: str  # "all" или статус отклика
+
+class InboxApplication(CallbackData, prefix="ia"):
+    application_id: int
+
+class InviteApplication(CallbackData, prefix="ai"):
+    application_id: int
+
+class RejectApplication(CallbackData, prefix="ar"):
+    application_id: int
+
+class ExportData(CallbackData, prefix="ex"):
+    fmt: str  # csv или xlsx
+
+Handler = Callable[..., Awaitable[Any]]
+
+class _Route(NamedTuple):
+    handler: Handler
+    factory: Optional[Type[CallbackData]]
+    state: Optional[str]
+    params: Optional[FrozenSet[str]]  # None - обработчик принимает **kwargs
+
+class CallbackTable:
+    def __init__(self):
+        self._routes: Dict[str, _Route] = {}
+
+    def register(self, *keys: Union[str, Type[CallbackData]], state: Optional[State] = None):
+        """Декоратор: обработчик кнопок с указанными строками или классами данных.
+
+        Обработчик класса получает разобранные данные в аргументе callback_data.
+        state - кнопка действует только в этом состоянии FSM (иначе она устарела).
+        """
+        def decorator(handler: Handler) -> Handler:
+            signature = inspect.signature(handler)
+            accepts_any = any(p.kind is inspect.Parameter.VAR_KEYWORD for p in signature.parameters.values())
+            params = None if accepts_any else frozenset(signature.parameters)
+            for key in keys:
+                factory = None
+                if isinstance(key, type):
+                    if key.__separator__ != SEPARATOR:
+                        raise ValueError(f"{key.__name__}: поддерживается только разделитель {SEPARATOR!r}")
+                    factory, key = key, key.__prefix__
+                elif SEPARATOR in key:
+                    raise ValueError(f"Кнопка без параметров не может содержать {SEPARATOR!r}: {key!r}")
+                if key in self._routes:
+                    raise ValueError(f"Префикс {key!r} уже занят обработчиком {self._routes[key].handler.__name__}")
+                self._routes[key] = _Route(handler, factory, state.state if state else None, params)
+            return handler
+        return decorator
+
+    def _route(self, callback_data: Optional[str]) -> Optional[_Route]:
+        return self._routes.get((callback_data or "").split(SEPARATOR, 1)[0])
+
+    def handler_for(self, callback_data: Optional[str]) -> Optional[Handler]:
+        """Обработчик, которому будет передана кнопка с такими данными"""
+        route = self._route(callback_data)
+        return route.handler if route else None
+
+    async def dispatch(self, callback: CallbackQuery, **data: Any) -> Any:
+        """Обработчик всех callback_query роутера"""
+        route = self._route(callback.data)
+        if route is None:
+            return await self._stale(callback)
+
+        if route.factory is not None:
+            try:
+                data["callback_data"] = route.factory.unpack(callback.data)
+            except (TypeError, ValueError):
+                return await self._stale(callback)
+        if route.state is not None and await data["state"].get_state() != route.state:
+            return await self._stale(callback)
+
+        label_handler(route.handler.__name__)
+        if route.params is not None:
+            data = {name: value for name, value in data.items() if name in route.params}
+        return await route.handler(callback, **data)
+
+    @staticmethod
+    async def _stale(callback: CallbackQuery):
+        # Кнопка из старого сообщения: другой формат данных или закончившийся диалог
+        logger.debug("Stale callback data: %r", callback.data)
+        label_handler("stale_callback")
+        await callback.answer("Кнопка устарела. Откройте меню заново: /menu", show_alert=True)
@@ -0,0 +1,189 @@
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+from aiogram import Bot
+from aiogram.methods import TelegramMethod, SendMessage, SendPhoto, SendDocument
+from aiogram.types import Message, InlineKeyboardMarkup, InputMediaPhoto, InputMediaDocument
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config
+from models import Vacancy, Resume
+from ttl_cache import TTLCache
+
+# Карточки вакансий и резюме: текст и способ отправки файла считаются
+# один раз и кэшируются по (тип, id). Запись в кэше сверяется с
+# версией строки, а при обновлении или удалении сбрасывается.
+#
+# Карточка с файлом отправляется одним сообщением: текст идет подписью
+# к фото или документу. Если текст длиннее лимита подписи, файл и текст
+# отправляются двумя сообщениями, клавиатура - у последнего.
+
+logger = logging.getLogger(__name__)
+
+# Telegram ограничивает подпись к медиа 1024 символами
+CAPTION_LIMIT = 1024
+
+@dataclass(frozen=True)
+class Card:
+    id: int
+    version: int
+    owner_id: int
+    title: str
+    text: str
+    file_id: Optional[str] = None
+    file_kind: Optional[str] = None  # photo или document
+    file_caption: Optional[str] = None
+
+# (тип, id) -> Card
+card_cache = TTLCache(config.CARD_CACHE_SIZE, config.CARD_CACHE_TTL)
+
+def _file_kind(file_id: Optional[str], file_type: Optional[str]) -> Optional[str]:
+    if not file_id:
+        return None
+    return file_type or "document"
+
+def render_vacancy_card(vacancy: Vacancy) -> Card:
+    """Возвращает карточку вакансии, используя кэш, если версия совпадает"""
+    card = card_cache.get(("vacancy", vacancy.id))
+    if card is not None and card.version == vacancy.version:
+        return card
+
+    card = Card(
+        id=vacancy.id,
+        version=vacancy.version,
+        owner_id=vacancy.user_id,
+        title=vacancy.title,
+        text=(
+            f"Должность: {vacancy.title}\n"
+            f"Компания: {vacancy.company}\n"
+            f"Зарплата: {vacancy.salary}\n"
+            f"Описание: {vacancy.description}\n"
+            f"Дата создания: {vacancy.created_at.strftime('%d.%m.%Y %H:%M')}"
+            + (f"\nАктивна до: {vacancy.expires_at.strftime('%d.%m.%Y')}" if vacancy.expires_at else "")
+        ),
+        file_id=vacancy.file_id,
+        file_kind=_file_kind(vacancy.file_id, vacancy.file_type),
+        file_caption=f"Файл вакансии: {vacancy.title}"
+    )
+    card_cache.put(("vacancy", card.id), card)
+    return card
+
+def render_resume_card(resume: Resume) -> Card:
+    """Возвращает карточку резюме, используя кэш, если версия совпадает"""
+    card = card_cache.get(("resume", resume.id))
+    if card is not None and card.version == resume.version:
+        return card
+
+    card = Card(
+        id=resume.id,
+        version=resume.version,
+        owner_id=resume.user_id,
+        title=resume.title,
+        text=(
+            f"Название: {resume.title}\n"
+            f"Описание: {resume.description}\n"
+            f"Опыт работы: {resume.experience}\n"
+            f"Дата создания: {resume.created_at.strftime('%d.%m.%Y %H:%M')}"
+        ),
+        file_id=resume.file_id,
+        file_kind=_file_kind(resume.file_id, resume.file_type),
+        file_caption=f"Файл резюме: {resume.title}"
+    )
+    card_cache.put(("resume", card.id), card)
+    return card
+
+async def get_vacancy_card(session: AsyncSession, vacancy_id: int) -> Optional[Card]:
+    """Карточка вакансии по id; из базы читается только при промахе кэша"""
+    card = card_cache.get(("vacancy", vacancy_id))
+    if card is not None:
+        return card
+    result = await session.execute(
+        select(Vacancy).where(Vacancy.id == vacancy_id, Vacancy.deleted_at.is_(None))
+    )
+    vacancy = result.scalar_one_or_none()
+    return render_vacancy_card(vacancy) if vacancy else None
+
+async def get_resume_card(session: AsyncSession, resume_id: int) -> Optional[Card]:
+    """Карточка резюме по id; из базы читается только при промахе кэша"""
+    card = card_cache.get(("resume", resume_id))
+    if card is not None:
+        return card
+    result = await session.execute(
+        select(Resume).where(Resume.id == resume_id, Resume.deleted_at.is_(None))
+    )
+    resume = result.scalar_one_or_none()
+    return render_resume_card(resume) if resume else None
+
+def invalidate_vacancy_card(vacancy_id: int):
+    card_cache.invalidate(("vacancy", vacancy_id))
+
+def invalidate_resume_card(resume_id: int):
+    card_cache.invalidate(("resume", resume_id))
+
+def card_file_method(card: Card, chat_id: int) -> TelegramMethod:
+    """Вызов Bot API для отправки файла карточки"""
+    if card.file_kind == "photo":
+        return SendPhoto(chat_id=chat_id, photo=card.file_id, caption=card.file_caption)
+    return SendDocument(chat_id=chat_id, document=card.file_id, caption=card.file_caption)
+
+def card_methods(card: Card, chat_id: int, text: Optional[str] = None,
+                 reply_markup: Optional[InlineKeyboardMarkup] = None) -> List[TelegramMethod]:
+    """Вызовы Bot API для отправки карточки: один, если текст помещается в подпись"""
+    text = text or card.text
+    if not card.file_id:
+        return [SendMessage(chat_id=chat_id, text=text, reply_markup=reply_markup)]
+    if len(text) <= CAPTION_LIMIT:
+        if card.file_kind == "photo":
+            return [SendPhoto(chat_id=chat_id, photo=card.file_id, caption=text, reply_markup=reply_markup)]
+        return [SendDocument(chat_id=chat_id, document=card.file_id, caption=text, reply_markup=reply_markup)]
+    return [
+        card_file_method(card, chat_id),
+        SendMessage(chat_id=chat_id, text=text, reply_markup=reply_markup)
+    ]
+
+async def send_card(bot: Bot, chat_id: int, card: Card, text: Optional[str] = None,
+                    reply_markup: Optional[InlineKeyboardMarkup] = None) -> Message:
+    """Отправляет карточку вместе с файлом; возвращает последнее сообщение"""
+    methods = card_methods(card, chat_id, text, reply_markup)
+    try:
+        for method in methods:
+            sent = await bot(method)
+    except Exception:
+        if len(methods) > 1 or not card.file_id:
+            raise
+        # Файл недоступен (например, удален в Telegram) - показываем хотя бы текст
+        logger.warning("Не удалось отправить файл карточки %s", card.id, exc_info=True)
+        sent = await bot.send_message(chat_id=chat_id, text=text or card.text, reply_markup=reply_markup)
+        await bot.send_message(chat_id=chat_id, text="Не удалось отправить прикрепленный файл.")
+    return sent
+
+async def show_card(message: Message, card: Card, text: Optional[str] = None,
+                    reply_markup: Optional[InlineKeyboardMarkup] = None):
+    """Показывает карточку на месте сообщения бота message.
+
+    Текст заменяется текстом, медиа - медиа одним вызовом editMessage*;
+    в остальных случаях сообщение удаляется и карточка отправляется заново."""
+    text = text or card.text
+    if not card.file_id and message.text is not None:
+        await message.edit_text(text, reply_markup=reply_markup)
+        return
+    if card.file_id and message.text is None and len(text) <= CAPTION_LIMIT:
+        media_class = InputMediaPhoto if card.file_kind == "photo" else InputMediaDocument
+        try:
+            await message.edit_media(media_class(media=card.file_id, caption=text), reply_markup=reply_markup)
+            return
+        except Exception:
+            # Сообщение могли удалить или изменить - отправляем карточку заново
+            logger.warning("Не удалось заменить медиа карточки %s", card.id, exc_info=True)
+    await message.delete()
+    await send_card(message.bot, message.chat.id, card, text, reply_markup)
+
+async def edit_card_message(message: Message, text: str, reply_markup: Optional[InlineKeyboardMarkup] = None):
+    """Изменяет текст сообщения бота; у карточки с файлом меняется подпись"""
+    if message.text is not None:
+        await message.edit_text(text, reply_markup=reply_markup)
+    elif len(text) <= CAPTION_LIMIT:
+        await message.edit_caption(caption=text, reply_markup=reply_markup)
+    else:
+        await message.delete()
+        await message.answer(text, reply_markup=reply_markup)
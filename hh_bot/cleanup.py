@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import select, delete, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql import ColumnElement
+from attachments import attachment_store
+from applications import invalidate_status_counts
+from config import config
+from database import async_session
+from models import Application, Resume, Vacancy
+
+# Удаление вакансии или резюме в обработчике - только отметка deleted_at.
+# Все остальное делает фоновая очистка: отклики удаляются пачками по
+# CLEANUP_BATCH_SIZE с фиксацией после каждой пачки (запись в базу не
+# блокируется надолго), затем удаляются сами строки и освобождаются
+# файлы (удаление файла выполняется в отдельном потоке). Прерванная
+# очистка продолжается со следующего прохода: строка с deleted_at
+# остается в базе, пока не удалены все ее отклики.
+
+logger = logging.getLogger(__name__)
+
+async def mark_deleted(session: AsyncSession, model, record_id: int, user_id: int) -> bool:
+    """Отмечает вакансию или резюме пользователя удаленными и фиксирует транзакцию.
+
+    Возвращает False, если записи нет, она чужая или уже удалена.
+    """
+    result = await session.execute(
+        update(model)
+        .where(model.id == record_id, model.user_id == user_id, model.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow(), version=model.version + 1)
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+class CleanupWorker:
+    def __init__(
+        self,
+        session_maker: sessionmaker = async_session,
+        interval: float = config.CLEANUP_INTERVAL,
+        batch_size: int = config.CLEANUP_BATCH_SIZE
+    ):
+        self.session_maker = session_maker
+        self.interval = interval
+        self.batch_size = batch_size
+        # Отклики, оставшиеся от удалений до появления очистки, ищутся один раз
+        self._orphans_removed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def _delete_applications(self, session: AsyncSession, condition: ColumnElement) -> int:
+        """Удаляет отклики по условию пачками, сбрасывая кэш итогов соискателей"""
+        deleted = 0
+        while True:
+            result = await session.execute(
+                select(Application.id, Application.user_id).where(condition).limit(self.batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return deleted
+            await session.execute(delete(Application).where(Application.id.in_([row.id for row in rows])))
+            await session.commit()
+            for user_id in {row.user_id for row in rows}:
+                invalidate_status_counts(user_id)
+            deleted += len(rows)
+            if len(rows) < self.batch_size:
+                return deleted
+            # Между пачками обрабатываются обновления
+            await asyncio.sleep(0)
+
+    async def _purge(self, session: AsyncSession, model, application_column) -> int:
+        """Удаляет одну пачку отмеченных строк модели; возвращает их число"""
+        result = await session.execute(
+            select(model.id, model.file_path)
+            .where(model.deleted_at.isnot(None))
+            .order_by(model.id)
+            .limit(self.batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+
+        ids: List[int] = [row.id for row in rows]
+        await self._delete_applications(session, application_column.in_(ids))
+        await session.execute(delete(model).where(model.id.in_(ids)))
+        await session.commit()
+
+        # Файл удаляется, только если на него больше никто не ссылается
+        for path in {row.file_path for row in rows if row.file_path}:
+            await attachment_store.release(session, path)
+        return len(rows)
+
+    async def run_once(self) -> int:
+        """Один проход очистки; возвращает число удаленных вакансий и резюме"""
+        purged = 0
+        async with self.session_maker() as session:
+            if not self._orphans_removed:
+                orphans = await self._delete_applications(session, or_(
+                    ~select(Vacancy.id).where(Vacancy.id == Application.vacancy_id).exists(),
+                    ~select(Resume.id).where(Resume.id == Application.resume_id).exists()
+                ))
+                self._orphans_removed = True
+                if orphans:
+                    logger.info("Удалено откликов на несуществующие вакансии и резюме: %s", orphans)
+
+            for model, application_column in ((Vacancy, Application.vacancy_id), (Resume, Application.resume_id)):
+                while True:
+                    count = await self._purge(session, model, application_column)
+                    purged += count
+                    if count < self.batch_size:
+                        break
+                    await asyncio.sleep(0)
+        return purged
+
+    async def _loop(self):
+        while True:
+            try:
+                purged = await self.run_once()
+                if purged:
+                    logger.debug("Очистка: удалено вакансий и резюме: %s", purged)
+            except Exception:
+                logger.exception("Ошибка фоновой очистки удаленных записей")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        """Запускает периодическую очистку"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+cleanup_worker = CleanupWorker()
@@ -1,17 +1,19 @@
 import os
 import asyncio
-from database import engine, Base
+from database import init_db, engine
 
 async def clear_database():
     # Проверяем существование базы данных
     if os.path.exists('database.sqlite3'):
-        # Удаляем старую базу данных
-        os.remove('database.sqlite3')
+        # Удаляем старую базу данных вместе с журналом WAL
+        for path in ('database.sqlite3', 'database.sqlite3-wal', 'database.sqlite3-shm'):
+            if os.path.exists(path):
+                os.remove(path)
         print("Старая база данных удалена")
     
-    # Создаем новую базу данных
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Создаем новую базу данных миграциями
+    await init_db()
+    await engine.dispose()
     print("Новая база данных успешно создана")
 
 if __name__ == "__main__":
@@ -13,12 +13,105 @@ class Config:
     BOT_TOKEN: str = ""
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///database.sqlite3")
     UPLOADS_DIR: Path = BASE_DIR / "uploads"
-    RESUMES_DIR: str = "resumes"
+    RESUMES_DIR: str = "resumes"  # старые каталоги, файлы из них переносятся в ATTACHMENTS_DIR
     VACANCIES_DIR: str = "vacancies"
+    # Хранилище прикрепленных файлов
+    ATTACHMENTS_DIR: str = os.getenv("ATTACHMENTS_DIR", "attachments")
+    ATTACHMENTS_GC_INTERVAL: float = float(os.getenv("ATTACHMENTS_GC_INTERVAL", 3600))  # секунд, 0 - не запускать
+    ATTACHMENTS_GC_GRACE: float = float(os.getenv("ATTACHMENTS_GC_GRACE", 3600))  # секунд
+    # Пул соединений с базой данных
+    DB_ECHO: bool = os.getenv("DB_ECHO", "0") == "1"  # логирование SQL, только для отладки
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))  # не используется для SQLite
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 20))  # не используется для SQLite
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "1") == "1"  # не используется для SQLite
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))  # секунд
+    # Кэш пользователей
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", 10000))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", 300))  # секунд
+    # Кэш карточек вакансий и резюме
+    CARD_CACHE_SIZE: int = int(os.getenv("CARD_CACHE_SIZE", 5000))
+    CARD_CACHE_TTL: float = float(os.getenv("CARD_CACHE_TTL", 60))  # секунд
+    # Хранилище состояний FSM: memory, sql или redis
+    FSM_STORAGE: str = os.getenv("FSM_STORAGE", "sql")
+    FSM_TTL: int = int(os.getenv("FSM_TTL", 7 * 24 * 3600))  # секунд, 0 - без ограничения
+    # Отложенная запись FSM пачками раз в FSM_FLUSH_INTERVAL секунд; 0 - запись сразу.
+    # Работает только с одним процессом: другие процессы не видят несброшенных изменений
+    FSM_FLUSH_INTERVAL: float = float(os.getenv("FSM_FLUSH_INTERVAL", 0))
+    # Удаление просроченных записей FSM из базы
+    FSM_PURGE_INTERVAL: float = float(os.getenv("FSM_PURGE_INTERVAL", 3600))  # секунд, 0 - только при остановке
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Режим получения обновлений: polling или webhook
+    RUN_MODE: str = os.getenv("RUN_MODE", "polling")
+    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")  # публичный адрес, например https://example.com
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")  # если пусто, генерируется при запуске
+    WEBAPP_HOST: str = os.getenv("WEBAPP_HOST", "0.0.0.0")
+    WEBAPP_PORT: int = int(os.getenv("WEBAPP_PORT", 8080))
+    WEBHOOK_WORKERS: int = int(os.getenv("WEBHOOK_WORKERS", 1))
+    WEBHOOK_MAX_CONCURRENCY: int = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", 100))  # на процесс
+    WEBHOOK_MAX_BACKLOG: int = int(os.getenv("WEBHOOK_MAX_BACKLOG", 1000))  # на процесс, сверх - ответ 503
+    # Номер процесса бота; фоновые задачи над общей базой выполняет только процесс 0
+    WORKER_INDEX: int = int(os.getenv("WORKER_INDEX", 0))
+    # Очередь исходящих уведомлений (лимиты Telegram: ~30 сообщений/с, 1 сообщение/с в чат)
+    # Сообщений в секунду на бота, делится между процессами webhook; 0 - без общего лимита
+    DELIVERY_GLOBAL_RATE: float = float(os.getenv("DELIVERY_GLOBAL_RATE", 25))
+    DELIVERY_CHAT_INTERVAL: float = float(os.getenv("DELIVERY_CHAT_INTERVAL", 1.0))  # секунд
+    DELIVERY_MAX_RETRIES: int = int(os.getenv("DELIVERY_MAX_RETRIES", 5))
+    DELIVERY_SHUTDOWN_TIMEOUT: float = float(os.getenv("DELIVERY_SHUTDOWN_TIMEOUT", 10))
+    # Фоновая загрузка файлов (Bot API отдает файлы до 20 МБ)
+    DOWNLOAD_WORKERS: int = int(os.getenv("DOWNLOAD_WORKERS", 4))
+    DOWNLOAD_MAX_SIZE: int = int(os.getenv("DOWNLOAD_MAX_SIZE", 20 * 1024 * 1024))  # байт
+    DOWNLOAD_MAX_RETRIES: int = int(os.getenv("DOWNLOAD_MAX_RETRIES", 3))
+    DOWNLOAD_TIMEOUT: int = int(os.getenv("DOWNLOAD_TIMEOUT", 60))  # секунд на файл
+    DOWNLOAD_SHUTDOWN_TIMEOUT: float = float(os.getenv("DOWNLOAD_SHUTDOWN_TIMEOUT", 30))
+    # Списки откликов работодателя и соискателя
+    INBOX_PAGE_SIZE: int = int(os.getenv("INBOX_PAGE_SIZE", 10))
+    # Кэш числа откликов соискателя по статусам. Сбрасывается только в своем
+    # процессе, поэтому TTL короткий: изменения других воркеров видны через несколько секунд
+    APPLICATION_COUNTS_CACHE_SIZE: int = int(os.getenv("APPLICATION_COUNTS_CACHE_SIZE", 10000))
+    APPLICATION_COUNTS_CACHE_TTL: float = float(os.getenv("APPLICATION_COUNTS_CACHE_TTL", 5))  # секунд
+    # Рекомендации вакансий по резюме (TF-IDF в памяти процесса)
+    RECOMMEND_TOP_N: int = int(os.getenv("RECOMMEND_TOP_N", 10))
+    RECOMMEND_FEATURES: int = int(os.getenv("RECOMMEND_FEATURES", 2 ** 18))  # размер пространства хэшей слов
+    RECOMMEND_MERGE_ROWS: int = int(os.getenv("RECOMMEND_MERGE_ROWS", 1000))  # изменений до пересборки матрицы
+    RECOMMEND_REFRESH_INTERVAL: float = float(os.getenv("RECOMMEND_REFRESH_INTERVAL", 60))  # секунд
+    # Массовый импорт вакансий из CSV/JSON
+    VACANCY_IMPORT_MAX_SIZE: int = int(os.getenv("VACANCY_IMPORT_MAX_SIZE", 5 * 1024 * 1024))  # байт
+    VACANCY_IMPORT_MAX_ROWS: int = int(os.getenv("VACANCY_IMPORT_MAX_ROWS", 1000))
+    VACANCY_IMPORT_BATCH_SIZE: int = int(os.getenv("VACANCY_IMPORT_BATCH_SIZE", 200))  # строк в executemany
+    VACANCY_IMPORT_PROGRESS_INTERVAL: float = float(os.getenv("VACANCY_IMPORT_PROGRESS_INTERVAL", 2))  # секунд
+    # Выгрузка вакансий и откликов в CSV/XLSX
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 1000))  # строк за одно чтение из базы
+    EXPORT_CONCURRENCY: int = int(os.getenv("EXPORT_CONCURRENCY", 2))  # одновременных выгрузок
+    # Сохраненные поиски: уведомления о новых вакансиях
+    SAVED_SEARCH_LIMIT: int = int(os.getenv("SAVED_SEARCH_LIMIT", 10))  # подписок на пользователя
+    SAVED_SEARCH_BATCH_SIZE: int = int(os.getenv("SAVED_SEARCH_BATCH_SIZE", 100))  # уведомлений в пачке
+    SAVED_SEARCH_REFRESH_INTERVAL: float = float(os.getenv("SAVED_SEARCH_REFRESH_INTERVAL", 60))  # секунд
+    # Фоновая очистка удаленных вакансий и резюме (отклики, строки, файлы)
+    CLEANUP_INTERVAL: float = float(os.getenv("CLEANUP_INTERVAL", 60))  # секунд, 0 - не запускать
+    CLEANUP_BATCH_SIZE: int = int(os.getenv("CLEANUP_BATCH_SIZE", 500))  # строк в одной транзакции
+    # Срок жизни вакансии; истекшие переносятся в архивные таблицы
+    VACANCY_TTL_DAYS: int = int(os.getenv("VACANCY_TTL_DAYS", 30))
+    ARCHIVE_INTERVAL: float = float(os.getenv("ARCHIVE_INTERVAL", 600))  # секунд, 0 - не запускать
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", 100))  # вакансий в одной транзакции
+    # Метрики в формате Prometheus (http://METRICS_HOST:METRICS_PORT/metrics)
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", 9100))  # 0 - не запускать; процесс N слушает METRICS_PORT + N
 
     def __post_init__(self):
         # Создаем директории для файлов, если они не существуют
         os.makedirs(self.VACANCIES_DIR, exist_ok=True)
         os.makedirs(self.RESUMES_DIR, exist_ok=True)
+        os.makedirs(self.ATTACHMENTS_DIR, exist_ok=True)
+
+    @property
+    def multi_process(self) -> bool:
+        """Обновления обрабатывают несколько процессов бота"""
+        return self.RUN_MODE == "webhook" and self.WEBHOOK_WORKERS > 1
+
+    @property
+    def primary_worker(self) -> bool:
+        """Процесс выполняет фоновые задачи, которые нужны в одном экземпляре"""
+        return self.WORKER_INDEX == 0
 
 config = Config() 
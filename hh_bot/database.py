@@ -1,22 +1,72 @@
+from alembic import command
+from alembic.config import Config as AlembicConfig
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from config import config
-from models import Base
+from config import config, BASE_DIR
+from metrics import instrument_engine
 from typing import AsyncGenerator
-import os
 
-engine = create_async_engine(config.DATABASE_URL, echo=True)
+def create_engine():
+    engine = _create_engine()
+    # Число и время запросов для метрик
+    instrument_engine(engine)
+    return engine
+
+def _create_engine():
+    url = make_url(config.DATABASE_URL)
+    kwargs = {"echo": config.DB_ECHO}
+
+    if url.get_backend_name() == "sqlite":
+        # Пул по умолчанию (NullPool для файла): соединения aiosqlite держат
+        # свои потоки, и оставшиеся в пуле не дают скриптам завершиться без dispose()
+        engine = create_async_engine(url, **kwargs)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            # WAL позволяет читать во время записи, busy_timeout - ждать блокировку
+            # вместо ошибки, когда с базой работают несколько процессов бота
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+
+        return engine
+
+    kwargs.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+        pool_recycle=config.DB_POOL_RECYCLE
+    )
+    if url.get_backend_name() == "postgresql":
+        # JIT только замедляет короткие запросы бота
+        kwargs["connect_args"] = {"server_settings": {"jit": "off"}}
+    return create_async_engine(url, **kwargs)
+
+engine = create_engine()
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+def run_migrations(connection):
+    alembic_config = AlembicConfig(str(BASE_DIR / "alembic.ini"))
+    alembic_config.attributes["connection"] = connection
+
+    # Базы, созданные через create_all до появления миграций, помечаем
+    # начальной ревизией, чтобы применить к ним только новые изменения
+    tables = inspect(connection).get_table_names()
+    if "alembic_version" not in tables and "users" in tables:
+        command.stamp(alembic_config, "0001")
+
+    command.upgrade(alembic_config, "head")
+
 async def init_db():
-    # Создаем базу данных только если она не существует
-    if not os.path.exists('database.sqlite3'):
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("База данных успешно создана")
-    else:
-        print("База данных уже существует")
+    # Создаем базу данных или обновляем схему существующей
+    async with engine.begin() as conn:
+        await conn.run_sync(run_migrations)
+    print("Схема базы данных актуальна")
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
-        yield session 
\ No newline at end of file
+        yield session
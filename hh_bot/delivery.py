@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Set
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramNetworkError, TelegramServerError
+from aiogram.methods import TelegramMethod, SendMessage, SendPhoto, SendDocument
+from config import config
+
+# Фоновая очередь исходящих уведомлений. Обработчик ставит сообщение в
+# очередь и сразу отвечает пользователю, а очередь отправляет сообщения
+# с соблюдением лимитов Telegram: общий лимит на бота и интервал между
+# сообщениями в один чат. Порядок сообщений в пределах чата сохраняется.
+# Очередь у каждого процесса своя, поэтому общий лимит делится между
+# процессами webhook поровну.
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Выдает слоты не чаще одного раза в interval секунд"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def postpone(self, seconds: float):
+        self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+class DeliveryQueue:
+    def __init__(
+        self,
+        global_rate: float = config.DELIVERY_GLOBAL_RATE,
+        chat_interval: float = config.DELIVERY_CHAT_INTERVAL,
+        max_retries: int = config.DELIVERY_MAX_RETRIES
+    ):
+        if config.multi_process:
+            global_rate /= config.WEBHOOK_WORKERS
+        self.global_limiter = RateLimiter(1 / global_rate if global_rate > 0 else 0)
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self._queues: Dict[int, Deque[tuple]] = {}
+        self._chat_limiters: Dict[int, RateLimiter] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Сообщений в очередях всех чатов; событие - после каждой отправки
+        self._pending = 0
+        self._progress = asyncio.Event()
+
+    def send(self, bot: Bot, method: TelegramMethod):
+        """Ставит вызов Bot API в очередь чата method.chat_id"""
+        chat_id = method.chat_id
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            # Для чата нет активной отправки - запускаем ее
+            queue = self._queues[chat_id] = deque()
+            task = asyncio.create_task(self._drain(chat_id, queue))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        queue.append((bot, method))
+        self._pending += 1
+
+    def _done(self, count: int):
+        self._pending -= count
+        self._progress.set()
+
+    async def wait_backlog(self, limit: int):
+        """Ждет, пока в очередях останется не больше limit сообщений"""
+        while self._pending > limit:
+            self._progress.clear()
+            await self._progress.wait()
+
+    def send_message(self, bot: Bot, chat_id: int, text: str, **kwargs: Any):
+        self.send(bot, SendMessage(chat_id=chat_id, text=text, **kwargs))
+
+    def send_photo(self, bot: Bot, chat_id: int, photo: str, **kwargs: Any):
+        self.send(bot, SendPhoto(chat_id=chat_id, photo=photo, **kwargs))
+
+    def send_document(self, bot: Bot, chat_id: int, document: str, **kwargs: Any):
+        self.send(bot, SendDocument(chat_id=chat_id, document=document, **kwargs))
+
+    async def _drain(self, chat_id: int, queue: Deque[tuple]):
+        limiter = self._chat_limiters.setdefault(chat_id, RateLimiter(self.chat_interval))
+        try:
+            while queue:
+                bot, method = queue[0]
+                await self._deliver(bot, method, limiter)
+                queue.popleft()
+                self._done(1)
+        finally:
+            del self._queues[chat_id]
+            if queue:
+                # Отправка прервана (остановка бота): сообщения больше не ждут
+                self._done(len(queue))
+            # Лимитер чата больше не нужен, если интервал уже истек
+            if limiter._next_slot <= time.monotonic():
+                self._chat_limiters.pop(chat_id, None)
+
+    async def _deliver(self, bot: Bot, method: TelegramMethod, limiter: RateLimiter):
+        for attempt in range(1, self.max_retries + 1):
+            await limiter.wait()
+            await self.global_limiter.wait()
+            try:
+                await bot(method)
+                return
+            except TelegramRetryAfter as e:
+                logger.warning("Flood limit для чата %s, повтор через %s с", method.chat_id, e.retry_after)
+                # Telegram не уточняет, какой лимит превышен, поэтому ждут все чаты
+                limiter.postpone(e.retry_after)
+                self.global_limiter.postpone(e.retry_after)
+            except (TelegramNetworkError, TelegramServerError) as e:
+                logger.warning("Ошибка отправки в чат %s (попытка %s): %s", method.chat_id, attempt, e)
+                await asyncio.sleep(min(2 ** attempt, 30))
+            except Exception as e:
+                logger.error("Не удалось отправить %s в чат %s: %s", method.__api_method__, method.chat_id, e)
+                return
+        logger.error("Сообщение в чат %s не доставлено после %s попыток", method.chat_id, self.max_retries)
+
+    async def close(self):
+        """Дожидается отправки уже поставленных сообщений"""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=config.DELIVERY_SHUTDOWN_TIMEOUT)
+
+delivery_queue = DeliveryQueue()
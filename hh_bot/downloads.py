@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Type
+from aiogram import Bot
+from aiogram.types import Message
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from sqlalchemy import select, update
+from config import config
+from database import async_session
+from models import Resume, Vacancy
+from attachments import attachment_store
+
+# Фоновая загрузка прикрепленных файлов. Обработчик сохраняет запись с
+# file_id и сразу отвечает пользователю, а файл скачивает пул воркеров
+# в хранилище attachments; после загрузки в запись проставляется
+# file_path. Файл с тем же file_unique_id повторно не скачивается.
+# Очередь живет в памяти: при запуске в нее снова ставятся записи,
+# у которых есть file_id, но нет file_path. Файл, который скачать нельзя
+# (слишком большой, Telegram отказал), помечается в file_error и больше
+# в очередь не ставится; сам файл остается доступен по file_id.
+
+logger = logging.getLogger(__name__)
+
+# Значения file_error
+FILE_TOO_LARGE = "too_large"
+FILE_FAILED = "failed"
+
+class SkipDownload(Exception):
+    """Файл не будет скачан никогда; reason записывается в file_error"""
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+@dataclass(frozen=True)
+class Attachment:
+    file_id: str
+    file_unique_id: str
+    file_type: str  # photo или document
+    extension: str
+    file_size: Optional[int] = None
+
+def message_attachment(message: Message) -> Optional[Attachment]:
+    """Файл из сообщения: документ или фото наибольшего размера"""
+    if message.document:
+        document = message.document
+        extension = os.path.splitext(document.file_name or "")[1]
+        return Attachment(document.file_id, document.file_unique_id, "document", extension, document.file_size)
+    if message.photo:
+        photo = message.photo[-1]
+        return Attachment(photo.file_id, photo.file_unique_id, "photo", ".jpg", photo.file_size)
+    return None
+
+@dataclass
+class DownloadJob:
+    file_id: str
+    file_unique_id: str
+    extension: str
+    file_size: Optional[int] = None
+    # Записи, ожидающие этот файл: (модель, id)
+    targets: List[Tuple[Type, int]] = field(default_factory=list)
+
+class DownloadQueue:
+    def __init__(
+        self,
+        workers: int = config.DOWNLOAD_WORKERS,
+        max_size: int = config.DOWNLOAD_MAX_SIZE,
+        max_retries: int = config.DOWNLOAD_MAX_RETRIES
+    ):
+        self.workers = workers
+        self.max_size = max_size
+        self.max_retries = max_retries
+        self._queue: "asyncio.Queue[Tuple[Bot, DownloadJob]]" = asyncio.Queue()
+        self._jobs: Dict[str, DownloadJob] = {}  # file_unique_id -> загрузка в очереди или в работе
+        self._workers: Set[asyncio.Task] = set()
+
+    def submit(self, bot: Bot, model: Type, record_id: int, attachment: Attachment):
+        """Ставит файл в очередь загрузки; путь будет записан в model.file_path"""
+        job = self._jobs.get(attachment.file_unique_id)
+        if job is None:
+            job = self._jobs[attachment.file_unique_id] = DownloadJob(
+                file_id=attachment.file_id,
+                file_unique_id=attachment.file_unique_id,
+                extension=attachment.extension,
+                file_size=attachment.file_size
+            )
+            self._queue.put_nowait((bot, job))
+            self._start_workers()
+        job.targets.append((model, record_id))
+
+    async def start(self, bot: Bot):
+        """Ставит в очередь файлы, загрузка которых не завершилась до остановки"""
+        pending = 0
+        async with async_session() as session:
+            for model in (Resume, Vacancy):
+                result = await session.execute(
+                    select(model.id, model.file_id, model.file_unique_id, model.file_type)
+                    .where(
+                        model.file_id.isnot(None), model.file_path.is_(None),
+                        model.file_error.is_(None), model.deleted_at.is_(None)
+                    )
+                )
+                for row in result:
+                    # Расширение документа станет известно из пути файла в Telegram
+                    extension = ".jpg" if row.file_type == "photo" else ""
+                    attachment = Attachment(row.file_id, row.file_unique_id or row.file_id, row.file_type, extension)
+                    self.submit(bot, model, row.id, attachment)
+                    pending += 1
+        if pending:
+            logger.info("В очередь загрузки снова поставлено файлов: %s", pending)
+
+    def _start_workers(self):
+        while len(self._workers) < self.workers:
+            task = asyncio.create_task(self._worker())
+            self._workers.add(task)
+            task.add_done_callback(self._workers.discard)
+
+    async def _worker(self):
+        while True:
+            bot, job = await self._queue.get()
+            try:
+                path = await self._find_downloaded(job.file_unique_id) or await self._download(bot, job)
+                # Новые записи для этого файла после этой точки создадут свою задачу
+                # и найдут уже скачанный файл
+                del self._jobs[job.file_unique_id]
+                if path:
+                    await self._attach(path, job.targets)
+            except SkipDownload as e:
+                self._jobs.pop(job.file_unique_id, None)
+                await self._skip(job.targets, e.reason)
+            except Exception:
+                self._jobs.pop(job.file_unique_id, None)
+                logger.exception("Ошибка загрузки файла %s", job.file_id)
+            finally:
+                self._queue.task_done()
+
+    async def _find_downloaded(self, file_unique_id: str) -> Optional[str]:
+        """Путь к уже скачанной копии файла, если она есть"""
+        async with async_session() as session:
+            for model in (Resume, Vacancy):
+                result = await session.execute(
+                    select(model.file_path)
+                    .where(model.file_unique_id == file_unique_id, model.file_path.isnot(None))
+                    .limit(1)
+                )
+                path = result.scalar()
+                if path and await asyncio.to_thread(os.path.exists, path):
+                    return path
+        return None
+
+    def _check_size(self, job: DownloadJob, file_size: Optional[int]):
+        if file_size and file_size > self.max_size:
+            logger.warning("Файл %s слишком большой (%s байт), не скачиваем", job.file_id, file_size)
+            raise SkipDownload(FILE_TOO_LARGE)
+
+    async def _download(self, bot: Bot, job: DownloadJob) -> Optional[str]:
+        """Путь к скачанному файлу или None, если сеть так и не ответила
+        (тогда запись снова попадет в очередь при следующем запуске)"""
+        self._check_size(job, job.file_size)
+        partial = attachment_store.temp_path(f"{job.file_unique_id}.part")
+        try:
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    file = await bot.get_file(job.file_id)
+                    self._check_size(job, file.file_size)
+                    await bot.download_file(file.file_path, partial, timeout=config.DOWNLOAD_TIMEOUT)
+                    extension = job.extension or os.path.splitext(file.file_path or "")[1]
+                    return await attachment_store.put(partial, extension)
+                except TelegramBadRequest as e:
+                    logger.error("Не удалось скачать файл %s: %s", job.file_id, e)
+                    raise SkipDownload(FILE_FAILED)
+                except TelegramRetryAfter as e:
+                    await asyncio.sleep(e.retry_after)
+                except (TelegramNetworkError, TelegramServerError, asyncio.TimeoutError, OSError) as e:
+                    logger.warning("Ошибка загрузки файла %s (попытка %s): %s", job.file_id, attempt, e)
+                    await asyncio.sleep(min(2 ** attempt, 30))
+            logger.error("Файл %s не скачан после %s попыток", job.file_id, self.max_retries)
+            return None
+        finally:
+            await asyncio.to_thread(_discard, partial)
+
+    async def _attach(self, path: str, targets: List[Tuple[Type, int]]):
+        async with async_session() as session:
+            for model, record_id in targets:
+                await session.execute(update(model).where(model.id == record_id).values(file_path=path))
+            await session.commit()
+            # Записи могли удалить, пока файл скачивался
+            await attachment_store.release(session, path)
+
+    async def _skip(self, targets: List[Tuple[Type, int]], reason: str):
+        async with async_session() as session:
+            for model, record_id in targets:
+                await session.execute(update(model).where(model.id == record_id).values(file_error=reason))
+            await session.commit()
+
+    async def close(self):
+        """Дожидается уже начатых загрузок и останавливает воркеры"""
+        if self._workers:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=config.DOWNLOAD_SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Не все файлы скачаны до остановки")
+        for task in list(self._workers):
+            task.cancel()
+
+def _discard(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+
+download_queue = DownloadQueue()
@@ -0,0 +1,153 @@
+import asyncio
+import csv
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, List, Sequence, Tuple
+from sqlalchemy import Select, select, func, case, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config
+from models import Application, Resume, User, Vacancy
+
+# Выгрузка вакансий работодателя и откликов на них в CSV или XLSX.
+# Строки читаются из базы потоково (yield_per) пачками по EXPORT_BATCH_SIZE
+# и сразу дописываются во временный файл, поэтому память не зависит от
+# объема выгрузки. Запись в файл выполняется в отдельном потоке.
+
+FORMATS = ("csv", "xlsx")
+
+# Лимит Bot API на отправку файла ботом
+UPLOAD_LIMIT = 50 * 1024 * 1024
+
+STATUS_LABELS = {"new": "Новый", "invited": "Приглашен", "rejected": "Отклонен"}
+
+# Текст, который Excel может принять за формулу, экранируется апострофом
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+@dataclass(frozen=True)
+class ExportTable:
+    name: str  # имя файла CSV
+    title: str  # имя листа XLSX
+    columns: Tuple[str, ...]
+    query: Callable[[int], Select]
+
+def vacancies_query(employer_id: int) -> Select:
+    return (
+        select(
+            Vacancy.id, Vacancy.title, Vacancy.company, Vacancy.salary,
+            Vacancy.description, Vacancy.created_at, func.count(Application.id)
+        )
+        .outerjoin(Application, Application.vacancy_id == Vacancy.id)
+        .where(Vacancy.user_id == employer_id, Vacancy.deleted_at.is_(None))
+        .group_by(Vacancy.id)
+        .order_by(Vacancy.id)
+    )
+
+def applications_query(employer_id: int) -> Select:
+    status = case(STATUS_LABELS, value=Application.status, else_=Application.status)
+    return (
+        select(
+            Application.id, Application.created_at, status,
+            Vacancy.id, Vacancy.title,
+            Application.user_id, User.username,
+            Resume.title, Resume.description, Resume.experience
+        )
+        .join(Vacancy, Vacancy.id == Application.vacancy_id)
+        # Резюме могли удалить, отклик при этом выгружается
+        .outerjoin(Resume, and_(Resume.id == Application.resume_id, Resume.deleted_at.is_(None)))
+        # В user_id хранится telegram_id соискателя
+        .outerjoin(User, User.telegram_id == Application.user_id)
+        .where(Vacancy.user_id == employer_id, Vacancy.deleted_at.is_(None))
+        .order_by(Application.vacancy_id, Application.created_at, Application.id)
+    )
+
+TABLES = (
+    ExportTable(
+        "vacancies", "Вакансии",
+        ("ID", "Должность", "Компания", "Зарплата", "Описание", "Создана", "Откликов"),
+        vacancies_query
+    ),
+    ExportTable(
+        "applications", "Отклики",
+        ("ID отклика", "Дата", "Статус", "ID вакансии", "Вакансия",
+         "Telegram ID", "Username", "Резюме", "Описание резюме", "Опыт"),
+        applications_query
+    )
+)
+
+def _text(value: str) -> str:
+    return "'" + value if value.startswith(_FORMULA_PREFIXES) else value
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, str):
+        return _text(value)
+    return value
+
+async def _partitions(session: AsyncSession, stmt: Select) -> AsyncIterator[Sequence[Any]]:
+    result = await session.stream(stmt.execution_options(yield_per=config.EXPORT_BATCH_SIZE))
+    async for rows in result.partitions():
+        yield rows
+
+async def _write_csv(session: AsyncSession, table: ExportTable, employer_id: int, path: str):
+    # BOM - чтобы Excel открыл файл в UTF-8
+    file = await asyncio.to_thread(open, path, "w", encoding="utf-8-sig", newline="")
+    try:
+        writer = csv.writer(file)
+        await asyncio.to_thread(writer.writerow, table.columns)
+        async for rows in _partitions(session, table.query(employer_id)):
+            await asyncio.to_thread(writer.writerows, [[_csv_cell(value) for value in row] for row in rows])
+    finally:
+        await asyncio.to_thread(file.close)
+
+async def _write_xlsx(session: AsyncSession, employer_id: int, path: str):
+    # openpyxl нужен только для выгрузки в XLSX
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    def cell(value: Any) -> Any:
+        if isinstance(value, str):
+            return _text(ILLEGAL_CHARACTERS_RE.sub("", value))
+        return value
+
+    def append(sheet, rows: Sequence[Any]):
+        for row in rows:
+            sheet.append([cell(value) for value in row])
+
+    # В режиме write_only строки сразу сбрасываются на диск
+    workbook = Workbook(write_only=True)
+    for table in TABLES:
+        sheet = workbook.create_sheet(table.title)
+        sheet.append(table.columns)
+        async for rows in _partitions(session, table.query(employer_id)):
+            await asyncio.to_thread(append, sheet, rows)
+    await asyncio.to_thread(workbook.save, path)
+
+async def export_employer_data(session: AsyncSession, employer_id: int, fmt: str, directory: str) -> List[Tuple[str, str]]:
+    """Записывает выгрузку в каталог, возвращает [(путь, имя файла для пользователя)]"""
+    date = datetime.utcnow().strftime("%Y-%m-%d")
+    if fmt == "xlsx":
+        path = os.path.join(directory, "export.xlsx")
+        await _write_xlsx(session, employer_id, path)
+        return [(path, f"hh_bot_{date}.xlsx")]
+
+    files = []
+    for table in TABLES:
+        path = os.path.join(directory, f"{table.name}.csv")
+        await _write_csv(session, table, employer_id, path)
+        files.append((path, f"{table.name}_{date}.csv"))
+    return files
+
+async def make_export_directory() -> str:
+    return await asyncio.to_thread(tempfile.mkdtemp, prefix="hh_bot_export_")
+
+async def remove_export_directory(directory: str):
+    await asyncio.to_thread(shutil.rmtree, directory, True)
+
+# Одновременные выгрузки держат соединения с базой, поэтому их число ограничено
+export_slots = asyncio.Semaphore(config.EXPORT_CONCURRENCY)
@@ -0,0 +1,179 @@
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+from aiohttp import ClientSession
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import InlineKeyboardMarkup
+
+# Локальная замена Telegram Bot API для тестов и бенчмарков:
+# - FakeTelegramSession отвечает на вызовы бота без сети
+# - make_*_update собирают входящие обновления
+# - FakeTelegramClient отправляет обновления в webhook-сервер бота
+
+FAKE_BOT_ID = 42
+FAKE_BOT_TOKEN = f"{FAKE_BOT_ID}:FAKE-TOKEN"
+
+MESSAGE_METHODS = {
+    "sendMessage", "sendPhoto", "sendDocument", "editMessageText",
+    "editMessageCaption", "editMessageMedia", "editMessageReplyMarkup", "copyMessage"
+}
+
+class FakeTelegramSession(BaseSession):
+    """Сессия aiogram, которая записывает запросы и возвращает правдоподобные ответы"""
+
+    def __init__(self, latency: float = 0.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.requests: List[TelegramMethod] = []
+        # Inline-клавиатуры, отправленные в каждый чат, по порядку
+        self.keyboards: Dict[int, List[InlineKeyboardMarkup]] = {}
+        # Можно подменить, чтобы вернуть ошибку: method -> dict ответа Bot API или None
+        self.error_factory: Optional[Callable[[TelegramMethod], Optional[Dict[str, Any]]]] = None
+        self._message_ids = itertools.count(1000)
+
+    async def close(self) -> None:
+        pass
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None):
+        self.requests.append(method)
+        markup = getattr(method, "reply_markup", None)
+        if isinstance(markup, InlineKeyboardMarkup):
+            self.keyboards.setdefault(getattr(method, "chat_id", None) or 0, []).append(markup)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        response = self.error_factory(method) if self.error_factory else None
+        status_code = response.get("error_code", 200) if response else 200
+        if response is None:
+            response = {"ok": True, "result": self.build_result(method)}
+
+        result = self.check_response(
+            bot=bot, method=method, status_code=status_code, content=json.dumps(response)
+        )
+        return result.result
+
+    def build_result(self, method: TelegramMethod) -> Any:
+        name = method.__api_method__
+        chat_id = getattr(method, "chat_id", None) or 0
+
+        if name in MESSAGE_METHODS:
+            return self._message(chat_id, getattr(method, "text", None) or getattr(method, "caption", None))
+        if name == "sendMediaGroup":
+            return [self._message(chat_id, getattr(item, "caption", None)) for item in method.media]
+        if name == "getMe":
+            return {"id": FAKE_BOT_ID, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+        if name == "getChat":
+            return {"id": chat_id, "type": "private", "username": f"user{chat_id}"}
+        if name == "getFile":
+            return {
+                "file_id": method.file_id,
+                "file_unique_id": method.file_id[-16:],
+                "file_size": 1024,
+                "file_path": f"documents/{method.file_id}"
+            }
+        return True
+
+    def _message(self, chat_id: int, text: Optional[str]) -> Dict[str, Any]:
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text or ""
+        }
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        yield f"fake content of {url}".encode()
+
+    def buttons(self, chat_id: int, prefix: str = "", last_only: bool = True) -> List[str]:
+        """callback_data кнопок последней (или всех) клавиатуры, отправленной в чат"""
+        keyboards = self.keyboards.get(chat_id, [])
+        if last_only:
+            keyboards = keyboards[-1:]
+        return [
+            button.callback_data
+            for keyboard in keyboards
+            for row in keyboard.inline_keyboard
+            for button in row
+            if button.callback_data and button.callback_data.startswith(prefix)
+        ]
+
+    def calls(self, name: str) -> List[TelegramMethod]:
+        """Возвращает все вызовы метода Bot API с указанным именем"""
+        return [request for request in self.requests if request.__api_method__ == name]
+
+_update_ids = itertools.count(1)
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+
+def _incoming_message(user_id: int, message_id: int, **fields: Any) -> Dict[str, Any]:
+    return {
+        "message_id": message_id,
+        "date": int(time.time()),
+        "chat": {"id": user_id, "type": "private"},
+        "from": _user(user_id),
+        **fields
+    }
+
+def make_message_update(user_id: int, text: str, message_id: int = 1) -> Dict[str, Any]:
+    """Обновление с текстовым сообщением (команды тоже передаются текстом)"""
+    fields: Dict[str, Any] = {"text": text}
+    if text.startswith("/"):
+        fields["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": next(_update_ids), "message": _incoming_message(user_id, message_id, **fields)}
+
+def make_document_update(user_id: int, file_name: str, file_id: Optional[str] = None,
+                         file_size: int = 1024, message_id: int = 1) -> Dict[str, Any]:
+    """Обновление с документом"""
+    file_id = file_id or f"DOC-{user_id}-{message_id}"
+    document = {
+        "file_id": file_id,
+        "file_unique_id": f"U{file_id}",
+        "file_name": file_name,
+        "file_size": file_size
+    }
+    return {"update_id": next(_update_ids), "message": _incoming_message(user_id, message_id, document=document)}
+
+def make_callback_update(user_id: int, data: str, message_id: int = 1, text: str = "") -> Dict[str, Any]:
+    """Обновление с нажатием inline-кнопки"""
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_update_ids)),
+            "from": _user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {**_incoming_message(FAKE_BOT_ID, message_id, text=text), "chat": {"id": user_id, "type": "private"}}
+        }
+    }
+
+class FakeTelegramClient:
+    """Отправляет обновления в webhook бота так же, как это делает Telegram"""
+
+    def __init__(self, url: str, secret_token: str = ""):
+        self.url = url
+        self.secret_token = secret_token
+        self._session: Optional[ClientSession] = None
+
+    async def __aenter__(self) -> "FakeTelegramClient":
+        self._session = ClientSession()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self._session.close()
+
+    async def send_update(self, update: Dict[str, Any]) -> int:
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self.secret_token} if self.secret_token else {}
+        async with self._session.post(self.url, json=update, headers=headers) as response:
+            return response.status
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StorageKey, StateType
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import select, delete, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import sessionmaker
+from config import config
+from database import async_session
+from models import FSMRecord
+
+# Хранилище FSM в общей базе данных: состояние анкет переживает перезапуск
+# и доступно всем процессам бота. По умолчанию set_state и set_data
+# записывают изменение своего ключа в базу до возврата (без общего буфера
+# и блокировки), ошибка записи получает вызывающий. С FSM_FLUSH_INTERVAL > 0
+# записи накапливаются в буфере и сбрасываются одной транзакцией раз в
+# FSM_FLUSH_INTERVAL секунд - только для одного процесса, в режиме
+# нескольких процессов буфер отключается. Просроченные записи удаляются
+# раз в FSM_PURGE_INTERVAL секунд.
+
+logger = logging.getLogger(__name__)
+
+class SQLStorage(BaseStorage):
+    def __init__(
+        self,
+        session_maker: sessionmaker = async_session,
+        ttl: int = config.FSM_TTL,
+        flush_interval: float = config.FSM_FLUSH_INTERVAL,
+        purge_interval: float = config.FSM_PURGE_INTERVAL
+    ):
+        self.session_maker = session_maker
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        # Несброшенные изменения: ключ -> {"state": ..., "data": ...}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # Изменения, которые сейчас записываются; до коммита читаем их отсюда
+        self._flushing: Dict[str, Dict[str, Any]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        # Отложенный сброс не удался: следующая запись сбрасывает буфер сама
+        self._flush_failed = False
+        self._flush_lock = asyncio.Lock()
+        self._purge_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def build_key(key: StorageKey) -> str:
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id or ''}:{key.destiny}"
+
+    def _expires_at(self) -> Optional[datetime]:
+        if not self.ttl:
+            return None
+        return datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    async def _write(self, key: StorageKey, field: str, value: Any):
+        if self.flush_interval <= 0:
+            # Запись сразу: только этот ключ, ошибка записи достается вызывающему
+            async with self.session_maker() as session:
+                await self._upsert(session, (field,), [
+                    {"key": self.build_key(key), "expires_at": self._expires_at(), field: value}
+                ])
+                await session.commit()
+            return
+
+        self._pending.setdefault(self.build_key(key), {})[field] = value
+        if self._flush_failed:
+            # Ошибка записи достается вызывающему
+            await self.flush()
+            self._flush_failed = False
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except Exception:
+            # Изменения вернулись в буфер; повторяем сброс, пока он не удастся
+            logger.exception("Ошибка отложенной записи FSM, повтор через %s с", self.flush_interval)
+            self._flush_failed = True
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+        else:
+            self._flush_failed = False
+
+    def _unflushed(self, key: StorageKey, field: str) -> tuple:
+        """(найдено, значение) среди еще не записанных в базу изменений"""
+        built = self.build_key(key)
+        for changes in (self._pending, self._flushing):
+            fields = changes.get(built)
+            if fields and field in fields:
+                return True, fields[field]
+        return False, None
+
+    async def _read(self, key: StorageKey) -> Optional[FSMRecord]:
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(FSMRecord).where(FSMRecord.key == self.build_key(key))
+            )
+            record = result.scalar_one_or_none()
+        if record and record.expires_at and record.expires_at < datetime.utcnow():
+            return None
+        return record
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, "state", state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        found, state = self._unflushed(key, "state")
+        if found:
+            return state
+        record = await self._read(key)
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._write(key, "data", json.dumps(data, ensure_ascii=False))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        found, data = self._unflushed(key, "data")
+        if found:
+            return json.loads(data)
+        record = await self._read(key)
+        return json.loads(record.data) if record and record.data else {}
+
+    async def flush(self):
+        """Сбрасывает накопленные изменения в базу одной транзакцией"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._flushing = pending
+            expires_at = self._expires_at()
+
+            # Группируем записи по набору изменяемых полей, чтобы выполнить executemany
+            groups: Dict[tuple, list] = {}
+            for key, fields in pending.items():
+                columns = tuple(sorted(fields))
+                groups.setdefault(columns, []).append({"key": key, "expires_at": expires_at, **fields})
+
+            try:
+                async with self.session_maker() as session:
+                    for columns, rows in groups.items():
+                        await self._upsert(session, columns, rows)
+                    await session.commit()
+            except Exception:
+                # Возвращаем изменения в буфер, не затирая более новые
+                for key, fields in pending.items():
+                    self._pending[key] = {**fields, **self._pending.get(key, {})}
+                raise
+            finally:
+                self._flushing = {}
+
+    async def _upsert(self, session, columns: tuple, rows: list):
+        dialect = session.bind.dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql.insert(FSMRecord)
+        elif dialect == "sqlite":
+            stmt = sqlite.insert(FSMRecord)
+        else:
+            for row in rows:
+                await session.merge(FSMRecord(**row))
+            return
+
+        update = {column: stmt.excluded[column] for column in columns}
+        update["expires_at"] = stmt.excluded.expires_at
+        stmt = stmt.on_conflict_do_update(index_elements=[FSMRecord.key], set_=update)
+        await session.execute(stmt, rows)
+
+    async def state_counts(self) -> Dict[str, int]:
+        """Число записей в каждом состоянии (для метрик)"""
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(FSMRecord.state, func.count())
+                .where(FSMRecord.state.is_not(None))
+                .where(or_(FSMRecord.expires_at.is_(None), FSMRecord.expires_at >= datetime.utcnow()))
+                .group_by(FSMRecord.state)
+            )
+            return dict(result.all())
+
+    async def purge_expired(self) -> int:
+        """Удаляет просроченные записи"""
+        async with self.session_maker() as session:
+            result = await session.execute(
+                delete(FSMRecord).where(FSMRecord.expires_at < datetime.utcnow())
+            )
+            await session.commit()
+        return result.rowcount
+
+    async def _purge_loop(self):
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                purged = await self.purge_expired()
+                if purged:
+                    logger.debug("Удалено просроченных записей FSM: %s", purged)
+            except Exception:
+                logger.exception("Ошибка удаления просроченных записей FSM")
+
+    async def start(self):
+        """Запускает периодическое удаление просроченных записей"""
+        if self._purge_task is None and self.purge_interval > 0:
+            self._purge_task = asyncio.create_task(self._purge_loop())
+
+    async def close(self) -> None:
+        if self._purge_task is not None:
+            self._purge_task.cancel()
+            self._purge_task = None
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        await self.purge_expired()
+
+def create_storage() -> BaseStorage:
+    """Создает хранилище FSM согласно config.FSM_STORAGE"""
+    if config.FSM_STORAGE == "memory":
+        return MemoryStorage()
+    if config.FSM_STORAGE == "redis":
+        from aiogram.fsm.storage.redis import RedisStorage
+        ttl = config.FSM_TTL or None
+        return RedisStorage.from_url(config.REDIS_URL, state_ttl=ttl, data_ttl=ttl)
+    flush_interval = config.FSM_FLUSH_INTERVAL
+    if flush_interval > 0 and config.multi_process:
+        # Следующее обновление пользователя может попасть в другой процесс
+        logger.warning("FSM_FLUSH_INTERVAL игнорируется: обновления обрабатывают несколько процессов")
+        flush_interval = 0
+    return SQLStorage(flush_interval=flush_interval)
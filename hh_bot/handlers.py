@@ -1,19 +1,88 @@
-from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+from aiogram import Router, Bot
+from aiogram.types import Message, CallbackQuery, FSInputFile
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from database import get_session
+from aiogram.exceptions import TelegramBadRequest
 from models import User, Resume, Vacancy, Application, SearchHistory
 from sqlalchemy import select, delete, and_, or_, func
-import os
+from sqlalchemy.ext.asyncio import AsyncSession
 from config import config
+from search import fetch_search_page, vacancy_active
+from callbacks import (
+    CallbackTable,
+    ViewVacancy,
+    DeleteVacancy,
+    ConfirmDeleteVacancy,
+    RenewVacancy,
+    ViewResume,
+    DeleteResume,
+    ConfirmDeleteResume,
+    ApplyVacancy,
+    SelectResume,
+    BackToVacancy,
+    RecommendedVacancy,
+    Unsubscribe,
+    VacancyResponses,
+    InboxStatus,
+    InboxApplication,
+    InviteApplication,
+    RejectApplication,
+    ExportData
+)
+from inbox import fetch_inbox_page, render_inbox, STATUS_ICONS
+from recommendations import recommender, resume_fields
+from applications import (
+    get_status_counts, invalidate_status_counts, create_application, fetch_applications_page, render_applications
+)
+from saved_searches import saved_searches, normalize_query
+from export import (
+    FORMATS as EXPORT_FORMATS,
+    UPLOAD_LIMIT,
+    export_employer_data,
+    export_slots,
+    make_export_directory,
+    remove_export_directory
+)
+from vacancy_import import (
+    ImportFileError,
+    EXTENSIONS as IMPORT_EXTENSIONS,
+    document_extension,
+    download_document,
+    import_vacancies,
+    publish_imported
+)
+from delivery import delivery_queue
+from user_cache import user_service
+from downloads import download_queue, message_attachment
+from cleanup import mark_deleted
+from archive import vacancy_expires_at, renew_vacancy
+from cards import (
+    render_vacancy_card,
+    get_vacancy_card,
+    get_resume_card,
+    invalidate_vacancy_card,
+    invalidate_resume_card,
+    send_card,
+    show_card,
+    edit_card_message,
+    card_methods
+)
 from keyboards import (
     get_main_menu,
     get_employer_menu,
     get_job_seeker_menu,
     get_skip_file_keyboard,
     get_confirm_skip_file_keyboard,
+    get_export_format_keyboard,
+    get_cancel_import_keyboard,
+    get_skip_resume_file_keyboard,
+    get_confirm_skip_resume_file_keyboard,
     get_vacancies_list_keyboard,
     get_back_to_vacancies_list_keyboard,
     get_confirm_delete_vacancy_keyboard,
@@ -22,11 +91,24 @@ from keyboards import (
     get_confirm_delete_resume_keyboard,
     get_vacancy_navigation_keyboard,
     get_resume_selection_keyboard,
-    get_application_response_keyboard
+    get_application_response_keyboard,
+    get_inbox_keyboard,
+    get_inbox_application_keyboard,
+    get_my_applications_keyboard,
+    get_recommendations_keyboard,
+    get_recommended_vacancy_keyboard,
+    get_no_search_results_keyboard,
+    get_saved_searches_keyboard
 )
 
+logger = logging.getLogger(__name__)
+
 router = Router()
 
+# Все нажатия кнопок проходят через таблицу обработчиков (см. callbacks.py)
+callbacks = CallbackTable()
+router.callback_query.register(callbacks.dispatch)
+
 class VacancyStates(StatesGroup):
     waiting_for_title = State()
     waiting_for_description = State()
@@ -40,6 +122,9 @@ class ResumeStates(StatesGroup):
     waiting_for_experience = State()
     waiting_for_file = State()
 
+class VacancyImportStates(StatesGroup):
+    waiting_for_file = State()
+
 class SearchVacancy(StatesGroup):
     waiting_for_position = State()
 
@@ -48,49 +133,42 @@ async def show_menu(message: Message):
     await message.answer("Главное меню:", reply_markup=get_main_menu())
 
 @router.message(Command("start"))
-async def cmd_start(message: Message):
-    async for session in get_session():
-        user = await session.execute(
-            select(User).where(User.telegram_id == message.from_user.id)
+async def cmd_start(message: Message, session: AsyncSession):
+    user = await user_service.get(session, message.from_user.id)
+    
+    if not user:
+        await user_service.create(session, message.from_user.id, message.from_user.username)
+        await message.answer(
+            "Добро пожаловать в бот поиска работы! 🎉\n\n"
+            "Я помогу вам найти работу или сотрудников. Выберите, что вы хотите сделать:",
+            reply_markup=get_main_menu()
+        )
+    else:
+        await message.answer(
+            "С возвращением! 👋\n\n"
+            "Выберите действие:",
+            reply_markup=get_main_menu()
         )
-        user = user.scalar_one_or_none()
-        
-        if not user:
-            new_user = User(
-                telegram_id=message.from_user.id,
-                username=message.from_user.username
-            )
-            session.add(new_user)
-            await session.commit()
-            await message.answer(
-                "Добро пожаловать в бот поиска работы! 🎉\n\n"
-                "Я помогу вам найти работу или сотрудников. Выберите, что вы хотите сделать:",
-                reply_markup=get_main_menu()
-            )
-        else:
-            await message.answer(
-                "С возвращением! 👋\n\n"
-                "Выберите действие:",
-                reply_markup=get_main_menu()
-            )
 
-@router.callback_query(F.data == "job_seeker")
-async def process_job_seeker(callback: CallbackQuery):
+@callbacks.register("job_seeker")
+async def process_job_seeker(callback: CallbackQuery, session: AsyncSession):
+    await user_service.set_role(session, callback.from_user.id, "job_seeker")
     await callback.message.edit_text(
         "Меню соискателя:",
         reply_markup=get_job_seeker_menu()
     )
     await callback.answer()
 
-@router.callback_query(F.data == "employer")
-async def process_employer(callback: CallbackQuery):
+@callbacks.register("employer")
+async def process_employer(callback: CallbackQuery, session: AsyncSession):
+    await user_service.set_role(session, callback.from_user.id, "employer")
     await callback.message.edit_text(
         "Меню работодателя:",
         reply_markup=get_employer_menu()
     )
     await callback.answer()
 
-@router.callback_query(F.data == "post_vacancy")
+@callbacks.register("post_vacancy")
 async def start_vacancy_creation(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text("Введите должность вакансии:")
     await state.set_state(VacancyStates.waiting_for_title)
@@ -123,7 +201,7 @@ async def process_vacancy_salary(message: Message, state: FSMContext):
     )
     await state.set_state(VacancyStates.waiting_for_file)
 
-@router.callback_query(F.data == "skip_file")
+@callbacks.register("skip_file", state=VacancyStates.waiting_for_file)
 async def confirm_skip_file(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
         "Вы уверены, что хотите создать вакансию без файла?",
@@ -131,33 +209,43 @@ async def confirm_skip_file(callback: CallbackQuery, state: FSMContext):
     )
     await callback.answer()
 
-@router.callback_query(F.data == "confirm_skip_file")
-async def create_vacancy_without_file(callback: CallbackQuery, state: FSMContext):
+@callbacks.register("cancel_skip_file", state=VacancyStates.waiting_for_file)
+async def cancel_skip_file(callback: CallbackQuery):
+    await callback.message.edit_text(
+        "Хотите прикрепить файл к вакансии?",
+        reply_markup=get_skip_file_keyboard()
+    )
+    await callback.answer()
+
+@callbacks.register("confirm_skip_file", state=VacancyStates.waiting_for_file)
+async def create_vacancy_without_file(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
     
-    async for session in get_session():
-        vacancy = Vacancy(
-            user_id=callback.from_user.id,  # Убедимся, что user_id сохраняется
-            title=data["title"],
-            company=data["company"],
-            salary=data["salary"],
-            description=data["description"]
-        )
-        session.add(vacancy)
-        await session.commit()
-        
-        print(f"Created vacancy: {vacancy.id} for user: {callback.from_user.id}")  # Отладочная информация
-        
-        await callback.message.edit_text(
-            "✅ Вакансия успешно создана!",
-            reply_markup=get_employer_menu()
-        )
+    vacancy = Vacancy(
+        user_id=callback.from_user.id,  # Убедимся, что user_id сохраняется
+        title=data["title"],
+        company=data["company"],
+        salary=data["salary"],
+        description=data["description"],
+        expires_at=vacancy_expires_at()
+    )
+    session.add(vacancy)
+    await session.commit()
+    recommender.add_vacancy(vacancy)
+    saved_searches.notify(callback.bot, vacancy)
+    
+    logger.debug("Created vacancy: %s for user: %s", vacancy.id, callback.from_user.id)
+    
+    await callback.message.edit_text(
+        "✅ Вакансия успешно создана!",
+        reply_markup=get_employer_menu()
+    )
     
     await state.clear()
     await callback.answer()
 
 @router.message(VacancyStates.waiting_for_file)
-async def process_vacancy_file(message: Message, state: FSMContext):
+async def process_vacancy_file(message: Message, state: FSMContext, session: AsyncSession):
     if not message.document and not message.photo:
         await message.answer(
             "Пожалуйста, отправьте файл или фото.",
@@ -165,184 +253,266 @@ async def process_vacancy_file(message: Message, state: FSMContext):
         )
         return
     
-    file_id = message.document.file_id if message.document else message.photo[-1].file_id
-    file_path = None
+    attachment = message_attachment(message)
+    data = await state.get_data()
     
-    if message.document:
-        file_path = f"vacancy_files/{message.document.file_name}"
-    elif message.photo:
-        file_path = f"vacancy_files/photo_{message.message_id}.jpg"
+    vacancy = Vacancy(
+        user_id=message.from_user.id,  # Убедимся, что user_id сохраняется
+        title=data["title"],
+        company=data["company"],
+        salary=data["salary"],
+        description=data["description"],
+        file_id=attachment.file_id,
+        file_unique_id=attachment.file_unique_id,
+        file_type=attachment.file_type,
+        expires_at=vacancy_expires_at()
+    )
+    session.add(vacancy)
+    await session.commit()
+    recommender.add_vacancy(vacancy)
+    saved_searches.notify(message.bot, vacancy)
     
-    data = await state.get_data()
+    # Файл скачивается в фоне, file_path появится после загрузки
+    download_queue.submit(message.bot, Vacancy, vacancy.id, attachment)
     
-    async for session in get_session():
-        vacancy = Vacancy(
-            user_id=message.from_user.id,  # Убедимся, что user_id сохраняется
-            title=data["title"],
-            company=data["company"],
-            salary=data["salary"],
-            description=data["description"],
-            file_id=file_id,
-            file_path=file_path
-        )
-        session.add(vacancy)
-        await session.commit()
-        
-        print(f"Created vacancy with file: {vacancy.id} for user: {message.from_user.id}")  # Отладочная информация
-        
+    logger.debug("Created vacancy with file: %s for user: %s", vacancy.id, message.from_user.id)
+    
+    await message.answer(
+        "✅ Вакансия успешно создана!",
+        reply_markup=get_employer_menu()
+    )
+    
+    await state.clear()
+
+@callbacks.register("import_vacancies")
+async def start_vacancy_import(callback: CallbackQuery, state: FSMContext):
+    await state.set_state(VacancyImportStates.waiting_for_file)
+    await callback.message.edit_text(
+        "Отправьте файл CSV или JSON с вакансиями.\n\n"
+        "CSV: первая строка - названия колонок title, company, salary, description "
+        "(или должность, компания, зарплата, описание), разделитель - запятая или точка с запятой.\n"
+        "JSON: массив объектов с теми же полями или по объекту на строку (.jsonl).\n\n"
+        f"Зарплата необязательна. Не больше {config.VACANCY_IMPORT_MAX_ROWS} вакансий в файле.",
+        reply_markup=get_cancel_import_keyboard()
+    )
+    await callback.answer()
+
+@callbacks.register("cancel_import", state=VacancyImportStates.waiting_for_file)
+async def cancel_vacancy_import(callback: CallbackQuery, state: FSMContext):
+    await state.clear()
+    await callback.message.edit_text("Меню работодателя:", reply_markup=get_employer_menu())
+    await callback.answer()
+
+@router.message(VacancyImportStates.waiting_for_file)
+async def process_vacancy_import(message: Message, state: FSMContext, session: AsyncSession):
+    extension = document_extension(message.document) if message.document else None
+    if extension is None:
+        await message.answer(
+            f"Пожалуйста, отправьте файл {', '.join(IMPORT_EXTENSIONS)}.",
+            reply_markup=get_cancel_import_keyboard()
+        )
+        return
+    if message.document.file_size and message.document.file_size > config.VACANCY_IMPORT_MAX_SIZE:
         await message.answer(
-            "✅ Вакансия успешно создана!",
+            f"Файл больше {config.VACANCY_IMPORT_MAX_SIZE // (1024 * 1024)} МБ, разделите его на части.",
+            reply_markup=get_cancel_import_keyboard()
+        )
+        return
+    await state.clear()
+    
+    status = await message.answer("⏳ Импорт вакансий...")
+    
+    async def report_progress(report):
+        try:
+            await status.edit_text(
+                f"⏳ Импорт вакансий: обработано строк {report.processed}, ошибок {report.error_count}"
+            )
+        except TelegramBadRequest:
+            pass
+    
+    path = None
+    try:
+        path = await download_document(message.bot, message.document)
+        report = await import_vacancies(session, message.from_user.id, path, extension, on_progress=report_progress)
+    except ImportFileError as e:
+        await status.edit_text(f"❌ Файл не импортирован: {e}", reply_markup=get_employer_menu())
+        return
+    except Exception:
+        # Файл не скачался или импорт прервался - вакансии не сохранены, сообщаем вместо "⏳"
+        logger.exception("Ошибка импорта вакансий пользователя %s", message.from_user.id)
+        await status.edit_text(
+            "❌ Не удалось импортировать файл, попробуйте еще раз.",
             reply_markup=get_employer_menu()
         )
+        return
+    finally:
+        if path is not None:
+            await asyncio.to_thread(os.remove, path)
     
-    await state.clear()
+    if report.imported:
+        # Как после создания одной вакансии: рекомендации и уведомления подписчикам
+        await publish_imported(message.bot, session, report.vacancy_ids)
+    logger.debug("Imported %s vacancies for user %s", report.imported, message.from_user.id)
+    
+    await status.edit_text(report.render(), reply_markup=get_employer_menu())
 
-@router.callback_query(F.data == "main_menu")
-async def return_to_main_menu(callback: CallbackQuery):
-    await callback.message.edit_text("Главное меню:", reply_markup=get_main_menu())
+@router.message(Command("export"))
+async def cmd_export(message: Message):
+    await message.answer("Выберите формат выгрузки вакансий и откликов:", reply_markup=get_export_format_keyboard())
+
+@callbacks.register("export")
+async def choose_export_format(callback: CallbackQuery):
+    await callback.message.edit_text(
+        "Выберите формат выгрузки вакансий и откликов:",
+        reply_markup=get_export_format_keyboard()
+    )
     await callback.answer()
 
-@router.callback_query(F.data == "my_vacancies")
-async def show_my_vacancies(callback: CallbackQuery):
-    print(f"Showing vacancies for user: {callback.from_user.id}")  # Отладочная информация
+@callbacks.register(ExportData)
+async def export_data(callback: CallbackQuery, callback_data: ExportData, session: AsyncSession):
+    if callback_data.fmt not in EXPORT_FORMATS:
+        await callback.answer()
+        return
     
-    async for session in get_session():
-        # Получаем все вакансии пользователя
-        result = await session.execute(
-            select(Vacancy).where(Vacancy.user_id == callback.from_user.id)
-        )
-        vacancies = result.scalars().all()
-        
-        print(f"Found {len(vacancies)} vacancies for user {callback.from_user.id}")
-        for v in vacancies:
-            print(f"Vacancy: {v.id} - {v.title} - User: {v.user_id}")
+    has_vacancies = await session.scalar(
+        select(Vacancy.id)
+        .where(Vacancy.user_id == callback.from_user.id, Vacancy.deleted_at.is_(None))
+        .limit(1)
+    )
+    if not has_vacancies:
+        await callback.answer("У вас пока нет вакансий для выгрузки.", show_alert=True)
+        return
+    
+    await callback.answer()
+    await callback.message.edit_text("⏳ Готовим выгрузку...")
+    
+    directory = await make_export_directory()
+    try:
+        # Файлы пишутся потоково, в память выгрузка целиком не загружается
+        async with export_slots:
+            files = await export_employer_data(session, callback.from_user.id, callback_data.fmt, directory)
         
-        if not vacancies:
-            await callback.message.delete()
-            await callback.message.answer(
-                "У вас пока нет размещенных вакансий.",
-                reply_markup=get_employer_menu()
-            )
-            return
-            
+        for path, filename in files:
+            if os.path.getsize(path) > UPLOAD_LIMIT:
+                await callback.message.answer(f"Файл {filename} больше 50 МБ и не может быть отправлен.")
+                continue
+            await callback.bot.send_document(callback.from_user.id, FSInputFile(path, filename=filename))
+    finally:
+        await remove_export_directory(directory)
+    
+    await callback.message.edit_text("✅ Выгрузка готова.", reply_markup=get_employer_menu())
+
+@callbacks.register("main_menu")
+async def back_to_main_menu(callback: CallbackQuery):
+    await callback.message.edit_text("Главное меню:", reply_markup=get_main_menu())
+    await callback.answer()
+
+@callbacks.register("my_vacancies")
+async def show_my_vacancies(callback: CallbackQuery, session: AsyncSession):
+    logger.debug("Showing vacancies for user: %s", callback.from_user.id)
+    
+    # Получаем все вакансии пользователя
+    result = await session.execute(
+        select(Vacancy.id, Vacancy.title)
+        .where(Vacancy.user_id == callback.from_user.id, Vacancy.deleted_at.is_(None))
+        .order_by(Vacancy.created_at)
+    )
+    # Для клавиатуры нужны только id и название
+    vacancies = result.all()
+    
+    logger.debug("Found %s vacancies for user %s", len(vacancies), callback.from_user.id)
+    
+    if not vacancies:
         await callback.message.delete()
         await callback.message.answer(
-            "Ваши вакансии:",
-            reply_markup=get_vacancies_list_keyboard(vacancies)
+            "У вас пока нет размещенных вакансий.",
+            reply_markup=get_employer_menu()
         )
+        return
+        
+    await callback.message.delete()
+    await callback.message.answer(
+        "Ваши вакансии:",
+        reply_markup=get_vacancies_list_keyboard(vacancies)
+    )
     await callback.answer()
 
-@router.callback_query(F.data.startswith("view_vacancy_"))
-async def view_vacancy(callback: CallbackQuery, bot: Bot):
-    vacancy_id = int(callback.data.split("_")[-1])
+@callbacks.register(ViewVacancy)
+async def view_vacancy(callback: CallbackQuery, callback_data: ViewVacancy, bot: Bot, session: AsyncSession):
+    vacancy_id = callback_data.vacancy_id
     
-    async for session in get_session():
-        result = await session.execute(
-            select(Vacancy).where(Vacancy.id == vacancy_id)
-        )
-        vacancy = result.scalar_one_or_none()
-        
-        if not vacancy:
-            await callback.message.edit_text(
-                "Вакансия не найдена.",
-                reply_markup=get_employer_menu()
-            )
-            return
-            
-        # Формируем текст сообщения
-        text = (
-            f"Должность: {vacancy.title}\n"
-            f"Компания: {vacancy.company}\n"
-            f"Зарплата: {vacancy.salary}\n"
-            f"Описание: {vacancy.description}\n"
-            f"Дата создания: {vacancy.created_at.strftime('%d.%m.%Y %H:%M')}"
-        )
-        
+    card = await get_vacancy_card(session, vacancy_id)
+    
+    if not card:
         await callback.message.edit_text(
-            text,
-            reply_markup=get_back_to_vacancies_list_keyboard(vacancy.id)
+            "Вакансия не найдена.",
+            reply_markup=get_employer_menu()
         )
-        
-        # Отправляем файл, если он есть
-        if vacancy.file_id:
-            try:
-                if vacancy.file_path and vacancy.file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    await bot.send_photo(
-                        chat_id=callback.message.chat.id,
-                        photo=vacancy.file_id,
-                        caption=f"Файл вакансии: {vacancy.title}"
-                    )
-                else:
-                    await bot.send_document(
-                        chat_id=callback.message.chat.id,
-                        document=vacancy.file_id,
-                        caption=f"Файл вакансии: {vacancy.title}"
-                    )
-            except Exception as e:
-                print(f"Error sending file: {e}")
-                await callback.message.answer(
-                    "Не удалось отправить прикрепленный файл."
-                )
-
-    await callback.answer()
-
-@router.callback_query(F.data.startswith("delete_vacancy_"))
-async def confirm_delete_vacancy(callback: CallbackQuery):
-    vacancy_id = int(callback.data.split("_")[-1])
-    await callback.message.edit_text(
+        return
+    
+    # Карточка и файл - одно сообщение
+    await show_card(
+        callback.message,
+        card,
+        reply_markup=get_back_to_vacancies_list_keyboard(card.id)
+    )
+
+    await callback.answer()
+
+@callbacks.register(RenewVacancy)
+async def renew_my_vacancy(callback: CallbackQuery, callback_data: RenewVacancy, session: AsyncSession):
+    expires_at = await renew_vacancy(session, callback_data.vacancy_id, callback.from_user.id)
+    
+    if not expires_at:
+        await edit_card_message(callback.message, "Вакансия не найдена.", reply_markup=get_employer_menu())
+        await callback.answer()
+        return
+    
+    # Показываем карточку с новым сроком
+    card = await get_vacancy_card(session, callback_data.vacancy_id)
+    if card:
+        await show_card(callback.message, card, reply_markup=get_back_to_vacancies_list_keyboard(card.id))
+    await callback.answer(f"Вакансия продлена до {expires_at:%d.%m.%Y}")
+
+@callbacks.register(DeleteVacancy)
+async def confirm_delete_vacancy(callback: CallbackQuery, callback_data: DeleteVacancy):
+    vacancy_id = callback_data.vacancy_id
+    await edit_card_message(
+        callback.message,
         "Вы уверены, что хотите удалить эту вакансию?",
         reply_markup=get_confirm_delete_vacancy_keyboard(vacancy_id)
     )
     await callback.answer()
 
-@router.callback_query(F.data.startswith("confirm_delete_vacancy_"))
-async def delete_vacancy(callback: CallbackQuery, bot: Bot):
-    vacancy_id = int(callback.data.split("_")[-1])
+@callbacks.register(ConfirmDeleteVacancy)
+async def delete_vacancy(callback: CallbackQuery, callback_data: ConfirmDeleteVacancy, bot: Bot, session: AsyncSession):
+    vacancy_id = callback_data.vacancy_id
     
-    async for session in get_session():
-        # Получаем вакансию для удаления файла
-        vacancy = await session.execute(
-            select(Vacancy).where(Vacancy.id == vacancy_id)
-        )
-        vacancy = vacancy.scalar_one_or_none()
+    # Вакансия только отмечается удаленной; отклики и файл удалит фоновая очистка
+    if await mark_deleted(session, Vacancy, vacancy_id, callback.from_user.id):
+        invalidate_vacancy_card(vacancy_id)
+        recommender.remove(vacancy_id)
+        logger.debug("Вакансия отмечена удаленной: ID %s", vacancy_id)
         
-        if vacancy:
-            # Удаляем файл, если он есть
-            if vacancy.file_path:
-                try:
-                    if os.path.exists(vacancy.file_path):
-                        os.remove(vacancy.file_path)
-                        print(f"Файл успешно удален: {vacancy.file_path}")
-                    else:
-                        print(f"Файл не найден: {vacancy.file_path}")
-                except Exception as e:
-                    print(f"Ошибка при удалении файла {vacancy.file_path}: {e}")
-            
-            # Удаляем вакансию из базы данных
-            await session.execute(
-                delete(Vacancy).where(Vacancy.id == vacancy_id)
-            )
-            await session.commit()
-            print(f"Вакансия успешно удалена из БД: ID {vacancy_id}")
-            
-            # Удаляем сообщение с подтверждением
-            await callback.message.delete()
-            
-            # Отправляем сообщение об успешном удалении
-            await bot.send_message(
-                chat_id=callback.message.chat.id,
-                text="✅ Вакансия успешно удалена",
-                reply_markup=get_employer_menu()
-            )
-        else:
-            await callback.message.edit_text(
-                "Вакансия не найдена.",
-                reply_markup=get_employer_menu()
-            )
+        # Удаляем сообщение с подтверждением
+        await callback.message.delete()
+        
+        # Отправляем сообщение об успешном удалении
+        await bot.send_message(
+            chat_id=callback.message.chat.id,
+            text="✅ Вакансия успешно удалена",
+            reply_markup=get_employer_menu()
+        )
+    else:
+        await edit_card_message(
+            callback.message,
+            "Вакансия не найдена.",
+            reply_markup=get_employer_menu()
+        )
     
     await callback.answer()
 
-@router.callback_query(F.data == "create_resume")
+@callbacks.register("create_resume")
 async def start_resume_creation(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
         "Введите название вашего резюме (например, 'Python Developer'):"
@@ -367,30 +537,37 @@ async def process_resume_experience(message: Message, state: FSMContext):
     await state.update_data(experience=message.text)
     await message.answer(
         "Отправьте файл с вашим резюме (PDF, DOC, изображение) или нажмите кнопку 'Оставить без файла':",
-        reply_markup=get_skip_file_keyboard()
+        reply_markup=get_skip_resume_file_keyboard()
     )
     await state.set_state(ResumeStates.waiting_for_file)
 
-@router.callback_query(F.data == "skip_file", ResumeStates.waiting_for_file)
+@callbacks.register("skip_resume_file", state=ResumeStates.waiting_for_file)
 async def skip_resume_file(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
         "Вы уверены, что хотите оставить резюме без файла?",
-        reply_markup=get_confirm_skip_file_keyboard()
+        reply_markup=get_confirm_skip_resume_file_keyboard()
     )
     await callback.answer()
 
-@router.callback_query(F.data == "confirm_skip_file", ResumeStates.waiting_for_file)
-async def confirm_skip_resume_file(callback: CallbackQuery, state: FSMContext):
+@callbacks.register("cancel_skip_resume_file", state=ResumeStates.waiting_for_file)
+async def cancel_skip_resume_file(callback: CallbackQuery):
+    await callback.message.edit_text(
+        "Отправьте файл с вашим резюме (PDF, DOC, изображение) или нажмите кнопку 'Оставить без файла':",
+        reply_markup=get_skip_resume_file_keyboard()
+    )
+    await callback.answer()
+
+@callbacks.register("confirm_skip_resume_file", state=ResumeStates.waiting_for_file)
+async def confirm_skip_resume_file(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
-    async for session in get_session():
-        resume = Resume(
-            title=data['title'],
-            description=data['description'],
-            experience=data['experience'],
-            user_id=callback.from_user.id
-        )
-        session.add(resume)
-        await session.commit()
+    resume = Resume(
+        title=data['title'],
+        description=data['description'],
+        experience=data['experience'],
+        user_id=callback.from_user.id
+    )
+    session.add(resume)
+    await session.commit()
     
     await callback.message.edit_text(
         "✅ Резюме успешно создано!",
@@ -400,244 +577,152 @@ async def confirm_skip_resume_file(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.message(ResumeStates.waiting_for_file)
-async def process_resume_file(message: Message, state: FSMContext, bot: Bot):
+async def process_resume_file(message: Message, state: FSMContext, bot: Bot, session: AsyncSession):
     if not message.document and not message.photo:
         await message.answer("Пожалуйста, отправьте файл или нажмите кнопку 'Оставить без файла'")
         return
 
     data = await state.get_data()
-    file_id = None
-    file_path = None
+    attachment = message_attachment(message)
 
-    try:
-        if message.document:
-            file_id = message.document.file_id
-            file_name = message.document.file_name
-            file_path = os.path.join(config.RESUMES_DIR, f"{file_id}_{file_name}")
-            # Скачиваем файл
-            file = await bot.get_file(file_id)
-            await bot.download_file(file.file_path, file_path)
-        elif message.photo:
-            file_id = message.photo[-1].file_id
-            file_path = os.path.join(config.RESUMES_DIR, f"{file_id}.jpg")
-            # Скачиваем фото
-            file = await bot.get_file(file_id)
-            await bot.download_file(file.file_path, file_path)
-
-        async for session in get_session():
-            resume = Resume(
-                title=data['title'],
-                description=data['description'],
-                experience=data['experience'],
-                user_id=message.from_user.id,
-                file_id=file_id,
-                file_path=file_path
-            )
-            session.add(resume)
-            await session.commit()
+    resume = Resume(
+        title=data['title'],
+        description=data['description'],
+        experience=data['experience'],
+        user_id=message.from_user.id,
+        file_id=attachment.file_id,
+        file_unique_id=attachment.file_unique_id,
+        file_type=attachment.file_type
+    )
+    session.add(resume)
+    await session.commit()
 
-        await message.answer(
-            "✅ Резюме успешно создано!",
-            reply_markup=get_job_seeker_menu()
-        )
-    except Exception as e:
-        await message.answer(
-            "❌ Произошла ошибка при сохранении файла. Попробуйте еще раз или создайте резюме без файла.",
-            reply_markup=get_skip_file_keyboard()
-        )
-        print(f"Error saving file: {e}")
-        return
+    # Не ждем загрузки файла: file_path появится, когда файл будет скачан
+    download_queue.submit(bot, Resume, resume.id, attachment)
 
+    await message.answer(
+        "✅ Резюме успешно создано!",
+        reply_markup=get_job_seeker_menu()
+    )
     await state.clear()
 
-@router.callback_query(F.data == "my_resumes")
-async def show_my_resumes(callback: CallbackQuery):
-    async for session in get_session():
-        # Получаем все резюме пользователя
-        result = await session.execute(
-            select(Resume).where(Resume.user_id == callback.from_user.id)
-        )
-        resumes = result.scalars().all()
-
-        if not resumes:
-            await callback.message.delete()
-            await callback.message.answer(
-                "У вас пока нет созданных резюме.",
-                reply_markup=get_job_seeker_menu()
-            )
-            return
+@callbacks.register("my_resumes")
+async def show_my_resumes(callback: CallbackQuery, session: AsyncSession):
+    # Получаем все резюме пользователя
+    result = await session.execute(
+        select(Resume.id, Resume.title)
+        .where(Resume.user_id == callback.from_user.id, Resume.deleted_at.is_(None))
+        .order_by(Resume.created_at)
+    )
+    resumes = result.all()
 
-        # Формируем список резюме
+    if not resumes:
         await callback.message.delete()
         await callback.message.answer(
-            "Ваши резюме:",
-            reply_markup=get_resumes_list_keyboard(resumes)
+            "У вас пока нет созданных резюме.",
+            reply_markup=get_job_seeker_menu()
         )
+        return
+
+    # Формируем список резюме
+    await callback.message.delete()
+    await callback.message.answer(
+        "Ваши резюме:",
+        reply_markup=get_resumes_list_keyboard(resumes)
+    )
     await callback.answer()
 
-@router.callback_query(F.data.startswith("view_resume_"))
-async def view_resume(callback: CallbackQuery, bot: Bot):
-    resume_id = int(callback.data.split("_")[-1])
+@callbacks.register(ViewResume)
+async def view_resume(callback: CallbackQuery, callback_data: ViewResume, bot: Bot, session: AsyncSession):
+    resume_id = callback_data.resume_id
     
-    async for session in get_session():
-        result = await session.execute(
-            select(Resume).where(Resume.id == resume_id)
-        )
-        resume = result.scalar_one_or_none()
-        
-        if not resume:
-            await callback.message.edit_text(
-                "Резюме не найдено.",
-                reply_markup=get_job_seeker_menu()
-            )
-            return
-            
-        # Формируем текст сообщения
-        text = (
-            f"ID: {resume.id}\n"
-            f"Название: {resume.title}\n"
-            f"Описание: {resume.description}\n"
-            f"Опыт работы: {resume.experience}\n"
-            f"Дата создания: {resume.created_at.strftime('%d.%m.%Y %H:%M')}"
-        )
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_back_to_resumes_list_keyboard()
-        )
-        
-        # Отправляем файл, если он есть
-        if resume.file_id:
-            try:
-                if resume.file_path and resume.file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    await bot.send_photo(
-                        chat_id=callback.message.chat.id,
-                        photo=resume.file_id,
-                        caption=f"Файл резюме: {resume.title}"
-                    )
-                else:
-                    await bot.send_document(
-                        chat_id=callback.message.chat.id,
-                        document=resume.file_id,
-                        caption=f"Файл резюме: {resume.title}"
-                    )
-            except Exception as e:
-                print(f"Error sending file: {e}")
-                await callback.message.answer(
-                    "Не удалось отправить прикрепленный файл."
-                )
-
-    await callback.answer()
-
-@router.callback_query(F.data == "back_to_resumes_list")
-async def back_to_resumes_list(callback: CallbackQuery):
-    async for session in get_session():
-        result = await session.execute(
-            select(Resume).where(Resume.user_id == callback.from_user.id)
-        )
-        resumes = result.scalars().all()
-        
-        if not resumes:
-            await callback.message.edit_text(
-                "У вас пока нет созданных резюме.",
-                reply_markup=get_job_seeker_menu()
-            )
-            return
-            
+    card = await get_resume_card(session, resume_id)
+    
+    if not card:
         await callback.message.edit_text(
-            "Ваши резюме:",
-            reply_markup=get_resumes_list_keyboard(resumes)
+            "Резюме не найдено.",
+            reply_markup=get_job_seeker_menu()
         )
+        return
+    
+    await show_card(
+        callback.message,
+        card,
+        reply_markup=get_back_to_resumes_list_keyboard(card.id)
+    )
+
     await callback.answer()
 
-@router.callback_query(F.data == "delete_resume")
-async def delete_resume(callback: CallbackQuery):
-    # Получаем ID резюме из предыдущего сообщения
-    try:
-        # Ищем ID в тексте сообщения
-        text_lines = callback.message.text.split('\n')
-        for line in text_lines:
-            if line.startswith('ID:'):
-                resume_id = int(line.split('ID:')[1].strip())
-                break
-        else:
-            raise ValueError("ID не найден в сообщении")
-            
-    except (IndexError, ValueError) as e:
-        print(f"Error parsing resume ID: {e}")
+@callbacks.register("back_to_resumes_list")
+async def back_to_resumes_list(callback: CallbackQuery, session: AsyncSession):
+    result = await session.execute(
+        select(Resume.id, Resume.title)
+        .where(Resume.user_id == callback.from_user.id, Resume.deleted_at.is_(None))
+        .order_by(Resume.created_at)
+    )
+    resumes = result.all()
+    
+    if not resumes:
         await callback.message.edit_text(
-            "Ошибка: не удалось определить резюме",
+            "У вас пока нет созданных резюме.",
             reply_markup=get_job_seeker_menu()
         )
         return
-    
+        
     await callback.message.edit_text(
+        "Ваши резюме:",
+        reply_markup=get_resumes_list_keyboard(resumes)
+    )
+    await callback.answer()
+
+@callbacks.register(DeleteResume)
+async def delete_resume(callback: CallbackQuery, callback_data: DeleteResume):
+    await edit_card_message(
+        callback.message,
         "Вы уверены, что хотите удалить это резюме?",
-        reply_markup=get_confirm_delete_resume_keyboard(resume_id)
+        reply_markup=get_confirm_delete_resume_keyboard(callback_data.resume_id)
     )
     await callback.answer()
 
-@router.callback_query(F.data.startswith("confirm_delete_resume_"))
-async def confirm_delete_resume(callback: CallbackQuery):
-    try:
-        resume_id = int(callback.data.split("_")[-1])
-    except (IndexError, ValueError):
-        await callback.message.edit_text(
-            "Ошибка: неверный ID резюме",
+@callbacks.register(ConfirmDeleteResume)
+async def confirm_delete_resume(callback: CallbackQuery, callback_data: ConfirmDeleteResume, session: AsyncSession):
+    resume_id = callback_data.resume_id
+    
+    # Резюме только отмечается удаленным; отклики и файл удалит фоновая очистка
+    if not await mark_deleted(session, Resume, resume_id, callback.from_user.id):
+        await edit_card_message(
+            callback.message,
+            "Ошибка: резюме не найдено или у вас нет прав на его удаление",
             reply_markup=get_job_seeker_menu()
         )
         return
-    
-    async for session in get_session():
-        # Получаем резюме
-        result = await session.execute(
-            select(Resume).where(
-                and_(
-                    Resume.id == resume_id,
-                    Resume.user_id == callback.from_user.id
-                )
-            )
-        )
-        resume = result.scalar_one_or_none()
-
-        if not resume:
-            await callback.message.edit_text(
-                "Ошибка: резюме не найдено или у вас нет прав на его удаление",
-                reply_markup=get_job_seeker_menu()
-            )
-            return
-
-        # Удаляем файл, если он есть
-        if resume.file_path and os.path.exists(resume.file_path):
-            try:
-                os.remove(resume.file_path)
-            except Exception as e:
-                print(f"Error deleting file: {e}")
 
-        # Удаляем резюме из базы данных
-        await session.delete(resume)
-        await session.commit()
+    invalidate_resume_card(resume_id)
 
-        # Показываем обновленный список резюме
-        result = await session.execute(
-            select(Resume).where(Resume.user_id == callback.from_user.id)
+    # Показываем обновленный список резюме
+    result = await session.execute(
+        select(Resume.id, Resume.title)
+        .where(Resume.user_id == callback.from_user.id, Resume.deleted_at.is_(None))
+        .order_by(Resume.created_at)
+    )
+    resumes = result.all()
+    
+    if not resumes:
+        await edit_card_message(
+            callback.message,
+            "✅ Резюме успешно удалено!\nУ вас больше нет резюме.",
+            reply_markup=get_job_seeker_menu()
+        )
+    else:
+        await edit_card_message(
+            callback.message,
+            "✅ Резюме успешно удалено!\nВаши резюме:",
+            reply_markup=get_resumes_list_keyboard(resumes)
         )
-        resumes = result.scalars().all()
-        
-        if not resumes:
-            await callback.message.edit_text(
-                "✅ Резюме успешно удалено!\nУ вас больше нет резюме.",
-                reply_markup=get_job_seeker_menu()
-            )
-        else:
-            await callback.message.edit_text(
-                "✅ Резюме успешно удалено!\nВаши резюме:",
-                reply_markup=get_resumes_list_keyboard(resumes)
-            )
 
     await callback.answer()
 
-@router.callback_query(F.data == "search_vacancies")
+@callbacks.register("search_vacancies")
 async def search_vacancies(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
         "Введите название вакансии для поиска:"
@@ -645,70 +730,45 @@ async def search_vacancies(callback: CallbackQuery, state: FSMContext):
     await state.set_state(SearchVacancy.waiting_for_position)
 
 @router.message(SearchVacancy.waiting_for_position)
-async def process_vacancy_search(message: Message, state: FSMContext):
+async def process_vacancy_search(message: Message, state: FSMContext, session: AsyncSession):
     search_title = message.text.strip()
     
-    async for session in get_session():
-        # Ищем вакансии по названию
-        result = await session.execute(
-            select(Vacancy).where(
-                Vacancy.title.ilike(f"%{search_title}%")
-            )
-        )
-        vacancies = result.scalars().all()
-        
-        if not vacancies:
-            await message.answer(
-                "Вакансии не найдены. Попробуйте изменить параметры поиска.",
-                reply_markup=get_job_seeker_menu()
-            )
-            return
-        
-        # Сохраняем найденные вакансии в состоянии
-        vacancy_ids = [v.id for v in vacancies]
-        await state.update_data(found_vacancies=vacancy_ids)
-        
-        # Показываем первую вакансию
-        vacancy = vacancies[0]
+    # Ищем вакансии по должности, компании и описанию (только первую страницу)
+    page = await fetch_search_page(session, search_title)
+    
+    # Сохраняем в состоянии только запрос и курсор текущей страницы
+    await state.update_data(
+        search_query=search_title,
+        page_first=page.first,
+        page_last=page.last
+    )
+    
+    if not page.vacancies:
+        # На запрос без результатов можно подписаться
         await message.answer(
-            f"Должность: {vacancy.title}\n"
-            f"Компания: {vacancy.company}\n"
-            f"Зарплата: {vacancy.salary}\n"
-            f"Описание: {vacancy.description}\n"
-            f"Дата создания: {vacancy.created_at.strftime('%d.%m.%Y %H:%M')}",
-            reply_markup=get_vacancy_navigation_keyboard(vacancy.id, len(vacancies), 0)
+            "Вакансии не найдены. Попробуйте изменить параметры поиска "
+            "или подпишитесь, чтобы узнать о новых вакансиях.",
+            reply_markup=get_no_search_results_keyboard()
         )
-        
-        # Отправляем файл, если он есть
-        if vacancy.file_id:
-            try:
-                if vacancy.file_path and vacancy.file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    await message.answer_photo(
-                        photo=vacancy.file_id,
-                        caption=f"Файл вакансии: {vacancy.title}"
-                    )
-                else:
-                    await message.answer_document(
-                        document=vacancy.file_id,
-                        caption=f"Файл вакансии: {vacancy.title}"
-                    )
-            except Exception as e:
-                print(f"Error sending file: {e}")
-                await message.answer(
-                    "Не удалось отправить прикрепленный файл."
-                )
-
-@router.callback_query(F.data.startswith(("prev_vacancy_", "next_vacancy_")))
-async def navigate_vacancies(callback: CallbackQuery, state: FSMContext):
-    parts = callback.data.split("_")
-    action = parts[1]
-    current_index = int(parts[2])
-    
-    # Получаем сохраненные данные
+        return
+    
+    # Показываем первую вакансию
+    card = render_vacancy_card(page.vacancies[0])
+    await send_card(
+        message.bot,
+        message.chat.id,
+        card,
+        reply_markup=get_vacancy_navigation_keyboard(card.id, page.has_prev, page.has_next)
+    )
+
+@callbacks.register("prev_vacancy", "next_vacancy")
+async def navigate_vacancies(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+    
+    # Получаем сохраненный курсор
     data = await state.get_data()
-    vacancy_ids = data.get("found_vacancies", [])
+    search_query = data.get("search_query")
     
-    if not vacancy_ids:
+    if not search_query:
         await callback.message.delete()
         await callback.message.answer(
             "Вакансии не найдены. Пожалуйста, выполните поиск заново.",
@@ -716,298 +776,496 @@ async def navigate_vacancies(callback: CallbackQuery, state: FSMContext):
         )
         return
     
-    # Определяем новый индекс
-    new_index = current_index - 1 if action == "prev" else current_index + 1
+    # Последний поиск мог ничего не найти, тогда курсора нет, а кнопка - из старого сообщения
+    cursor = data.get("page_first" if callback.data == "prev_vacancy" else "page_last")
+    if not cursor:
+        await callback.answer("Кнопка устарела. Выполните поиск заново.", show_alert=True)
+        return
     
-    if 0 <= new_index < len(vacancy_ids):
-        async for session in get_session():
-            result = await session.execute(
-                select(Vacancy).where(Vacancy.id == vacancy_ids[new_index])
-            )
-            vacancy = result.scalar_one_or_none()
-            
-            if vacancy:
-                await callback.message.delete()
-                await callback.message.answer(
-                    f"Должность: {vacancy.title}\n"
-                    f"Компания: {vacancy.company}\n"
-                    f"Зарплата: {vacancy.salary}\n"
-                    f"Описание: {vacancy.description}\n"
-                    f"Дата создания: {vacancy.created_at.strftime('%d.%m.%Y %H:%M')}",
-                    reply_markup=get_vacancy_navigation_keyboard(vacancy.id, len(vacancy_ids), new_index)
-                )
-                
-                # Отправляем файл, если он есть
-                if vacancy.file_id:
-                    try:
-                        if vacancy.file_path and vacancy.file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-                            await callback.bot.send_photo(
-                                chat_id=callback.message.chat.id,
-                                photo=vacancy.file_id,
-                                caption=f"Файл вакансии: {vacancy.title}"
-                            )
-                        else:
-                            await callback.bot.send_document(
-                                chat_id=callback.message.chat.id,
-                                document=vacancy.file_id,
-                                caption=f"Файл вакансии: {vacancy.title}"
-                            )
-                    except Exception as e:
-                        print(f"Error sending file: {e}")
-                        await callback.message.answer(
-                            "Не удалось отправить прикрепленный файл."
-                        )
-    
-    await callback.answer()
-
-@router.callback_query(F.data.startswith("apply_vacancy_"))
-async def show_resume_selection(callback: CallbackQuery, state: FSMContext):
-    vacancy_id = int(callback.data.split("_")[-1])
-    print(f"Applying for vacancy: {vacancy_id}")  # Отладочная информация
-    
-    async for session in get_session():
-        # Получаем резюме пользователя
-        result = await session.execute(
-            select(Resume).where(Resume.user_id == callback.from_user.id)
-        )
-        resumes = result.scalars().all()
-        
-        print(f"Found {len(resumes)} resumes for user {callback.from_user.id}")  # Отладочная информация
-        
-        if not resumes:
-            await callback.message.edit_text(
-                "У вас нет резюме для отклика. Создайте резюме и попробуйте снова.",
-                reply_markup=get_job_seeker_menu()
-            )
-            return
+    if callback.data == "prev_vacancy":
+        page = await fetch_search_page(session, search_query, before=tuple(cursor))
+    else:
+        page = await fetch_search_page(session, search_query, after=tuple(cursor))
+    
+    if page.vacancies:
+        await state.update_data(page_first=page.first, page_last=page.last)
+        card = render_vacancy_card(page.vacancies[0])
         
-        await callback.message.edit_text(
-            "Выберите резюме для отклика:",
-            reply_markup=get_resume_selection_keyboard(resumes, vacancy_id)
+        # Соседние карточки с файлами переключаются одним editMessageMedia
+        await show_card(
+            callback.message,
+            card,
+            reply_markup=get_vacancy_navigation_keyboard(card.id, page.has_prev, page.has_next)
         )
     
     await callback.answer()
 
-@router.callback_query(F.data.startswith("select_resume_"))
-async def submit_application(callback: CallbackQuery, state: FSMContext):
-    parts = callback.data.split("_")
-    resume_id = int(parts[2])
-    vacancy_id = int(parts[3])
+@callbacks.register("save_search")
+async def save_search(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+    data = await state.get_data()
+    query = normalize_query(data.get("search_query") or "")
     
-    print(f"Submitting application: resume {resume_id} for vacancy {vacancy_id}")  # Отладочная информация
+    if not query:
+        await callback.answer("Выполните поиск заново, чтобы подписаться.", show_alert=True)
+        return
+    
+    result = await session.execute(
+        select(SearchHistory.query).where(SearchHistory.user_id == callback.from_user.id)
+    )
+    queries = result.scalars().all()
     
-    async for session in get_session():
-        # Получаем вакансию и резюме
-        result = await session.execute(
-            select(Vacancy).where(Vacancy.id == vacancy_id)
+    if query in queries:
+        await callback.answer("Вы уже подписаны на этот запрос.", show_alert=True)
+        return
+    if len(queries) >= config.SAVED_SEARCH_LIMIT:
+        await callback.answer(
+            f"Можно сохранить не больше {config.SAVED_SEARCH_LIMIT} запросов. "
+            "Удалите ненужные в разделе «Мои подписки».",
+            show_alert=True
         )
-        vacancy = result.scalar_one_or_none()
-        
-        result = await session.execute(
-            select(Resume).where(Resume.id == resume_id)
+        return
+    
+    search = SearchHistory(user_id=callback.from_user.id, query=query)
+    session.add(search)
+    await session.commit()
+    saved_searches.subscribe(search)
+    
+    await callback.answer(f"🔔 Сообщим о новых вакансиях по запросу «{query}».", show_alert=True)
+
+@callbacks.register("saved_searches")
+async def show_saved_searches(callback: CallbackQuery, session: AsyncSession):
+    result = await session.execute(
+        select(SearchHistory)
+        .where(SearchHistory.user_id == callback.from_user.id)
+        .order_by(SearchHistory.id)
+    )
+    searches = result.scalars().all()
+    
+    if searches:
+        text = "🔔 Ваши подписки на новые вакансии.\nНажмите на запрос, чтобы отписаться."
+    else:
+        text = "У вас нет подписок. Найдите вакансии и подпишитесь на запрос."
+    
+    await edit_card_message(callback.message, text, reply_markup=get_saved_searches_keyboard(searches))
+    await callback.answer()
+
+@callbacks.register(Unsubscribe)
+async def unsubscribe_search(callback: CallbackQuery, callback_data: Unsubscribe, session: AsyncSession):
+    search_id = callback_data.search_id
+    
+    await session.execute(
+        delete(SearchHistory).where(
+            and_(SearchHistory.id == search_id, SearchHistory.user_id == callback.from_user.id)
         )
-        resume = result.scalar_one_or_none()
-        
-        if not vacancy or not resume:
-            await callback.message.edit_text(
-                "Вакансия или резюме не найдены.",
-                reply_markup=get_job_seeker_menu()
-            )
-            return
-        
-        # Создаем отклик
-        application = Application(
-            user_id=callback.from_user.id,
-            vacancy_id=vacancy_id,
-            resume_id=resume_id,
-            status="new"
-        )
-        session.add(application)
-        await session.commit()
-        
-        print(f"Created application: {application.id}")  # Отладочная информация
-        
-        # Уведомляем работодателя
-        await callback.bot.send_message(
-            chat_id=vacancy.user_id,
-            text=f"На вашу вакансию '{vacancy.title}' пришел отклик!"
+    )
+    await session.commit()
+    saved_searches.unsubscribe(search_id)
+    
+    await show_saved_searches(callback, session)
+
+@callbacks.register("recommended_vacancies")
+async def show_recommended_vacancies(callback: CallbackQuery, session: AsyncSession):
+    # Рекомендации строятся по всем резюме соискателя
+    result = await session.execute(
+        select(Resume.title, Resume.description, Resume.experience)
+        .where(Resume.user_id == callback.from_user.id, Resume.deleted_at.is_(None))
+    )
+    resumes = result.all()
+    
+    if not resumes:
+        await edit_card_message(
+            callback.message,
+            "Чтобы получить рекомендации, создайте резюме.",
+            reply_markup=get_job_seeker_menu()
         )
-        
-        # Отправляем работодателю информацию о резюме
-        resume_text = (
-            f"Резюме соискателя:\n"
-            f"Название: {resume.title}\n"
-            f"Описание: {resume.description}\n"
-            f"Опыт работы: {resume.experience}\n"
-            f"Дата создания: {resume.created_at.strftime('%d.%m.%Y %H:%M')}"
-        )
-        await callback.bot.send_message(
-            chat_id=vacancy.user_id,
-            text=resume_text,
-            reply_markup=get_application_response_keyboard(application.id)
+        await callback.answer()
+        return
+    
+    if not recommender.ready:
+        await callback.answer("Рекомендации еще готовятся, попробуйте через минуту.", show_alert=True)
+        return
+    
+    # Вакансии, на которые соискатель уже откликнулся, не предлагаем
+    applied = await session.execute(
+        select(Application.vacancy_id).where(Application.user_id == callback.from_user.id)
+    )
+    fields = [field for resume in resumes for field in resume_fields(*resume)]
+    vacancy_ids = recommender.recommend(fields, exclude=applied.scalars().all())
+    
+    # Индекс может отставать от базы (вакансию удалил другой процесс или она истекла) - проверяем по базе
+    result = await session.execute(
+        select(Vacancy.id, Vacancy.title)
+        .where(Vacancy.id.in_(vacancy_ids), Vacancy.deleted_at.is_(None), vacancy_active(datetime.utcnow()))
+    )
+    rows = {row.id: row for row in result.all()}
+    vacancies = [rows[vacancy_id] for vacancy_id in vacancy_ids if vacancy_id in rows]
+    
+    if not vacancies:
+        await edit_card_message(
+            callback.message,
+            "Подходящих вакансий пока нет. Попробуйте поиск по названию.",
+            reply_markup=get_job_seeker_menu()
         )
-        
-        # Отправляем файл резюме, если он есть
-        if resume.file_id:
-            try:
-                if resume.file_path and resume.file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    await callback.bot.send_photo(
-                        chat_id=vacancy.user_id,
-                        photo=resume.file_id,
-                        caption=f"Файл резюме: {resume.title}"
-                    )
-                else:
-                    await callback.bot.send_document(
-                        chat_id=vacancy.user_id,
-                        document=resume.file_id,
-                        caption=f"Файл резюме: {resume.title}"
-                    )
-            except Exception as e:
-                print(f"Error sending resume file: {e}")
-                await callback.bot.send_message(
-                    chat_id=vacancy.user_id,
-                    text="Не удалось отправить прикрепленный файл резюме."
-                )
-        
-        await callback.message.edit_text(
-            "✅ Отклик успешно отправлен!",
+        await callback.answer()
+        return
+    
+    await edit_card_message(
+        callback.message,
+        "⭐ Вакансии, подходящие под ваши резюме:",
+        reply_markup=get_recommendations_keyboard(vacancies)
+    )
+    await callback.answer()
+
+@callbacks.register(RecommendedVacancy)
+async def view_recommended_vacancy(callback: CallbackQuery, callback_data: RecommendedVacancy, session: AsyncSession):
+    vacancy_id = callback_data.vacancy_id
+    
+    card = await get_vacancy_card(session, vacancy_id)
+    
+    if not card:
+        await edit_card_message(callback.message, "Вакансия не найдена.", reply_markup=get_job_seeker_menu())
+        await callback.answer()
+        return
+    
+    await show_card(callback.message, card, reply_markup=get_recommended_vacancy_keyboard(card.id))
+    await callback.answer()
+
+@callbacks.register(ApplyVacancy)
+async def show_resume_selection(callback: CallbackQuery, callback_data: ApplyVacancy, state: FSMContext, session: AsyncSession):
+    vacancy_id = callback_data.vacancy_id
+    logger.debug("Applying for vacancy: %s", vacancy_id)
+    
+    # Получаем резюме пользователя
+    result = await session.execute(
+        select(Resume.id, Resume.title)
+        .where(Resume.user_id == callback.from_user.id, Resume.deleted_at.is_(None))
+        .order_by(Resume.created_at)
+    )
+    resumes = result.all()
+    
+    logger.debug("Found %s resumes for user %s", len(resumes), callback.from_user.id)
+    
+    if not resumes:
+        await edit_card_message(
+            callback.message,
+            "У вас нет резюме для отклика. Создайте резюме и попробуйте снова.",
+            reply_markup=get_job_seeker_menu()
+        )
+        return
+    
+    await edit_card_message(
+        callback.message,
+        "Выберите резюме для отклика:",
+        reply_markup=get_resume_selection_keyboard(resumes, vacancy_id)
+    )
+    
+    await callback.answer()
+
+@callbacks.register(SelectResume)
+async def submit_application(callback: CallbackQuery, callback_data: SelectResume, state: FSMContext, session: AsyncSession):
+    resume_id = callback_data.resume_id
+    vacancy_id = callback_data.vacancy_id
+    
+    logger.debug("Submitting application: resume %s for vacancy %s", resume_id, vacancy_id)
+    
+    # Получаем карточки вакансии и резюме (из кэша, если они там есть)
+    vacancy = await get_vacancy_card(session, vacancy_id)
+    resume = await get_resume_card(session, resume_id)
+    
+    if not vacancy or not resume:
+        await edit_card_message(
+            callback.message,
+            "Вакансия или резюме не найдены.",
+            reply_markup=get_job_seeker_menu()
+        )
+        return
+    
+    # Карточки могли устареть: вакансию закрыли, резюме удалили или оно чужое -
+    # create_application перепроверяет это по базе тем же запросом, что и вставляет отклик
+    application_id = await create_application(session, callback.from_user.id, vacancy_id, resume_id)
+    if application_id is None:
+        await edit_card_message(
+            callback.message,
+            "Вакансия уже закрыта или резюме недоступно.",
             reply_markup=get_job_seeker_menu()
         )
+        await callback.answer()
+        return
+    
+    logger.debug("Created application: %s", application_id)
+    
+    # Уведомляем работодателя через очередь, не дожидаясь отправки:
+    # уведомление, резюме и его файл уходят одним сообщением
+    for method in card_methods(
+        resume,
+        vacancy.owner_id,
+        text=f"На вашу вакансию '{vacancy.title}' пришел отклик!\n\nРезюме соискателя:\n{resume.text}",
+        reply_markup=get_application_response_keyboard(application_id)
+    ):
+        delivery_queue.send(callback.bot, method)
+    
+    await edit_card_message(
+        callback.message,
+        "✅ Отклик успешно отправлен!",
+        reply_markup=get_job_seeker_menu()
+    )
     
     await callback.answer()
 
-@router.callback_query(F.data.startswith("reject_"))
-async def reject_application(callback: CallbackQuery, state: FSMContext):
-    application_id = int(callback.data.split("_")[1])
+async def show_inbox(callback: CallbackQuery, state: FSMContext, session: AsyncSession, **changes):
+    """Показывает страницу откликов; параметры списка хранятся в данных FSM"""
+    data = await state.get_data()
+    inbox = {"vacancy_id": None, "status": None, "after": None, "before": None, **data.get("inbox", {}), **changes}
     
-    async for session in get_session():
-        # Получаем информацию об отклике
-        result = await session.execute(
-            select(Application, Vacancy)
-            .join(Vacancy)
-            .where(Application.id == application_id)
+    page = await fetch_inbox_page(
+        session,
+        callback.from_user.id,
+        vacancy_id=inbox["vacancy_id"],
+        status=inbox["status"],
+        after=tuple(inbox["after"]) if inbox["after"] else None,
+        before=tuple(inbox["before"]) if inbox["before"] else None
+    )
+    inbox.update(first=page.first, last=page.last)
+    await state.update_data(inbox=inbox)
+    
+    vacancy_title = None
+    if inbox["vacancy_id"] is not None:
+        card = await get_vacancy_card(session, inbox["vacancy_id"])
+        vacancy_title = card.title if card else None
+    
+    items = tuple(
+        (item.application_id, f"{STATUS_ICONS.get(item.status, '')} {item.resume_title}".strip())
+        for item in page.items
+    )
+    await edit_card_message(
+        callback.message,
+        render_inbox(page, inbox["status"], vacancy_title),
+        reply_markup=get_inbox_keyboard(items, inbox["status"] or "all", page.has_prev, page.has_next)
+    )
+    await callback.answer()
+
+@callbacks.register("responses")
+async def show_responses(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+    # Отклики на все вакансии работодателя
+    await show_inbox(callback, state, session, vacancy_id=None, status=None, after=None, before=None)
+
+@callbacks.register(VacancyResponses)
+async def show_vacancy_responses(callback: CallbackQuery, callback_data: VacancyResponses, state: FSMContext, session: AsyncSession):
+    vacancy_id = callback_data.vacancy_id
+    
+    card = await get_vacancy_card(session, vacancy_id)
+    if not card or card.owner_id != callback.from_user.id:
+        await edit_card_message(callback.message, "Вакансия не найдена.", reply_markup=get_employer_menu())
+        await callback.answer()
+        return
+    
+    await show_inbox(callback, state, session, vacancy_id=vacancy_id, status=None, after=None, before=None)
+
+@callbacks.register(InboxStatus)
+async def filter_inbox(callback: CallbackQuery, callback_data: InboxStatus, state: FSMContext, session: AsyncSession):
+    status = callback_data.status
+    await show_inbox(
+        callback, state, session,
+        status=None if status == "all" else status,
+        after=None,
+        before=None
+    )
+
+@callbacks.register("inbox_prev", "inbox_next", "inbox_back")
+async def navigate_inbox(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+    inbox = (await state.get_data()).get("inbox")
+    
+    if not inbox:
+        await edit_card_message(callback.message, "Список откликов устарел.", reply_markup=get_employer_menu())
+        await callback.answer()
+        return
+    
+    if callback.data == "inbox_prev":
+        await show_inbox(callback, state, session, before=inbox["first"], after=None)
+    elif callback.data == "inbox_next":
+        await show_inbox(callback, state, session, after=inbox["last"], before=None)
+    else:
+        # Возврат к той же странице
+        await show_inbox(callback, state, session)
+
+@callbacks.register(InboxApplication)
+async def view_inbox_application(callback: CallbackQuery, callback_data: InboxApplication, session: AsyncSession):
+    application_id = callback_data.application_id
+    
+    # Отклик вместе с названием вакансии; заодно проверяем, что вакансия принадлежит работодателю
+    result = await session.execute(
+        select(Application.status, Application.resume_id, Vacancy.title)
+        .join(Vacancy, Vacancy.id == Application.vacancy_id)
+        .where(
+            Application.id == application_id,
+            Vacancy.user_id == callback.from_user.id,
+            Vacancy.deleted_at.is_(None)
         )
-        application_data = result.first()
-        
-        if not application_data:
-            await callback.message.edit_text(
-                "Отклик не найден.",
-                reply_markup=get_employer_menu()
-            )
-            return
-        
-        application, vacancy = application_data
-        
-        # Обновляем статус отклика
-        application.status = "rejected"
-        await session.commit()
-        
-        # Уведомляем соискателя
-        await callback.bot.send_message(
-            chat_id=application.user_id,
-            text=f"К сожалению, вам отказано в вакансии '{vacancy.title}'."
+    )
+    row = result.first()
+    resume = await get_resume_card(session, row.resume_id) if row else None
+    
+    if not resume:
+        await edit_card_message(callback.message, "Отклик не найден.", reply_markup=get_employer_menu())
+        await callback.answer()
+        return
+    
+    await show_card(
+        callback.message,
+        resume,
+        text=f"Отклик на вакансию '{row.title}' {STATUS_ICONS.get(row.status, '')}\n\n{resume.text}",
+        reply_markup=get_inbox_application_keyboard(application_id, row.status == "new")
+    )
+    await callback.answer()
+
+def _contact(username: Optional[str]) -> str:
+    return f"@{username}" if username else "у пользователя не указан username"
+
+@callbacks.register(RejectApplication)
+async def reject_application(callback: CallbackQuery, callback_data: RejectApplication, state: FSMContext, session: AsyncSession):
+    application_id = callback_data.application_id
+    
+    # Получаем информацию об отклике; менять статус может только владелец вакансии
+    result = await session.execute(
+        select(Application, Vacancy)
+        .join(Vacancy)
+        .where(
+            Application.id == application_id,
+            Vacancy.user_id == callback.from_user.id,
+            Vacancy.deleted_at.is_(None)
         )
-        
-        # Уведомляем работодателя
-        await callback.message.edit_text(
-            f"Вы отказали соискателю в вакансии '{vacancy.title}'."
+    )
+    application_data = result.first()
+    
+    if not application_data:
+        await edit_card_message(
+            callback.message,
+            "Отклик не найден.",
+            reply_markup=get_employer_menu()
         )
+        return
+    
+    application, vacancy = application_data
+    
+    # Обновляем статус отклика
+    application.status = "rejected"
+    await session.commit()
+    invalidate_status_counts(application.user_id)
+    
+    # Уведомляем соискателя
+    delivery_queue.send_message(
+        callback.bot,
+        chat_id=application.user_id,
+        text=f"К сожалению, вам отказано в вакансии '{vacancy.title}'."
+    )
+    
+    # Уведомляем работодателя
+    await edit_card_message(
+        callback.message,
+        f"Вы отказали соискателю в вакансии '{vacancy.title}'."
+    )
     
     await callback.answer()
 
-@router.callback_query(F.data.startswith("invite_"))
-async def invite_application(callback: CallbackQuery, state: FSMContext):
-    application_id = int(callback.data.split("_")[1])
+@callbacks.register(InviteApplication)
+async def invite_application(callback: CallbackQuery, callback_data: InviteApplication, state: FSMContext, session: AsyncSession):
+    application_id = callback_data.application_id
     
-    async for session in get_session():
-        # Получаем информацию об отклике
-        result = await session.execute(
-            select(Application, Vacancy)
-            .join(Vacancy)
-            .where(Application.id == application_id)
+    # Получаем информацию об отклике и username соискателя (в user_id хранится telegram_id);
+    # менять статус может только владелец вакансии
+    result = await session.execute(
+        select(Application, Vacancy, User.username)
+        .join(Vacancy, Vacancy.id == Application.vacancy_id)
+        .outerjoin(User, User.telegram_id == Application.user_id)
+        .where(
+            Application.id == application_id,
+            Vacancy.user_id == callback.from_user.id,
+            Vacancy.deleted_at.is_(None)
         )
-        application_data = result.first()
-        
-        if not application_data:
-            await callback.message.edit_text(
-                "Отклик не найден.",
-                reply_markup=get_employer_menu()
-            )
-            return
-        
-        application, vacancy = application_data
-        
-        # Обновляем статус отклика
-        application.status = "invited"
-        await session.commit()
-        
-        # Получаем информацию о работодателе
-        employer = await callback.bot.get_chat(vacancy.user_id)
-        
-        # Уведомляем соискателя
-        await callback.bot.send_message(
-            chat_id=application.user_id,
-            text=(
-                f"Поздравляем! Вас пригласили на вакансию '{vacancy.title}'.\n"
-                f"Свяжитесь с работодателем: @{employer.username}"
-            )
+    )
+    application_data = result.first()
+    
+    if not application_data:
+        await edit_card_message(
+            callback.message,
+            "Отклик не найден.",
+            reply_markup=get_employer_menu()
         )
-        
-        # Уведомляем работодателя
-        applicant = await callback.bot.get_chat(application.user_id)
-        await callback.message.edit_text(
-            f"Вы пригласили соискателя на вакансию '{vacancy.title}'.\n"
-            f"Свяжитесь с соискателем: @{applicant.username}"
+        return
+    
+    application, vacancy, applicant_username = application_data
+    
+    # Обновляем статус отклика
+    application.status = "invited"
+    await session.commit()
+    invalidate_status_counts(application.user_id)
+    
+    # Уведомляем соискателя; работодатель - это тот, кто нажал кнопку
+    delivery_queue.send_message(
+        callback.bot,
+        chat_id=application.user_id,
+        text=(
+            f"Поздравляем! Вас пригласили на вакансию '{vacancy.title}'.\n"
+            f"Свяжитесь с работодателем: {_contact(callback.from_user.username)}"
         )
+    )
+    
+    # Уведомляем работодателя
+    await edit_card_message(
+        callback.message,
+        f"Вы пригласили соискателя на вакансию '{vacancy.title}'.\n"
+        f"Свяжитесь с соискателем: {_contact(applicant_username)}"
+    )
     
     await callback.answer()
 
-@router.callback_query(F.data.startswith("back_to_vacancy_"))
-async def back_to_vacancy(callback: CallbackQuery, state: FSMContext):
-    vacancy_id = int(callback.data.split("_")[-1])
+@callbacks.register("my_applications", "my_applications_prev", "my_applications_next")
+async def show_my_applications(callback: CallbackQuery, state: FSMContext, session: AsyncSession):
+    after = before = None
+    if callback.data != "my_applications":
+        # Курсор текущей страницы хранится в данных FSM
+        data = await state.get_data()
+        page_first, page_last = data.get("applications_first"), data.get("applications_last")
+        if callback.data == "my_applications_prev" and page_first:
+            before = tuple(page_first)
+        elif callback.data == "my_applications_next" and page_last:
+            after = tuple(page_last)
+    
+    # Итоги по статусам берутся из кэша, список - одним запросом
+    counts = await get_status_counts(session, callback.from_user.id)
+    page = await fetch_applications_page(session, callback.from_user.id, after=after, before=before)
+    if not page.items and (after or before):
+        # Кнопка из устаревшего сообщения - показываем первую страницу
+        page = await fetch_applications_page(session, callback.from_user.id)
+    await state.update_data(applications_first=page.first, applications_last=page.last)
     
-    async for session in get_session():
-        result = await session.execute(
-            select(Vacancy).where(Vacancy.id == vacancy_id)
+    await edit_card_message(
+        callback.message,
+        render_applications(page, counts),
+        reply_markup=get_my_applications_keyboard(page.has_prev, page.has_next)
+    )
+    await callback.answer()
+
+@callbacks.register(BackToVacancy)
+async def back_to_vacancy(callback: CallbackQuery, callback_data: BackToVacancy, state: FSMContext, session: AsyncSession):
+    vacancy_id = callback_data.vacancy_id
+    
+    card = await get_vacancy_card(session, vacancy_id)
+    
+    if card:
+        await show_card(
+            callback.message,
+            card,
+            reply_markup=get_vacancy_navigation_keyboard(card.id, False, False)
         )
-        vacancy = result.scalar_one_or_none()
-        
-        if vacancy:
-            await callback.message.edit_text(
-                f"Должность: {vacancy.title}\n"
-                f"Компания: {vacancy.company}\n"
-                f"Зарплата: {vacancy.salary}\n"
-                f"Описание: {vacancy.description}\n"
-                f"Дата создания: {vacancy.created_at.strftime('%d.%m.%Y %H:%M')}",
-                reply_markup=get_vacancy_navigation_keyboard(vacancy.id, 1, 0)
-            )
-            
-            # Отправляем файл, если он есть
-            if vacancy.file_id:
-                try:
-                    if vacancy.file_path and vacancy.file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-                        await callback.bot.send_photo(
-                            chat_id=callback.message.chat.id,
-                            photo=vacancy.file_id,
-                            caption=f"Файл вакансии: {vacancy.title}"
-                        )
-                    else:
-                        await callback.bot.send_document(
-                            chat_id=callback.message.chat.id,
-                            document=vacancy.file_id,
-                            caption=f"Файл вакансии: {vacancy.title}"
-                        )
-                except Exception as e:
-                    print(f"Error sending file: {e}")
-                    await callback.message.answer(
-                        "Не удалось отправить прикрепленный файл."
-                    )
-    
-    await callback.answer()
-
-@router.callback_query(F.data == "return_to_main_menu")
+    
+    await callback.answer()
+
+@callbacks.register("return_to_main_menu", "back_to_menu")
 async def return_to_main_menu(callback: CallbackQuery):
-    await callback.message.edit_text(
+    # Меню может открываться из карточки вакансии с файлом
+    await edit_card_message(
+        callback.message,
         "Выберите действие:",
         reply_markup=get_job_seeker_menu()
     )
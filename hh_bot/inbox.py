@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config
+from models import Application, Resume, User, Vacancy
+from pagination import fetch_keyset_rows
+
+# Отклики на вакансии работодателя. Страница загружается одним запросом:
+# отклик, резюме, вакансия и username соискателя выбираются через JOIN,
+# без догрузки связанных объектов по одному. Пагинация по курсору
+# (created_at, id), новые отклики сверху.
+
+STATUS_TITLES = {
+    "new": "Новые",
+    "invited": "Приглашенные",
+    "rejected": "Отклоненные"
+}
+STATUS_ICONS = {
+    "new": "🆕",
+    "invited": "✅",
+    "rejected": "❌"
+}
+
+# Курсор страницы: (created_at в ISO-формате, id) граничного отклика.
+# Хранится в данных FSM, поэтому дата - строка.
+Cursor = Tuple[str, int]
+
+@dataclass(frozen=True)
+class InboxItem:
+    application_id: int
+    status: str
+    created_at: datetime
+    vacancy_id: int
+    vacancy_title: str
+    resume_id: int
+    resume_title: str
+    resume_experience: Optional[str]
+    applicant_id: int
+    applicant_username: Optional[str]
+
+@dataclass
+class InboxPage:
+    items: List[InboxItem]
+    first: Optional[Cursor]
+    last: Optional[Cursor]
+    has_prev: bool
+    has_next: bool
+
+def _cursor(item: InboxItem) -> Cursor:
+    return item.created_at.isoformat(), item.application_id
+
+def cursor_key(cursor: Optional[Cursor]) -> Optional[Tuple[datetime, int]]:
+    """Значения ключа сортировки (created_at, id) из курсора"""
+    if cursor is None:
+        return None
+    return datetime.fromisoformat(cursor[0]), cursor[1]
+
+async def fetch_inbox_page(
+    session: AsyncSession,
+    employer_id: int,
+    vacancy_id: Optional[int] = None,
+    status: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    before: Optional[Cursor] = None,
+    limit: int = config.INBOX_PAGE_SIZE
+) -> InboxPage:
+    """Страница откликов на вакансии работодателя (или на одну вакансию)"""
+    stmt = (
+        select(
+            Application.id, Application.status, Application.created_at,
+            Vacancy.id, Vacancy.title,
+            Resume.id, Resume.title, Resume.experience,
+            Application.user_id, User.username
+        )
+        .join(Vacancy, Vacancy.id == Application.vacancy_id)
+        .join(Resume, Resume.id == Application.resume_id)
+        # В user_id хранится telegram_id соискателя
+        .outerjoin(User, User.telegram_id == Application.user_id)
+        # Отклики на удаленные вакансии и резюме ждут фоновой очистки
+        .where(
+            Vacancy.user_id == employer_id,
+            Vacancy.deleted_at.is_(None),
+            Resume.deleted_at.is_(None)
+        )
+    )
+    if vacancy_id is not None:
+        stmt = stmt.where(Application.vacancy_id == vacancy_id)
+    if status is not None:
+        stmt = stmt.where(Application.status == status)
+
+    rows, has_prev, has_next = await fetch_keyset_rows(
+        session, stmt, (Application.created_at, Application.id),
+        after=cursor_key(after), before=cursor_key(before), limit=limit, descending=True
+    )
+    items = [InboxItem(*row) for row in rows]
+    if not items:
+        return InboxPage([], None, None, has_prev, has_next)
+    return InboxPage(items, _cursor(items[0]), _cursor(items[-1]), has_prev, has_next)
+
+def render_inbox(page: InboxPage, status: Optional[str], vacancy_title: Optional[str] = None) -> str:
+    """Текст страницы откликов"""
+    if vacancy_title:
+        header = f"📬 Отклики на вакансию '{vacancy_title}'"
+    else:
+        header = "📬 Отклики на ваши вакансии"
+    lines = [header, f"Показаны: {STATUS_TITLES.get(status, 'все').lower()}", ""]
+
+    if not page.items:
+        lines.append("Откликов пока нет.")
+        return "\n".join(lines)
+
+    for item in page.items:
+        applicant = f"@{item.applicant_username}" if item.applicant_username else "соискатель"
+        icon = STATUS_ICONS.get(item.status, "•")
+        line = f"{icon} {item.created_at:%d.%m %H:%M} {item.resume_title} ({applicant})"
+        if not vacancy_title:
+            line += f" → {item.vacancy_title}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -1,80 +1,168 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from typing import List
+from functools import lru_cache
+from typing import Iterable, List, Tuple
 from models import Vacancy, Resume
+from callbacks import (
+    ViewVacancy,
+    DeleteVacancy,
+    ConfirmDeleteVacancy,
+    RenewVacancy,
+    ViewResume,
+    DeleteResume,
+    ConfirmDeleteResume,
+    ApplyVacancy,
+    SelectResume,
+    BackToVacancy,
+    RecommendedVacancy,
+    Unsubscribe,
+    VacancyResponses,
+    InboxStatus,
+    InboxApplication,
+    InviteApplication,
+    RejectApplication,
+    ExportData
+)
+
+# Статические клавиатуры создаются один раз при импорте, динамические
+# кэшируются по входным данным. Возвращаемые объекты общие для всех
+# вызовов, поэтому изменять их нельзя.
+
+# Элементы списков: кортежи (id, title)
+ListItems = Tuple[Tuple[int, str], ...]
+
+def _list_items(objects: Iterable) -> ListItems:
+    return tuple((obj.id, obj.title) for obj in objects)
+
+MAIN_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="👨‍💼 Я соискатель", callback_data="job_seeker")],
+    [InlineKeyboardButton(text="👨‍💻 Я работодатель", callback_data="employer")]
+])
+
+# Клавиатура меню соискателя
+JOB_SEEKER_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="Создать резюме", callback_data="create_resume")],
+    [InlineKeyboardButton(text="Мои резюме", callback_data="my_resumes")],
+    [InlineKeyboardButton(text="Поиск вакансий", callback_data="search_vacancies")],
+    [InlineKeyboardButton(text="Рекомендованные вакансии", callback_data="recommended_vacancies")],
+    [InlineKeyboardButton(text="Мои подписки", callback_data="saved_searches")],
+    [InlineKeyboardButton(text="Мои отклики", callback_data="my_applications")]
+])
+
+EMPLOYER_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="📝 Разместить вакансию", callback_data="post_vacancy")],
+    [InlineKeyboardButton(text="📥 Импорт вакансий из файла", callback_data="import_vacancies")],
+    [InlineKeyboardButton(text="📤 Выгрузка в CSV/Excel", callback_data="export")],
+    [InlineKeyboardButton(text="📋 Мои вакансии", callback_data="my_vacancies")],
+    [InlineKeyboardButton(text="📬 Отклики", callback_data="responses")],
+    [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="main_menu")]
+])
+
+SKIP_FILE_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="Оставить без файла", callback_data="skip_file")]
+])
+
+CONFIRM_SKIP_FILE_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="Да", callback_data="confirm_skip_file"),
+        InlineKeyboardButton(text="Нет", callback_data="cancel_skip_file")
+    ]
+])
+
+EXPORT_FORMAT_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="CSV", callback_data=ExportData(fmt="csv").pack()),
+        InlineKeyboardButton(text="Excel (XLSX)", callback_data=ExportData(fmt="xlsx").pack())
+    ],
+    [InlineKeyboardButton(text="⬅️ Назад", callback_data="employer")]
+])
+
+CANCEL_IMPORT_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="⬅️ Отмена", callback_data="cancel_import")]
+])
+
+SKIP_RESUME_FILE_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="Оставить без файла", callback_data="skip_resume_file")]
+])
+
+CONFIRM_SKIP_RESUME_FILE_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="Да", callback_data="confirm_skip_resume_file"),
+        InlineKeyboardButton(text="Нет", callback_data="cancel_skip_resume_file")
+    ]
+])
 
 def get_main_menu() -> InlineKeyboardMarkup:
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="👨‍💼 Я соискатель", callback_data="job_seeker")],
-        [InlineKeyboardButton(text="👨‍💻 Я работодатель", callback_data="employer")]
-    ])
-    return keyboard
+    return MAIN_MENU
 
 def get_job_seeker_menu() -> InlineKeyboardMarkup:
     """Клавиатура меню соискателя"""
-    keyboard = [
-        [InlineKeyboardButton(text="Создать резюме", callback_data="create_resume")],
-        [InlineKeyboardButton(text="Мои резюме", callback_data="my_resumes")],
-        [InlineKeyboardButton(text="Поиск вакансий", callback_data="search_vacancies")],
-        [InlineKeyboardButton(text="Мои отклики", callback_data="my_applications")]
-    ]
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+    return JOB_SEEKER_MENU
 
 def get_employer_menu() -> InlineKeyboardMarkup:
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="📝 Разместить вакансию", callback_data="post_vacancy")],
-        [InlineKeyboardButton(text="📋 Мои вакансии", callback_data="my_vacancies")],
-        [InlineKeyboardButton(text="📬 Отклики", callback_data="responses")],
-        [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="main_menu")]
-    ])
-    return keyboard
+    return EMPLOYER_MENU
 
 def get_vacancies_list_keyboard(vacancies: List[Vacancy]) -> InlineKeyboardMarkup:
+    return _build_vacancies_list_keyboard(_list_items(vacancies))
+
+@lru_cache(maxsize=1024)
+def _build_vacancies_list_keyboard(items: ListItems) -> InlineKeyboardMarkup:
     keyboard = []
-    for vacancy in vacancies:
+    for vacancy_id, title in items:
         keyboard.append([InlineKeyboardButton(
-            text=vacancy.title,
-            callback_data=f"view_vacancy_{vacancy.id}"
+            text=title,
+            callback_data=ViewVacancy(vacancy_id=vacancy_id).pack()
         )])
     keyboard.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="employer")])
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1024)
 def get_back_to_vacancies_list_keyboard(vacancy_id: int) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="📬 Отклики", callback_data=VacancyResponses(vacancy_id=vacancy_id).pack())],
+        [InlineKeyboardButton(text="🔄 Продлить", callback_data=RenewVacancy(vacancy_id=vacancy_id).pack())],
         [InlineKeyboardButton(text="⬅️ Вернуться к списку вакансий", callback_data="my_vacancies")],
-        [InlineKeyboardButton(text="🗑 Удалить вакансию", callback_data=f"delete_vacancy_{vacancy_id}")]
+        [InlineKeyboardButton(text="🗑 Удалить вакансию", callback_data=DeleteVacancy(vacancy_id=vacancy_id).pack())]
     ])
     return keyboard
 
 def get_skip_file_keyboard() -> InlineKeyboardMarkup:
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [InlineKeyboardButton(text="Оставить без файла", callback_data="skip_file")]
-    ])
-    return keyboard
+    return SKIP_FILE_KEYBOARD
 
 def get_confirm_skip_file_keyboard() -> InlineKeyboardMarkup:
-    keyboard = InlineKeyboardMarkup(inline_keyboard=[
-        [
-            InlineKeyboardButton(text="Да", callback_data="confirm_skip_file"),
-            InlineKeyboardButton(text="Нет", callback_data="cancel_skip_file")
-        ]
-    ])
-    return keyboard
+    return CONFIRM_SKIP_FILE_KEYBOARD
 
+def get_export_format_keyboard() -> InlineKeyboardMarkup:
+    return EXPORT_FORMAT_KEYBOARD
+
+def get_cancel_import_keyboard() -> InlineKeyboardMarkup:
+    return CANCEL_IMPORT_KEYBOARD
+
+def get_skip_resume_file_keyboard() -> InlineKeyboardMarkup:
+    return SKIP_RESUME_FILE_KEYBOARD
+
+def get_confirm_skip_resume_file_keyboard() -> InlineKeyboardMarkup:
+    return CONFIRM_SKIP_RESUME_FILE_KEYBOARD
+
+@lru_cache(maxsize=1024)
 def get_confirm_delete_vacancy_keyboard(vacancy_id: int) -> InlineKeyboardMarkup:
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="Да", callback_data=f"confirm_delete_vacancy_{vacancy_id}"),
-            InlineKeyboardButton(text="Нет", callback_data=f"view_vacancy_{vacancy_id}")
+            InlineKeyboardButton(text="Да", callback_data=ConfirmDeleteVacancy(vacancy_id=vacancy_id).pack()),
+            InlineKeyboardButton(text="Нет", callback_data=ViewVacancy(vacancy_id=vacancy_id).pack())
         ]
     ])
     return keyboard
 
 def get_resumes_list_keyboard(resumes):
+    return _build_resumes_list_keyboard(_list_items(resumes))
+
+@lru_cache(maxsize=1024)
+def _build_resumes_list_keyboard(items: ListItems) -> InlineKeyboardMarkup:
     keyboard = []
-    for resume in resumes:
+    for resume_id, title in items:
         keyboard.append([InlineKeyboardButton(
-            text=f"{resume.title}",
-            callback_data=f"view_resume_{resume.id}"
+            text=f"{title}",
+            callback_data=ViewResume(resume_id=resume_id).pack()
         )])
     keyboard.append([InlineKeyboardButton(
         text="◀️ Назад в меню",
@@ -82,15 +170,17 @@ def get_resumes_list_keyboard(resumes):
     )])
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1024)
 def get_confirm_delete_resume_keyboard(resume_id):
     return InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="✅ Да", callback_data=f"confirm_delete_resume_{resume_id}"),
+            InlineKeyboardButton(text="✅ Да", callback_data=ConfirmDeleteResume(resume_id=resume_id).pack()),
             InlineKeyboardButton(text="❌ Нет", callback_data="my_resumes")
         ]
     ])
 
-def get_back_to_resumes_list_keyboard():
+@lru_cache(maxsize=1024)
+def get_back_to_resumes_list_keyboard(resume_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [
             InlineKeyboardButton(
@@ -99,26 +189,27 @@ def get_back_to_resumes_list_keyboard():
             ),
             InlineKeyboardButton(
                 text="🗑 Удалить резюме",
-                callback_data="delete_resume"
+                callback_data=DeleteResume(resume_id=resume_id).pack()
             )
         ]
     ])
 
-def get_vacancy_navigation_keyboard(vacancy_id: int, total_vacancies: int, current_index: int) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=4096)
+def get_vacancy_navigation_keyboard(vacancy_id: int, has_prev: bool, has_next: bool) -> InlineKeyboardMarkup:
     """Клавиатура для навигации по найденным вакансиям"""
     keyboard = []
     
     # Кнопки навигации
     nav_buttons = []
-    if current_index > 0:
+    if has_prev:
         nav_buttons.append(InlineKeyboardButton(
             text="⬅️",
-            callback_data=f"prev_vacancy_{current_index}"
+            callback_data="prev_vacancy"
         ))
-    if current_index < total_vacancies - 1:
+    if has_next:
         nav_buttons.append(InlineKeyboardButton(
             text="➡️",
-            callback_data=f"next_vacancy_{current_index}"
+            callback_data="next_vacancy"
         ))
     if nav_buttons:
         keyboard.append(nav_buttons)
@@ -127,7 +218,15 @@ def get_vacancy_navigation_keyboard(vacancy_id: int, total_vacancies: int, curre
     keyboard.append([
         InlineKeyboardButton(
             text="Откликнуться",
-            callback_data=f"apply_vacancy_{vacancy_id}"
+            callback_data=ApplyVacancy(vacancy_id=vacancy_id).pack()
+        )
+    ])
+    
+    # Подписка на новые вакансии по текущему запросу
+    keyboard.append([
+        InlineKeyboardButton(
+            text="🔔 Сообщать о новых вакансиях",
+            callback_data="save_search"
         )
     ])
     
@@ -143,14 +242,18 @@ def get_vacancy_navigation_keyboard(vacancy_id: int, total_vacancies: int, curre
 
 def get_resume_selection_keyboard(resumes: List[Resume], vacancy_id: int) -> InlineKeyboardMarkup:
     """Клавиатура для выбора резюме при отклике на вакансию"""
+    return _build_resume_selection_keyboard(_list_items(resumes), vacancy_id)
+
+@lru_cache(maxsize=4096)
+def _build_resume_selection_keyboard(items: ListItems, vacancy_id: int) -> InlineKeyboardMarkup:
     keyboard = []
     
     # Кнопки с резюме
-    for resume in resumes:
+    for resume_id, title in items:
         keyboard.append([
             InlineKeyboardButton(
-                text=resume.title,
-                callback_data=f"select_resume_{resume.id}_{vacancy_id}"
+                text=title,
+                callback_data=SelectResume(resume_id=resume_id, vacancy_id=vacancy_id).pack()
             )
         ])
     
@@ -158,34 +261,137 @@ def get_resume_selection_keyboard(resumes: List[Resume], vacancy_id: int) -> Inl
     keyboard.append([
         InlineKeyboardButton(
             text="Вернуться к вакансии",
-            callback_data=f"back_to_vacancy_{vacancy_id}"
+            callback_data=BackToVacancy(vacancy_id=vacancy_id).pack()
         )
     ])
     
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+@lru_cache(maxsize=1024)
 def get_application_response_keyboard(application_id: int) -> InlineKeyboardMarkup:
     """Клавиатура для ответа на отклик"""
     keyboard = [
         [
             InlineKeyboardButton(
                 text="Пригласить",
-                callback_data=f"invite_{application_id}"
+                callback_data=InviteApplication(application_id=application_id).pack()
             ),
             InlineKeyboardButton(
                 text="Отказать",
-                callback_data=f"reject_{application_id}"
+                callback_data=RejectApplication(application_id=application_id).pack()
             )
         ]
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
+# Фильтры списка откликов: (статус в callback_data, подпись)
+INBOX_FILTERS = (("all", "Все"), ("new", "🆕"), ("invited", "✅"), ("rejected", "❌"))
+
+@lru_cache(maxsize=4096)
+def get_inbox_keyboard(items: ListItems, status: str, has_prev: bool, has_next: bool) -> InlineKeyboardMarkup:
+    """Клавиатура страницы откликов; items - кортежи (id отклика, подпись)"""
+    keyboard = []
+    
+    # Кнопка на каждый отклик
+    for application_id, label in items:
+        keyboard.append([InlineKeyboardButton(text=label, callback_data=InboxApplication(application_id=application_id).pack())])
+    
+    nav_buttons = []
+    if has_prev:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data="inbox_prev"))
+    if has_next:
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data="inbox_next"))
+    if nav_buttons:
+        keyboard.append(nav_buttons)
+    
+    # Фильтр по статусу, выбранный отмечен точкой
+    keyboard.append([
+        InlineKeyboardButton(
+            text=f"• {title}" if value == status else title,
+            callback_data=InboxStatus(status=value).pack()
+        )
+        for value, title in INBOX_FILTERS
+    ])
+    keyboard.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="employer")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+@lru_cache(maxsize=1024)
+def get_inbox_application_keyboard(application_id: int, can_respond: bool) -> InlineKeyboardMarkup:
+    """Клавиатура отклика, открытого из списка откликов"""
+    keyboard = []
+    if can_respond:
+        keyboard.append([
+            InlineKeyboardButton(text="Пригласить", callback_data=InviteApplication(application_id=application_id).pack()),
+            InlineKeyboardButton(text="Отказать", callback_data=RejectApplication(application_id=application_id).pack())
+        ])
+    keyboard.append([InlineKeyboardButton(text="⬅️ К списку откликов", callback_data="inbox_back")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_recommendations_keyboard(vacancies) -> InlineKeyboardMarkup:
+    """Список рекомендованных вакансий"""
+    return _build_recommendations_keyboard(_list_items(vacancies))
+
+@lru_cache(maxsize=4096)
+def _build_recommendations_keyboard(items: ListItems) -> InlineKeyboardMarkup:
+    keyboard = [
+        [InlineKeyboardButton(text=title, callback_data=RecommendedVacancy(vacancy_id=vacancy_id).pack())]
+        for vacancy_id, title in items
+    ]
+    keyboard.append([InlineKeyboardButton(text="◀️ Назад в меню", callback_data="return_to_main_menu")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+@lru_cache(maxsize=1024)
+def get_recommended_vacancy_keyboard(vacancy_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Откликнуться", callback_data=ApplyVacancy(vacancy_id=vacancy_id).pack())],
+        [InlineKeyboardButton(text="⬅️ К рекомендациям", callback_data="recommended_vacancies")]
+    ])
+
+NO_SEARCH_RESULTS_KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="🔔 Сообщать о новых вакансиях", callback_data="save_search")],
+    [InlineKeyboardButton(text="◀️ Назад в меню", callback_data="return_to_main_menu")]
+])
+
+def get_no_search_results_keyboard() -> InlineKeyboardMarkup:
+    return NO_SEARCH_RESULTS_KEYBOARD
+
+def get_saved_searches_keyboard(searches) -> InlineKeyboardMarkup:
+    """Подписки пользователя с кнопками отписки"""
+    return _build_saved_searches_keyboard(tuple((search.id, search.query) for search in searches))
+
+@lru_cache(maxsize=1024)
+def _build_saved_searches_keyboard(items: ListItems) -> InlineKeyboardMarkup:
+    keyboard = [
+        [InlineKeyboardButton(text=f"❌ {query}", callback_data=Unsubscribe(search_id=search_id).pack())]
+        for search_id, query in items
+    ]
+    keyboard.append([InlineKeyboardButton(text="◀️ Назад в меню", callback_data="return_to_main_menu")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+@lru_cache(maxsize=4)
+def get_my_applications_keyboard(has_prev: bool, has_next: bool) -> InlineKeyboardMarkup:
+    """Клавиатура экрана "Мои отклики" """
+    keyboard = []
+    nav_buttons = []
+    if has_prev:
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data="my_applications_prev"))
+    if has_next:
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data="my_applications_next"))
+    if nav_buttons:
+        keyboard.append(nav_buttons)
+    keyboard.append([InlineKeyboardButton(text="◀️ Назад в меню", callback_data="return_to_main_menu")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
 __all__ = [
     'get_main_menu',
     'get_employer_menu',
     'get_job_seeker_menu',
     'get_skip_file_keyboard',
     'get_confirm_skip_file_keyboard',
+    'get_export_format_keyboard',
+    'get_cancel_import_keyboard',
+    'get_skip_resume_file_keyboard',
+    'get_confirm_skip_resume_file_keyboard',
     'get_vacancies_list_keyboard',
     'get_back_to_vacancies_list_keyboard',
     'get_confirm_delete_vacancy_keyboard',
@@ -194,5 +400,12 @@ __all__ = [
     'get_confirm_delete_resume_keyboard',
     'get_vacancy_navigation_keyboard',
     'get_resume_selection_keyboard',
-    'get_application_response_keyboard'
+    'get_application_response_keyboard',
+    'get_inbox_keyboard',
+    'get_inbox_application_keyboard',
+    'get_my_applications_keyboard',
+    'get_recommendations_keyboard',
+    'get_recommended_vacancy_keyboard',
+    'get_no_search_results_keyboard',
+    'get_saved_searches_keyboard'
 ] 
\ No newline at end of file
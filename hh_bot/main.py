@@ -1,26 +1,105 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from config import config
 from handlers import router
-from database import init_db
+from database import init_db, async_session, engine
+from middlewares import DbSessionMiddleware
+from metrics import (
+    UpdateMetricsMiddleware,
+    HandlerMetricsMiddleware,
+    BotApiMetricsMiddleware,
+    watch_fsm_states,
+    watch_caches,
+    metrics_server
+)
+from fsm_storage import SQLStorage, create_storage
+from delivery import delivery_queue
+from downloads import download_queue
+from attachments import attachment_store
+from cleanup import cleanup_worker
+from archive import vacancy_archiver
+from recommendations import recommender
+from saved_searches import saved_searches
+from user_cache import user_service
+from cards import card_cache
+from applications import status_counts_cache
+from webhook import run_webhook
 
-async def main():
-    logging.basicConfig(level=logging.INFO)
-    
-    # Инициализация бота и диспетчера
+def create_bot() -> Bot:
     bot = Bot(token=config.BOT_TOKEN)
-    dp = Dispatcher(storage=MemoryStorage())
+    # Время и ошибки вызовов Bot API
+    bot.session.middleware(BotApiMetricsMiddleware())
+    return bot
+
+async def close_db():
+    # Закрываем соединения пула PostgreSQL; для файла SQLite (NullPool) закрывать нечего
+    await engine.dispose()
+
+def create_dispatcher() -> Dispatcher:
+    storage = create_storage()
+    dp = Dispatcher(storage=storage)
+    
+    # Метрики: SQL-запросы за все обновление (включая commit) и время обработчиков
+    dp.update.middleware(UpdateMetricsMiddleware())
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+    watch_fsm_states(storage)
+    watch_caches({"users": user_service.cache, "cards": card_cache, "status_counts": status_counts_cache})
+    
+    # Одна сессия базы данных на обновление
+    dp.update.middleware(DbSessionMiddleware(async_session))
     
     # Регистрация роутеров
     dp.include_router(router)
     
+    # Задачи над общей базой и файлами достаточно выполнять в одном процессе
+    if config.primary_worker:
+        # Периодическая сборка мусора в хранилище файлов
+        dp.startup.register(attachment_store.start)
+        # Удаленные вакансии и резюме вычищаются в фоне вместе с откликами
+        dp.startup.register(cleanup_worker.start)
+        # Истекшие вакансии переносятся в архивные таблицы
+        dp.startup.register(vacancy_archiver.start)
+        # Загрузки, прерванные остановкой бота
+        dp.startup.register(download_queue.start)
+        # Просроченные состояния FSM в общей базе
+        if isinstance(storage, SQLStorage):
+            dp.startup.register(storage.start)
+    dp.startup.register(metrics_server.start)
+    # Индекс рекомендаций строится в фоне, бот отвечает сразу.
+    # Индексы в памяти, поэтому они обновляются в каждом процессе
+    dp.startup.register(recommender.start)
+    dp.startup.register(saved_searches.start)
+    
+    # Перед остановкой отправляем уже поставленные в очередь уведомления
+    # и дожидаемся загрузки файлов
+    dp.shutdown.register(saved_searches.close)
+    dp.shutdown.register(delivery_queue.close)
+    dp.shutdown.register(download_queue.close)
+    dp.shutdown.register(vacancy_archiver.close)
+    dp.shutdown.register(cleanup_worker.close)
+    dp.shutdown.register(attachment_store.close)
+    dp.shutdown.register(recommender.close)
+    dp.shutdown.register(metrics_server.close)
+    dp.shutdown.register(close_db)
+    return dp
+
+async def main():
+    logging.basicConfig(level=logging.INFO)
+    
+    # Инициализация бота
+    bot = create_bot()
+    
     # Инициализация базы данных
     await init_db()
     
     # Запуск бота
-    await dp.start_polling(bot)
+    if config.RUN_MODE == "webhook":
+        await run_webhook(bot, create_bot, create_dispatcher)
+    else:
+        await bot.delete_webhook()
+        await create_dispatcher().start_polling(bot)
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
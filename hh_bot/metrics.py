@@ -0,0 +1,347 @@
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from aiohttp import web
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject
+from sqlalchemy import event
+from config import config
+from ttl_cache import TTLCache
+
+# Метрики бота в текстовом формате Prometheus:
+# - время обработчиков и число ошибок в них
+# - число и время SQL-запросов на одно обновление (события движка SQLAlchemy)
+# - время и ошибки вызовов Bot API по методам
+# - число пользователей в каждом состоянии FSM
+# - попадания, промахи и размер кэшей в памяти
+# Метрики отдаются по http://METRICS_HOST:METRICS_PORT/metrics
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+Labels = Tuple[str, ...]
+
+def _format_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return lines + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def replace(self, values: Dict[Labels, float]):
+        """Заменяет все значения сразу (для счетчиков, которые ведутся вне метрик)"""
+        self._values = dict(values)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, *labels: str, value: float):
+        self._values[labels] = value
+
+    def replace(self, values: Dict[Labels, float]):
+        """Заменяет все значения сразу (для метрик, которые пересчитываются целиком)"""
+        self._values = dict(values)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # метки -> [счетчики по корзинам (не накопительные), сумма, количество]
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, *labels: str, value: float):
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.label_names, labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            suffix = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        # Вызываются перед каждым чтением метрик, чтобы обновить gauge
+        self._collectors: List[Callable[[], Awaitable[None]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Awaitable[None]]):
+        self._collectors.append(collector)
+
+    async def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                await collector()
+            except Exception:
+                logger.exception("Ошибка при сборе метрик")
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+handler_duration = registry.register(Histogram(
+    "bot_handler_duration_seconds", "Время выполнения обработчика", ("handler",)
+))
+handler_errors = registry.register(Counter(
+    "bot_handler_errors_total", "Исключения в обработчиках", ("handler", "error")
+))
+update_db_queries = registry.register(Histogram(
+    "bot_update_db_queries", "Число SQL-запросов на одно обновление", ("handler",), buckets=QUERY_COUNT_BUCKETS
+))
+update_db_duration = registry.register(Histogram(
+    "bot_update_db_duration_seconds", "Суммарное время SQL-запросов на одно обновление", ("handler",)
+))
+db_queries = registry.register(Counter(
+    "bot_db_queries_total", "Все SQL-запросы, включая фоновые задачи", ()
+))
+api_duration = registry.register(Histogram(
+    "bot_api_request_duration_seconds", "Время вызова Bot API", ("method",)
+))
+api_errors = registry.register(Counter(
+    "bot_api_errors_total", "Ошибки вызовов Bot API", ("method", "error")
+))
+fsm_states = registry.register(Gauge(
+    "bot_fsm_states", "Число пользователей в состоянии FSM", ("state",)
+))
+cache_hits = registry.register(Counter(
+    "bot_cache_hits_total", "Попадания в кэш", ("cache",)
+))
+cache_misses = registry.register(Counter(
+    "bot_cache_misses_total", "Промахи кэша, включая истекшие записи", ("cache",)
+))
+cache_size = registry.register(Gauge(
+    "bot_cache_size", "Число записей в кэше", ("cache",)
+))
+
+@dataclass
+class UpdateStats:
+    handler: str = "unhandled"
+    queries: int = 0
+    db_seconds: float = 0.0
+    # После обработки обновления запросы порожденных им фоновых задач не учитываются
+    finished: bool = False
+
+_update_stats: ContextVar[Optional[UpdateStats]] = ContextVar("update_stats", default=None)
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Outer middleware обновления: считает SQL-запросы за все обновление,
+    включая commit в DbSessionMiddleware. Регистрируется раньше нее."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        stats = UpdateStats()
+        token = _update_stats.set(stats)
+        try:
+            return await handler(event, data)
+        finally:
+            stats.finished = True
+            _update_stats.reset(token)
+            update_db_queries.observe(stats.handler, value=stats.queries)
+            update_db_duration.observe(stats.handler, value=stats.db_seconds)
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware: время и ошибки конкретного обработчика"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        stats = _update_stats.get() or UpdateStats()
+        stats.handler = data["handler"].callback.__name__
+        started = time.perf_counter()
+        # Имя читается после вызова: диспетчер кнопок уточняет его через label_handler
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            handler_errors.inc(stats.handler, type(e).__name__)
+            raise
+        finally:
+            handler_duration.observe(stats.handler, value=time.perf_counter() - started)
+
+def label_handler(name: str):
+    """Имя обработчика текущего обновления, если его вызвал общий диспетчер"""
+    stats = _update_stats.get()
+    if stats is not None:
+        stats.handler = name
+
+class BotApiMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии Bot API: время и ошибки по методам"""
+
+    async def __call__(self, make_request, bot: Bot, method: TelegramMethod):
+        name = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as e:
+            api_errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            api_duration.observe(name, value=time.perf_counter() - started)
+
+def instrument_engine(engine):
+    """Подписывается на выполнение SQL-запросов движка"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        db_queries.inc()
+        stats = _update_stats.get()
+        if stats is not None and not stats.finished:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        # Запрос завершился ошибкой, after_cursor_execute не будет вызван
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            started.pop()
+
+def watch_fsm_states(storage: BaseStorage):
+    """Считает пользователей по состояниям FSM при каждом чтении метрик"""
+
+    async def collect():
+        if isinstance(storage, MemoryStorage):
+            counts: Dict[Labels, float] = {}
+            for record in storage.storage.values():
+                if record.state:
+                    counts[(record.state,)] = counts.get((record.state,), 0) + 1
+        elif hasattr(storage, "state_counts"):
+            counts = {(state,): count for state, count in (await storage.state_counts()).items()}
+        else:
+            # Для Redis подсчет потребовал бы обхода всех ключей
+            return
+        fsm_states.replace(counts)
+
+    registry.add_collector(collect)
+
+def watch_caches(caches: Dict[str, TTLCache]):
+    """Снимает счетчики кэшей при каждом чтении метрик"""
+
+    async def collect():
+        cache_hits.replace({(name,): cache.hits for name, cache in caches.items()})
+        cache_misses.replace({(name,): cache.misses for name, cache in caches.items()})
+        cache_size.replace({(name,): len(cache) for name, cache in caches.items()})
+
+    registry.add_collector(collect)
+
+class MetricsServer:
+    """HTTP-сервер с метриками, запускается вместе с диспетчером"""
+
+    def __init__(self, host: str = config.METRICS_HOST, port: int = config.METRICS_PORT):
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=await registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self):
+        if not self.port or self._runner:
+            return
+        # У каждого процесса webhook свои метрики и свой порт
+        port = self.port + config.WORKER_INDEX
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, port).start()
+        except OSError as e:
+            logger.warning("Сервер метрик не запущен на %s:%s: %s", self.host, port, e)
+            await runner.cleanup()
+            return
+        self._runner = runner
+        logger.info("Метрики доступны на http://%s:%s/metrics", self.host, port)
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+metrics_server = MetricsServer()
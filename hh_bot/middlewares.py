@@ -0,0 +1,31 @@
+from typing import Any, Awaitable, Callable, Dict
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy.orm import sessionmaker
+
+class DbSessionMiddleware(BaseMiddleware):
+    """Передает в обработчики одну сессию базы данных на обновление.
+
+    Транзакция начинается только при первом запросе, по завершении
+    обработчика фиксируется, при ошибке откатывается.
+    """
+
+    def __init__(self, session_maker: sessionmaker):
+        self.session_maker = session_maker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        async with self.session_maker() as session:
+            data["session"] = session
+            try:
+                result = await handler(event, data)
+            except Exception:
+                await session.rollback()
+                raise
+            if session.in_transaction():
+                await session.commit()
+            return result
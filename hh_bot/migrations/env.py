@@ -0,0 +1,48 @@
+import asyncio
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import create_async_engine
+from config import config as app_config
+from models import Base
+
+alembic_config = context.config
+target_metadata = Base.metadata
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True  # ALTER TABLE в SQLite через пересоздание таблицы
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_async_migrations():
+    connectable = create_async_engine(app_config.DATABASE_URL, poolclass=pool.NullPool)
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+        await connection.commit()
+    await connectable.dispose()
+
+def run_migrations_offline():
+    context.configure(
+        url=app_config.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+# При запуске из init_db соединение передается через attributes
+connection = alembic_config.attributes.get("connection")
+
+if connection is not None:
+    do_run_migrations(connection)
+elif context.is_offline_mode():
+    run_migrations_offline()
+else:
+    if alembic_config.config_file_name is not None:
+        fileConfig(alembic_config.config_file_name)
+    asyncio.run(run_async_migrations())
@@ -0,0 +1,110 @@
+"""fsm storage table and full-text search index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# Таблица и триггеры могли быть созданы до появления миграций,
+# поэтому везде используется IF NOT EXISTS
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5(
+        title, company, description,
+        content='vacancies', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vacancies_fts_ai AFTER INSERT ON vacancies BEGIN
+        INSERT INTO vacancies_fts(rowid, title, company, description)
+        VALUES (new.id, new.title, new.company, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vacancies_fts_ad AFTER DELETE ON vacancies BEGIN
+        INSERT INTO vacancies_fts(vacancies_fts, rowid, title, company, description)
+        VALUES ('delete', old.id, old.title, old.company, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS vacancies_fts_au AFTER UPDATE OF title, company, description ON vacancies BEGIN
+        INSERT INTO vacancies_fts(vacancies_fts, rowid, title, company, description)
+        VALUES ('delete', old.id, old.title, old.company, old.description);
+        INSERT INTO vacancies_fts(rowid, title, company, description)
+        VALUES (new.id, new.title, new.company, new.description);
+    END
+    """,
+    # Индексируем вакансии, созданные до появления FTS-таблицы
+    "INSERT INTO vacancies_fts(vacancies_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS vacancies_fts_au",
+    "DROP TRIGGER IF EXISTS vacancies_fts_ad",
+    "DROP TRIGGER IF EXISTS vacancies_fts_ai",
+    "DROP TABLE IF EXISTS vacancies_fts",
+]
+
+POSTGRES_UPGRADE = [
+    """
+    ALTER TABLE vacancies ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(company, '')), 'B') ||
+        setweight(to_tsvector('russian', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_vacancies_search_vector ON vacancies USING GIN (search_vector)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_vacancies_search_vector",
+    "ALTER TABLE vacancies DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _execute(statements) -> None:
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    if 'fsm_storage' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'fsm_storage',
+            sa.Column('key', sa.String(), nullable=False),
+            sa.Column('state', sa.String(), nullable=True),
+            sa.Column('data', sa.Text(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('key')
+        )
+        op.create_index('ix_fsm_storage_expires_at', 'fsm_storage', ['expires_at'])
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _execute(SQLITE_UPGRADE)
+    elif dialect == 'postgresql':
+        _execute(POSTGRES_UPGRADE)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _execute(SQLITE_DOWNGRADE)
+    elif dialect == 'postgresql':
+        _execute(POSTGRES_DOWNGRADE)
+
+    op.drop_index('ix_fsm_storage_expires_at', table_name='fsm_storage')
+    op.drop_table('fsm_storage')
@@ -0,0 +1,40 @@
+"""indexes for listing queries and foreign keys
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:20:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) - совпадают с __table_args__ в models.py
+INDEXES = [
+    # "Мои вакансии": WHERE user_id = ? ORDER BY created_at
+    ('ix_vacancies_user_id_created_at', 'vacancies', ['user_id', 'created_at']),
+    ('ix_vacancies_created_at', 'vacancies', ['created_at']),
+    # "Мои резюме"
+    ('ix_resumes_user_id_created_at', 'resumes', ['user_id', 'created_at']),
+    # Отклики на вакансию и отклики соискателя
+    ('ix_applications_vacancy_id_created_at', 'applications', ['vacancy_id', 'created_at']),
+    ('ix_applications_user_id_created_at', 'applications', ['user_id', 'created_at']),
+    ('ix_applications_resume_id', 'applications', ['resume_id']),
+    ('ix_search_history_user_id', 'search_history', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
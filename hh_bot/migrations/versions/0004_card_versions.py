@@ -0,0 +1,27 @@
+"""row versions for vacancy and resume cards
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('vacancies', 'resumes'):
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    for table in ('vacancies', 'resumes'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,34 @@
+"""store attachment media type
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('vacancies', 'resumes'):
+        op.add_column(table, sa.Column('file_type', sa.String(), nullable=True))
+        # Для уже загруженных файлов тип определяем по расширению, как раньше
+        op.execute(
+            f"UPDATE {table} SET file_type = CASE "
+            "WHEN lower(file_path) LIKE '%.jpg' OR lower(file_path) LIKE '%.jpeg' "
+            "OR lower(file_path) LIKE '%.png' THEN 'photo' ELSE 'document' END "
+            "WHERE file_id IS NOT NULL"
+        )
+
+
+def downgrade() -> None:
+    for table in ('vacancies', 'resumes'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('file_type')
@@ -0,0 +1,27 @@
+"""telegram file_unique_id for attachments
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('vacancies', 'resumes'):
+        op.add_column(table, sa.Column('file_unique_id', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in ('vacancies', 'resumes'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('file_unique_id')
@@ -0,0 +1,36 @@
+"""indexes for attachment dedupe and reference counting
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) - совпадают с __table_args__ в models.py
+INDEXES = [
+    # Поиск уже скачанной копии файла
+    ('ix_resumes_file_unique_id', 'resumes', ['file_unique_id']),
+    ('ix_vacancies_file_unique_id', 'vacancies', ['file_unique_id']),
+    # Подсчет ссылок на файл в хранилище
+    ('ix_resumes_file_path', 'resumes', ['file_path']),
+    ('ix_vacancies_file_path', 'vacancies', ['file_path']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,32 @@
+"""index for the applications inbox filtered by status
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 17:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) - совпадают с __table_args__ в models.py
+INDEXES = [
+    # Отклики на вакансию с фильтром по статусу, новые сверху
+    ('ix_applications_vacancy_id_status_created_at', 'applications', ['vacancy_id', 'status', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,32 @@
+"""soft delete for vacancies and resumes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 18:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+TABLES = ('vacancies', 'resumes')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        # Фоновая очистка выбирает удаленные строки по этому индексу
+        op.create_index(f'ix_{table}_deleted_at', table, ['deleted_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_deleted_at', table_name=table, if_exists=True)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('deleted_at')
@@ -0,0 +1,70 @@
+"""vacancy expiry and archive tables
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 18:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, колонки) - совпадают с __table_args__ в models.py
+INDEXES = [
+    # Выбор истекших вакансий для архивации
+    ('ix_vacancies_expires_at', 'vacancies', ['expires_at']),
+    ('ix_archived_vacancies_vacancy_id', 'archived_vacancies', ['vacancy_id']),
+    ('ix_archived_vacancies_user_id_created_at', 'archived_vacancies', ['user_id', 'created_at']),
+    ('ix_archived_applications_vacancy_id', 'archived_applications', ['vacancy_id']),
+    ('ix_archived_applications_user_id_created_at', 'archived_applications', ['user_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    # У существующих вакансий срок не задан, он считается от created_at
+    op.add_column('vacancies', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    op.create_table(
+        'archived_vacancies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('vacancy_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('company', sa.String(), nullable=True),
+        sa.Column('salary', sa.String(), nullable=True),
+        sa.Column('file_id', sa.String(), nullable=True),
+        sa.Column('file_type', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'archived_applications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('application_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('vacancy_id', sa.Integer(), nullable=True),
+        sa.Column('resume_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+    op.drop_table('archived_applications')
+    op.drop_table('archived_vacancies')
+    with op.batch_alter_table('vacancies') as batch_op:
+        batch_op.drop_column('expires_at')
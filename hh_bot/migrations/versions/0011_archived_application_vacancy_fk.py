@@ -0,0 +1,61 @@
+"""archived applications reference archived_vacancies.id
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 19:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+# Вакансия и ее отклики переносятся в архив в одной транзакции с общим archived_at,
+# поэтому пара (vacancy_id, archived_at) однозначно находит архивную вакансию
+BACKFILL = """
+    UPDATE archived_applications SET archived_vacancy_id = (
+        SELECT max(archived_vacancies.id) FROM archived_vacancies
+        WHERE archived_vacancies.vacancy_id = archived_applications.vacancy_id
+          AND archived_vacancies.archived_at = archived_applications.archived_at
+    )
+"""
+
+RESTORE = """
+    UPDATE archived_applications SET vacancy_id = (
+        SELECT archived_vacancies.vacancy_id FROM archived_vacancies
+        WHERE archived_vacancies.id = archived_applications.archived_vacancy_id
+    )
+"""
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('archived_applications') as batch_op:
+        batch_op.add_column(sa.Column('archived_vacancy_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_archived_applications_archived_vacancy_id',
+            'archived_vacancies', ['archived_vacancy_id'], ['id']
+        )
+    op.execute(BACKFILL)
+    op.drop_index('ix_archived_applications_vacancy_id', table_name='archived_applications', if_exists=True)
+    with op.batch_alter_table('archived_applications') as batch_op:
+        batch_op.drop_column('vacancy_id')
+    op.create_index(
+        'ix_archived_applications_archived_vacancy_id', 'archived_applications', ['archived_vacancy_id'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_archived_applications_archived_vacancy_id', table_name='archived_applications', if_exists=True)
+    with op.batch_alter_table('archived_applications') as batch_op:
+        batch_op.add_column(sa.Column('vacancy_id', sa.Integer(), nullable=True))
+    op.execute(RESTORE)
+    with op.batch_alter_table('archived_applications') as batch_op:
+        batch_op.drop_constraint('fk_archived_applications_archived_vacancy_id', type_='foreignkey')
+        batch_op.drop_column('archived_vacancy_id')
+    op.create_index('ix_archived_applications_vacancy_id', 'archived_applications', ['vacancy_id'], if_not_exists=True)
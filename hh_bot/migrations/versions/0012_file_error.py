@@ -0,0 +1,30 @@
+"""file_error marks attachments that will not be downloaded
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 19:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+TABLES = ('vacancies', 'resumes')
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        # Такие записи не ставятся в очередь загрузки при каждом запуске
+        op.add_column(table, sa.Column('file_error', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('file_error')
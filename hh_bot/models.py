@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 
@@ -26,11 +26,23 @@ class Resume(Base):
     description = Column(String)
     experience = Column(String)
     file_id = Column(String, nullable=True)
+    file_unique_id = Column(String, nullable=True)  # одинаков для одного и того же файла
     file_path = Column(String, nullable=True)
+    file_type = Column(String, nullable=True)  # photo или document, определяется при загрузке
+    file_error = Column(String, nullable=True)  # файл не скачан и больше не скачивается: too_large, failed
     created_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default='1')  # увеличивается при изменении
+    deleted_at = Column(DateTime, nullable=True)  # удалено пользователем, строку удалит cleanup.py
     user = relationship("User", back_populates="resumes")
     applications = relationship("Application", back_populates="resume")
 
+    __table_args__ = (
+        Index('ix_resumes_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_resumes_file_unique_id', 'file_unique_id'),
+        Index('ix_resumes_file_path', 'file_path'),
+        Index('ix_resumes_deleted_at', 'deleted_at'),
+    )
+
 class Vacancy(Base):
     __tablename__ = 'vacancies'
     
@@ -41,12 +53,27 @@ class Vacancy(Base):
     company = Column(String)
     salary = Column(String)
     file_id = Column(String, nullable=True)
+    file_unique_id = Column(String, nullable=True)  # одинаков для одного и того же файла
     file_path = Column(String, nullable=True)
+    file_type = Column(String, nullable=True)  # photo или document, определяется при загрузке
+    file_error = Column(String, nullable=True)  # файл не скачан и больше не скачивается: too_large, failed
     created_at = Column(DateTime, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default='1')  # увеличивается при изменении
+    deleted_at = Column(DateTime, nullable=True)  # удалено пользователем, строку удалит cleanup.py
+    expires_at = Column(DateTime, nullable=True)  # затем вакансия уходит в архив; NULL - created_at + VACANCY_TTL_DAYS
 
     user = relationship("User", back_populates="vacancies")
     applications = relationship("Application", back_populates="vacancy")
 
+    __table_args__ = (
+        Index('ix_vacancies_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_vacancies_created_at', 'created_at'),
+        Index('ix_vacancies_file_unique_id', 'file_unique_id'),
+        Index('ix_vacancies_file_path', 'file_path'),
+        Index('ix_vacancies_deleted_at', 'deleted_at'),
+        Index('ix_vacancies_expires_at', 'expires_at'),
+    )
+
 class Application(Base):
     __tablename__ = 'applications'
     
@@ -61,6 +88,55 @@ class Application(Base):
     vacancy = relationship("Vacancy", back_populates="applications")
     resume = relationship("Resume", back_populates="applications")
 
+    __table_args__ = (
+        Index('ix_applications_vacancy_id_created_at', 'vacancy_id', 'created_at'),
+        Index('ix_applications_vacancy_id_status_created_at', 'vacancy_id', 'status', 'created_at'),
+        Index('ix_applications_user_id_created_at', 'user_id', 'created_at'),
+        Index('ix_applications_resume_id', 'resume_id'),
+    )
+
+# Архив: истекшие вакансии и отклики на них переносятся сюда из vacancies
+# и applications (archive.py), рабочие запросы эти таблицы не читают.
+# Исходный id хранится отдельно: SQLite может повторно выдать id удаленной строки.
+
+class ArchivedVacancy(Base):
+    __tablename__ = 'archived_vacancies'
+
+    id = Column(Integer, primary_key=True)
+    vacancy_id = Column(Integer, nullable=False)
+    user_id = Column(Integer)
+    title = Column(String)
+    description = Column(String)
+    company = Column(String)
+    salary = Column(String)
+    file_id = Column(String, nullable=True)
+    file_type = Column(String, nullable=True)
+    created_at = Column(DateTime)
+    expires_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_archived_vacancies_vacancy_id', 'vacancy_id'),
+        Index('ix_archived_vacancies_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+class ArchivedApplication(Base):
+    __tablename__ = 'archived_applications'
+
+    id = Column(Integer, primary_key=True)
+    application_id = Column(Integer, nullable=False)
+    user_id = Column(Integer)
+    archived_vacancy_id = Column(Integer, ForeignKey('archived_vacancies.id'))
+    resume_id = Column(Integer)
+    status = Column(String)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_archived_applications_archived_vacancy_id', 'archived_vacancy_id'),
+        Index('ix_archived_applications_user_id_created_at', 'user_id', 'created_at'),
+    )
+
 class SearchHistory(Base):
     __tablename__ = 'search_history'
     
@@ -69,4 +145,16 @@ class SearchHistory(Base):
     query = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    user = relationship("User", back_populates="search_history") 
\ No newline at end of file
+    user = relationship("User", back_populates="search_history")
+
+    __table_args__ = (
+        Index('ix_search_history_user_id', 'user_id'),
+    )
+
+class FSMRecord(Base):
+    __tablename__ = 'fsm_storage'
+
+    key = Column(String, primary_key=True)  # bot_id:chat_id:user_id:thread_id:destiny
+    state = Column(String, nullable=True)
+    data = Column(Text, default='{}')  # JSON
+    expires_at = Column(DateTime, nullable=True, index=True)
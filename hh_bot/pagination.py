@@ -0,0 +1,44 @@
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, Select
+
+# Keyset-пагинация: страница выбирается условием по ключу сортировки
+# граничной строки, а не OFFSET. Загружается limit + 1 строка, лишняя
+# показывает, есть ли следующая страница. Назад идем в обратном порядке
+# и разворачиваем результат.
+
+async def fetch_keyset_rows(
+    session: AsyncSession,
+    stmt: Select,
+    columns: Sequence[ColumnElement],
+    after: Optional[Tuple[Any, ...]] = None,
+    before: Optional[Tuple[Any, ...]] = None,
+    limit: int = 1,
+    descending: bool = False
+) -> Tuple[List[Any], bool, bool]:
+    """Возвращает (строки, has_prev, has_next) для страницы после after или перед before.
+
+    columns - ключ сортировки, уникальный для строки; after и before - его значения.
+    """
+    key = tuple_(*columns)
+    ascending_order = [column.asc() for column in columns]
+    descending_order = [column.desc() for column in columns]
+
+    if before is not None:
+        condition = key > tuple_(*before) if descending else key < tuple_(*before)
+        stmt = stmt.where(condition).order_by(*(ascending_order if descending else descending_order))
+    else:
+        if after is not None:
+            stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+        stmt = stmt.order_by(*(descending_order if descending else ascending_order))
+
+    result = await session.execute(stmt.limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if before is not None:
+        rows.reverse()
+        return rows, has_more, True
+    return rows, after is not None, has_more
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from config import config
+from database import async_session
+from models import Vacancy
+from search import tokenize, vacancy_active
+
+# Рекомендации вакансий по резюме: TF-IDF с хэшированием слов.
+# Каждая вакансия - строка разреженной матрицы (CSC, по столбцам слов),
+# поэтому оценка всех вакансий - одно умножение столбцов слов резюме
+# на вектор весов, без циклов Python по вакансиям.
+#
+# Индекс хранится в памяти процесса и обновляется по частям:
+# - новые вакансии копятся в небольшой матрице и вливаются в основную пачкой
+# - удаленные помечаются и вырезаются при следующем слиянии
+# - IDF и нормы строк пересчитываются при слиянии
+# Вакансии, созданные другими процессами бота, подтягиваются раз в
+# RECOMMEND_REFRESH_INTERVAL секунд по возрастанию id. Тогда же из индекса
+# убираются вакансии, удаленные или истекшие (в том числе в других процессах).
+
+logger = logging.getLogger(__name__)
+
+# Слова сравниваются по первым буквам: "разработчик" и "разработчика" совпадают
+STEM_LENGTH = 6
+
+# (текст, вес поля)
+Fields = Iterable[Tuple[Optional[str], float]]
+
+def vacancy_fields(title: Optional[str], description: Optional[str], company: Optional[str]) -> Fields:
+    return ((title, 3.0), (description, 1.0), (company, 0.5))
+
+def resume_fields(title: Optional[str], description: Optional[str], experience: Optional[str]) -> Fields:
+    return ((title, 3.0), (description, 1.0), (experience, 0.5))
+
+def vectorize(fields: Fields, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Разреженный вектор текста: (номера столбцов, 1 + log(взвешенная частота))"""
+    counts: Dict[int, float] = {}
+    for text, weight in fields:
+        for token in tokenize(text):
+            column = zlib.crc32(token[:STEM_LENGTH].encode()) % n_features
+            counts[column] = counts.get(column, 0.0) + weight
+    columns = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return columns, 1.0 + np.log(values)
+
+def _rows_matrix(rows: List[Tuple[np.ndarray, np.ndarray]], n_features: int) -> sparse.csr_matrix:
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(columns) for columns, _ in rows])
+    indices = np.concatenate([columns for columns, _ in rows]) if rows else np.empty(0, dtype=np.int32)
+    data = np.concatenate([values for _, values in rows]) if rows else np.empty(0, dtype=np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), n_features))
+
+class VacancyRecommender:
+    def __init__(
+        self,
+        session_maker: sessionmaker = async_session,
+        n_features: int = config.RECOMMEND_FEATURES,
+        merge_rows: int = config.RECOMMEND_MERGE_ROWS,
+        refresh_interval: float = config.RECOMMEND_REFRESH_INTERVAL
+    ):
+        self.session_maker = session_maker
+        self.n_features = n_features
+        self.merge_rows = merge_rows
+        self.refresh_interval = refresh_interval
+        self.ready = False
+        # Основная матрица и id вакансий ее строк
+        self._matrix = sparse.csc_matrix((0, n_features), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._idf = np.ones(n_features, dtype=np.float32)
+        self._idf_squared = self._idf ** 2
+        self._norms = np.empty(0, dtype=np.float32)
+        # Новые вакансии до слияния: id, строки и их нормы
+        self._pending_ids: List[int] = []
+        self._pending_rows: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._pending_norms: List[float] = []
+        self._pending_matrix: Optional[sparse.csr_matrix] = None
+        # vacancy_id -> номер строки (основная матрица, затем новые)
+        self._rows: Dict[int, int] = {}
+        self._deleted: Set[int] = set()  # номера строк
+        # Наибольший id, прочитанный из базы; свои вакансии его не сдвигают,
+        # чтобы не пропустить меньшие id, созданные другими процессами
+        self._max_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _row_norm(self, columns: np.ndarray, values: np.ndarray) -> float:
+        return float(np.sqrt(np.sum((values * self._idf[columns]) ** 2))) or 1.0
+
+    def _append(self, vacancy_id: int, fields: Fields):
+        columns, values = vectorize(fields, self.n_features)
+        self._rows[vacancy_id] = self._matrix.shape[0] + len(self._pending_ids)
+        self._pending_ids.append(vacancy_id)
+        self._pending_rows.append((columns, values))
+        self._pending_norms.append(self._row_norm(columns, values))
+        self._pending_matrix = None
+
+    def add(self, vacancy_id: int, fields: Fields):
+        """Добавляет или заменяет вакансию"""
+        if vacancy_id in self._rows:
+            self.remove(vacancy_id)
+        self._append(vacancy_id, fields)
+        if len(self._pending_ids) >= self.merge_rows:
+            self._merge()
+
+    def add_vacancy(self, vacancy: Vacancy):
+        self.add(vacancy.id, vacancy_fields(vacancy.title, vacancy.description, vacancy.company))
+
+    def remove(self, vacancy_id: int):
+        row = self._rows.pop(vacancy_id, None)
+        if row is None:
+            return
+        self._deleted.add(row)
+        # Удаленных много - пересобираем матрицу
+        if len(self._deleted) >= max(self.merge_rows, len(self._rows) // 10):
+            self._merge()
+
+    def _merge(self):
+        """Вливает новые строки, вырезает удаленные, пересчитывает IDF и нормы"""
+        matrix = self._matrix
+        ids = self._ids
+        if self._pending_rows:
+            matrix = sparse.vstack([matrix, _rows_matrix(self._pending_rows, self.n_features)], format="csc")
+            ids = np.concatenate([ids, np.asarray(self._pending_ids, dtype=np.int64)])
+        if self._deleted:
+            keep = np.ones(len(ids), dtype=bool)
+            keep[np.fromiter(self._deleted, dtype=np.int64)] = False
+            matrix = matrix[keep]
+            ids = ids[keep]
+
+        self._matrix = sparse.csc_matrix(matrix, dtype=np.float32)
+        self._ids = ids
+        self._rows = {int(vacancy_id): row for row, vacancy_id in enumerate(ids)}
+        self._pending_ids, self._pending_rows, self._pending_norms = [], [], []
+        self._pending_matrix = None
+        self._deleted = set()
+
+        # Частота слова в документах - число ненулевых значений в его столбце
+        n_docs = self._matrix.shape[0]
+        df = np.diff(self._matrix.indptr).astype(np.float32)
+        self._idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+        self._idf_squared = self._idf ** 2
+        norms = np.sqrt(self._matrix.power(2) @ self._idf_squared)
+        norms[norms == 0] = 1.0
+        self._norms = norms.astype(np.float32)
+
+    def recommend(self, fields: Fields, limit: int = config.RECOMMEND_TOP_N,
+                  exclude: Iterable[int] = ()) -> List[int]:
+        """id вакансий, наиболее похожих на текст резюме, по убыванию сходства"""
+        columns, values = vectorize(fields, self.n_features)
+        if not len(columns) or not self._rows:
+            return []
+        weights = values * self._idf_squared[columns]
+
+        # Скалярное произведение только по столбцам слов резюме
+        scores = self._matrix[:, columns] @ weights / self._norms
+        if self._pending_ids:
+            if self._pending_matrix is None:
+                self._pending_matrix = _rows_matrix(self._pending_rows, self.n_features).tocsc()
+            pending = self._pending_matrix[:, columns] @ weights / np.asarray(self._pending_norms, dtype=np.float32)
+            scores = np.concatenate([scores, pending])
+
+        hidden = [self._rows[vacancy_id] for vacancy_id in exclude if vacancy_id in self._rows]
+        hidden.extend(self._deleted)
+        if hidden:
+            scores[np.asarray(hidden, dtype=np.int64)] = 0
+
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[scores[top] > 0]
+
+        all_ids = np.concatenate([self._ids, np.asarray(self._pending_ids, dtype=np.int64)]) \
+            if self._pending_ids else self._ids
+        return [int(vacancy_id) for vacancy_id in all_ids[top]]
+
+    async def load(self, batch_size: int = 1000):
+        """Читает вакансии с id больше уже загруженных"""
+        stmt = (
+            select(Vacancy.id, Vacancy.title, Vacancy.description, Vacancy.company)
+            .where(Vacancy.id > self._max_id, Vacancy.deleted_at.is_(None), vacancy_active(datetime.utcnow()))
+            .order_by(Vacancy.id)
+            .execution_options(yield_per=batch_size)
+        )
+        added = 0
+        async with self.session_maker() as session:
+            result = await session.stream(stmt)
+            async for rows in result.partitions():
+                for vacancy_id, title, description, company in rows:
+                    # Вакансии этого процесса уже добавлены обработчиками
+                    if vacancy_id not in self._rows:
+                        self._append(vacancy_id, vacancy_fields(title, description, company))
+                        added += 1
+                    self._max_id = vacancy_id
+                # Отдаем управление обработчикам между пачками
+                await asyncio.sleep(0)
+        if self._pending_ids and (not self.ready or len(self._pending_ids) >= self.merge_rows):
+            self._merge()
+        return added
+
+    async def prune(self, batch_size: int = 500) -> int:
+        """Убирает из индекса удаленные, истекшие и архивированные вакансии"""
+        vacancy_ids = list(self._rows)
+        now = datetime.utcnow()
+        removed = 0
+        async with self.session_maker() as session:
+            for start in range(0, len(vacancy_ids), batch_size):
+                batch = vacancy_ids[start:start + batch_size]
+                result = await session.execute(
+                    select(Vacancy.id)
+                    .where(Vacancy.id.in_(batch), Vacancy.deleted_at.is_(None), vacancy_active(now))
+                )
+                active = set(result.scalars())
+                for vacancy_id in batch:
+                    if vacancy_id not in active:
+                        self.remove(vacancy_id)
+                        removed += 1
+                await asyncio.sleep(0)
+        return removed
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                if self.ready:
+                    removed = await self.prune()
+                    if removed:
+                        logger.debug("Из индекса рекомендаций убрано вакансий: %s", removed)
+                added = await self.load()
+                if not self.ready:
+                    self.ready = True
+                    logger.info("Индекс рекомендаций построен: %s вакансий", len(self))
+                elif added:
+                    logger.debug("В индекс рекомендаций добавлено вакансий: %s", added)
+            except Exception:
+                logger.exception("Ошибка обновления индекса рекомендаций")
+            if self.refresh_interval <= 0 and self.ready:
+                return
+            await asyncio.sleep(max(self.refresh_interval, 1))
+
+    async def start(self):
+        """Строит индекс в фоне и периодически подтягивает новые вакансии"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+recommender = VacancyRecommender()
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+from typing import Coroutine, Dict, Iterable, List, Optional, Set, Tuple
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+from callbacks import ApplyVacancy
+from cards import get_vacancy_card, card_methods
+from config import config
+from database import async_session
+from delivery import delivery_queue
+from models import SearchHistory, Vacancy
+from search import tokenize
+
+# Сохраненные поиски (подписки) хранятся в search_history. Новая вакансия
+# сверяется с подписками через инвертированный индекс в памяти: каждая
+# подписка лежит под своим самым длинным словом, а для вакансии
+# перебираются префиксы ее слов. Так проверяются только подписки-кандидаты,
+# а не все сохраненные запросы. Совпадение - как в поиске: каждое слово
+# запроса является началом какого-нибудь слова вакансии.
+#
+# Уведомления ставятся в delivery_queue пачками: для каждой пачки
+# подписки перепроверяются в базе (их могли удалить в другом процессе),
+# а следующая пачка ставится, когда очередь разошлет предыдущую.
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """Запрос в том виде, в котором он хранится в подписке"""
+    return " ".join(tokenize(query))
+
+def vacancy_words(vacancy: Vacancy) -> Set[str]:
+    return set(tokenize(f"{vacancy.title} {vacancy.company} {vacancy.description}"))
+
+class SavedSearchIndex:
+    def __init__(self):
+        # id подписки -> (telegram_id пользователя, слова запроса)
+        self._searches: Dict[int, Tuple[int, Tuple[str, ...]]] = {}
+        # самое длинное слово запроса -> id подписок
+        self._by_token: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._searches)
+
+    def add(self, search_id: int, user_id: int, query: str):
+        tokens = tuple(tokenize(query))
+        if not tokens:
+            return
+        self.remove(search_id)
+        self._searches[search_id] = (user_id, tokens)
+        self._by_token.setdefault(max(tokens, key=len), set()).add(search_id)
+
+    def remove(self, search_id: int):
+        search = self._searches.pop(search_id, None)
+        if search is None:
+            return
+        key = max(search[1], key=len)
+        ids = self._by_token.get(key)
+        if ids is not None:
+            ids.discard(search_id)
+            if not ids:
+                del self._by_token[key]
+
+    def match(self, words: Set[str]) -> List[int]:
+        """id подписок, все слова которых - префиксы слов вакансии"""
+        prefixes = {word[:length] for word in words for length in range(1, len(word) + 1)}
+        candidates: Set[int] = set()
+        for prefix in prefixes:
+            ids = self._by_token.get(prefix)
+            if ids:
+                candidates.update(ids)
+
+        return [
+            search_id for search_id in candidates
+            if all(token in prefixes for token in self._searches[search_id][1])
+        ]
+
+    def owner(self, search_id: int) -> Optional[int]:
+        search = self._searches.get(search_id)
+        return search[0] if search else None
+
+class SavedSearches:
+    def __init__(
+        self,
+        session_maker: sessionmaker = async_session,
+        batch_size: int = config.SAVED_SEARCH_BATCH_SIZE,
+        refresh_interval: float = config.SAVED_SEARCH_REFRESH_INTERVAL
+    ):
+        self.session_maker = session_maker
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.index = SavedSearchIndex()
+        self.ready = False
+        # Подписки, созданные другими процессами, подтягиваются по возрастанию id
+        self._max_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self._notify_tasks: Set[asyncio.Task] = set()
+
+    def subscribe(self, search: SearchHistory):
+        self.index.add(search.id, search.user_id, search.query)
+
+    def unsubscribe(self, search_id: int):
+        self.index.remove(search_id)
+
+    async def load(self, batch_size: int = 5000) -> int:
+        stmt = (
+            select(SearchHistory.id, SearchHistory.user_id, SearchHistory.query)
+            .where(SearchHistory.id > self._max_id)
+            .order_by(SearchHistory.id)
+            .execution_options(yield_per=batch_size)
+        )
+        added = 0
+        async with self.session_maker() as session:
+            result = await session.stream(stmt)
+            async for rows in result.partitions():
+                for search_id, user_id, query in rows:
+                    self.index.add(search_id, user_id, query)
+                    self._max_id = search_id
+                added += len(rows)
+        return added
+
+    def _matches(self, vacancy: Vacancy) -> List[int]:
+        search_ids = self.index.match(vacancy_words(vacancy))
+        # Автору вакансии о ней не сообщаем
+        return [search_id for search_id in search_ids if self.index.owner(search_id) != vacancy.user_id]
+
+    def _spawn(self, coro: Coroutine):
+        task = asyncio.create_task(coro)
+        self._notify_tasks.add(task)
+        task.add_done_callback(self._notify_tasks.discard)
+
+    def notify(self, bot: Bot, vacancy: Vacancy):
+        """Запускает рассылку по подпискам, подходящим под новую вакансию"""
+        if not self.ready:
+            return
+        search_ids = self._matches(vacancy)
+        if search_ids:
+            self._spawn(self._fan_out(bot, vacancy.id, search_ids))
+
+    def notify_many(self, bot: Bot, vacancies: Iterable[Vacancy]):
+        """Рассылка по нескольким новым вакансиям (импорт): вакансии
+        обрабатываются по очереди одной задачей, а не все сразу"""
+        if not self.ready:
+            return
+        matches = [(vacancy.id, search_ids) for vacancy in vacancies if (search_ids := self._matches(vacancy))]
+        if matches:
+            self._spawn(self._fan_out_many(bot, matches))
+
+    async def _fan_out_many(self, bot: Bot, matches: List[Tuple[int, List[int]]]):
+        for vacancy_id, search_ids in matches:
+            await self._fan_out(bot, vacancy_id, search_ids)
+
+    async def _fan_out(self, bot: Bot, vacancy_id: int, search_ids: Iterable[int]):
+        search_ids = sorted(search_ids)
+        notified: Set[int] = set()
+        try:
+            async with self.session_maker() as session:
+                card = await get_vacancy_card(session, vacancy_id)
+            if card is None:
+                return
+            keyboard = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="Откликнуться", callback_data=ApplyVacancy(vacancy_id=vacancy_id).pack())]
+            ])
+
+            for start in range(0, len(search_ids), self.batch_size):
+                batch = search_ids[start:start + self.batch_size]
+                async with self.session_maker() as session:
+                    result = await session.execute(
+                        select(SearchHistory.user_id, SearchHistory.query).where(SearchHistory.id.in_(batch))
+                    )
+                    rows = result.all()
+
+                for user_id, query in rows:
+                    # Несколько подписок одного пользователя - одно уведомление
+                    if user_id in notified:
+                        continue
+                    notified.add(user_id)
+                    for method in card_methods(
+                        card,
+                        user_id,
+                        text=f"🔔 Новая вакансия по вашему запросу «{query}»\n\n{card.text}",
+                        reply_markup=keyboard
+                    ):
+                        delivery_queue.send(bot, method)
+
+                # Темп задает сама очередь: ее лимиты, а не пересчет здесь
+                await delivery_queue.wait_backlog(self.batch_size)
+        except Exception:
+            logger.exception("Ошибка рассылки по подпискам для вакансии %s", vacancy_id)
+        else:
+            logger.debug("Вакансия %s: уведомлено подписчиков: %s", vacancy_id, len(notified))
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                added = await self.load()
+                if not self.ready:
+                    self.ready = True
+                    logger.info("Индекс подписок построен: %s подписок", len(self.index))
+                elif added:
+                    logger.debug("В индекс подписок добавлено: %s", added)
+            except Exception:
+                logger.exception("Ошибка обновления индекса подписок")
+            if self.refresh_interval <= 0 and self.ready:
+                return
+            await asyncio.sleep(max(self.refresh_interval, 1))
+
+    async def start(self):
+        """Загружает подписки в фоне и периодически подтягивает новые"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Дожидаемся постановки уведомлений в очередь, саму отправку ждет delivery_queue.close
+        if self._notify_tasks:
+            await asyncio.wait(set(self._notify_tasks), timeout=config.DELIVERY_SHUTDOWN_TIMEOUT)
+
+saved_searches = SavedSearches()
@@ -0,0 +1,113 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import select, literal_column, table, column, func, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+from config import config
+from models import Vacancy
+from pagination import fetch_keyset_rows
+
+# Полнотекстовый поиск по вакансиям:
+# - SQLite: внешняя FTS5-таблица vacancies_fts, синхронизируется триггерами
+# - PostgreSQL: генерируемая колонка search_vector с GIN-индексом
+# Для остальных СУБД остается поиск через ilike.
+# Индексы создаются миграцией migrations/versions/0002.
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+SQLITE_FTS_TABLE = "vacancies_fts"
+vacancies_fts = table(SQLITE_FTS_TABLE, column("rowid"))
+
+# Срок жизни вакансии; без expires_at срок считается от created_at
+VACANCY_TTL = timedelta(days=config.VACANCY_TTL_DAYS)
+
+def vacancy_active(now: datetime) -> ColumnElement:
+    """Условие неистекшей вакансии (до архивации истекшие остаются в таблице)"""
+    return or_(
+        Vacancy.expires_at > now,
+        and_(Vacancy.expires_at.is_(None), Vacancy.created_at > now - VACANCY_TTL)
+    )
+
+def tokenize(query: str) -> List[str]:
+    """Разбивает поисковый запрос на слова в нижнем регистре"""
+    return [token.lower() for token in TOKEN_RE.findall(query or "")]
+
+def build_search_query(dialect: str, tokens: List[str]):
+    """Возвращает (select, score) для поиска по словам запроса.
+
+    score упорядочен по возрастанию: чем меньше, тем релевантнее.
+    """
+    if dialect == "sqlite":
+        # Каждое слово ищем как префикс, все слова обязательны
+        match = " ".join(f'"{token}"*' for token in tokens)
+        score = literal_column("bm25(vacancies_fts, 10.0, 5.0, 1.0)")
+        stmt = (
+            select(Vacancy, score.label("score"))
+            .join(vacancies_fts, vacancies_fts.c.rowid == Vacancy.id)
+            .where(literal_column(SQLITE_FTS_TABLE).op("MATCH")(match))
+        )
+    elif dialect == "postgresql":
+        tsquery = " & ".join(f"{token}:*" for token in tokens)
+        search_vector = literal_column("vacancies.search_vector")
+        ts_query = func.to_tsquery("russian", tsquery)
+        score = -func.ts_rank_cd(search_vector, ts_query)
+        stmt = (
+            select(Vacancy, score.label("score"))
+            .where(search_vector.op("@@")(ts_query))
+        )
+    else:
+        score = literal_column("0")
+        stmt = select(Vacancy, score.label("score")).where(and_(*[
+            or_(
+                Vacancy.title.ilike(f"%{token}%"),
+                Vacancy.company.ilike(f"%{token}%"),
+                Vacancy.description.ilike(f"%{token}%")
+            )
+            for token in tokens
+        ]))
+    return stmt, score
+
+# Курсор страницы результатов: (score, id) граничной вакансии
+Cursor = Tuple[float, int]
+
+@dataclass
+class SearchPage:
+    vacancies: List[Vacancy]
+    first: Optional[Cursor]
+    last: Optional[Cursor]
+    has_prev: bool
+    has_next: bool
+
+async def fetch_search_page(
+    session: AsyncSession,
+    query: str,
+    after: Optional[Cursor] = None,
+    before: Optional[Cursor] = None,
+    limit: int = 1
+) -> SearchPage:
+    """Возвращает страницу результатов поиска с keyset-пагинацией.
+
+    Загружается только limit вакансий плюс одна для проверки следующей страницы.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return SearchPage([], None, None, False, False)
+
+    stmt, score = build_search_query(session.bind.dialect.name, tokens)
+    # Удаленные и истекшие вакансии остаются в индексе до фоновой очистки и архивации
+    stmt = stmt.where(Vacancy.deleted_at.is_(None), vacancy_active(datetime.utcnow()))
+    rows, has_prev, has_next = await fetch_keyset_rows(
+        session, stmt, (score, Vacancy.id), after=after, before=before, limit=limit
+    )
+    if not rows:
+        return SearchPage([], None, None, has_prev, has_next)
+
+    return SearchPage(
+        vacancies=[row.Vacancy for row in rows],
+        first=(rows[0].score, rows[0].Vacancy.id),
+        last=(rows[-1].score, rows[-1].Vacancy.id),
+        has_prev=has_prev,
+        has_next=has_next
+    )
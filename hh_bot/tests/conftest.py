@@ -0,0 +1,39 @@
+import asyncio
+import os
+import sys
+import tempfile
+import pytest
+
+# Модули бота импортируются как в main.py (from config import config), поэтому
+# каталог бота добавляется в sys.path, а окружение задается до первого
+# импорта config. Тесты работают во временном каталоге со своей базой SQLite.
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="hh_bot_tests_")
+
+os.chdir(WORKDIR)
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{WORKDIR}/test.sqlite3",
+    "FSM_STORAGE": "memory",
+    "METRICS_PORT": "0",
+    "ATTACHMENTS_GC_INTERVAL": "0",
+    "CLEANUP_INTERVAL": "0",
+    "ARCHIVE_INTERVAL": "0",
+})
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+@pytest.fixture
+def db():
+    """Пустая база с актуальной схемой; возвращает фабрику сессий"""
+    import database
+    from models import Base
+
+    async def reset():
+        await database.init_db()
+        async with database.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(table.delete())
+
+    asyncio.run(reset())
+    return database.async_session
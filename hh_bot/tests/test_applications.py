@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from applications import create_application, fetch_applications_page, get_status_counts, invalidate_status_counts
+from models import Application, Resume, Vacancy
+
+SEEKER_ID = 200
+
+async def create_applications(session_maker, count: int):
+    """Отклики соискателя; у пар откликов одинаковое created_at, порядок решает id"""
+    started = datetime(2026, 1, 1)
+    async with session_maker() as session:
+        vacancy = Vacancy(user_id=100, title="Менеджер", description="Продажи", company="Ромашка")
+        resume = Resume(user_id=SEEKER_ID, title="Продавец", description="Опыт", experience="5 лет")
+        session.add_all([vacancy, resume])
+        await session.flush()
+        applications = [
+            Application(
+                user_id=SEEKER_ID, vacancy_id=vacancy.id, resume_id=resume.id,
+                status="new" if i % 3 else "invited", created_at=started + timedelta(minutes=i // 2)
+            )
+            for i in range(count)
+        ]
+        session.add_all(applications)
+        await session.commit()
+        return [application.id for application in applications]
+
+async def walk(session_maker, limit: int):
+    """Проходит все страницы вперед, затем назад; возвращает id откликов по страницам"""
+    forward, backward = [], []
+    async with session_maker() as session:
+        page = await fetch_applications_page(session, SEEKER_ID, limit=limit)
+        assert not page.has_prev
+        forward.append([item.application_id for item in page.items])
+        while page.has_next:
+            page = await fetch_applications_page(session, SEEKER_ID, after=page.last, limit=limit)
+            assert page.has_prev
+            forward.append([item.application_id for item in page.items])
+        backward.append(forward[-1])
+        while page.has_prev:
+            page = await fetch_applications_page(session, SEEKER_ID, before=page.first, limit=limit)
+            assert page.has_next
+            backward.append([item.application_id for item in page.items])
+    return forward, backward
+
+def test_keyset_pages_cover_all_rows_in_both_directions(db):
+    created = asyncio.run(create_applications(db, 7))
+    forward, backward = asyncio.run(walk(db, limit=3))
+
+    ids = [application_id for page in forward for application_id in page]
+    # Новые сверху; при равном created_at больший id идет первым
+    assert ids == sorted(created, reverse=True)
+    assert [len(page) for page in forward] == [3, 3, 1]
+    assert backward == list(reversed(forward))
+
+def test_keyset_page_of_empty_list(db):
+    async def scenario():
+        async with db() as session:
+            return await fetch_applications_page(session, SEEKER_ID, limit=3)
+
+    page = asyncio.run(scenario())
+    assert page.items == [] and page.first is None
+    assert not page.has_prev and not page.has_next
+
+def test_status_counts(db):
+    asyncio.run(create_applications(db, 7))
+    invalidate_status_counts(SEEKER_ID)
+
+    async def scenario():
+        async with db() as session:
+            return await get_status_counts(session, SEEKER_ID)
+
+    assert asyncio.run(scenario()) == {"new": 4, "invited": 3}
+
+def test_create_application_rechecks_vacancy_and_resume(db):
+    now = datetime.utcnow()
+
+    async def scenario():
+        async with db() as session:
+            vacancies = {
+                "open": Vacancy(user_id=100, title="Открытая", created_at=now, expires_at=now + timedelta(days=10)),
+                "expired": Vacancy(user_id=100, title="Истекшая", created_at=now - timedelta(days=40),
+                                   expires_at=now - timedelta(days=1)),
+                "deleted": Vacancy(user_id=100, title="Удаленная", created_at=now,
+                                   expires_at=now + timedelta(days=10), deleted_at=now),
+            }
+            resumes = {
+                "own": Resume(user_id=SEEKER_ID, title="Свое"),
+                "foreign": Resume(user_id=SEEKER_ID + 1, title="Чужое"),
+                "deleted": Resume(user_id=SEEKER_ID, title="Удаленное", deleted_at=now),
+            }
+            session.add_all(list(vacancies.values()) + list(resumes.values()))
+            await session.commit()
+            vacancy_ids = {name: vacancy.id for name, vacancy in vacancies.items()}
+            resume_ids = {name: resume.id for name, resume in resumes.items()}
+
+        results = {}
+        for vacancy, resume in [("open", "own"), ("expired", "own"), ("deleted", "own"),
+                                ("open", "foreign"), ("open", "deleted")]:
+            async with db() as session:
+                results[vacancy, resume] = await create_application(
+                    session, SEEKER_ID, vacancy_ids[vacancy], resume_ids[resume]
+                )
+        async with db() as session:
+            stored = (await session.execute(select(Application))).scalars().all()
+        return results, stored, vacancy_ids, resume_ids
+
+    results, stored, vacancy_ids, resume_ids = asyncio.run(scenario())
+    assert results.pop(("open", "own")) is not None
+    assert all(application_id is None for application_id in results.values())
+    assert [(row.user_id, row.vacancy_id, row.resume_id, row.status) for row in stored] == [
+        (SEEKER_ID, vacancy_ids["open"], resume_ids["own"], "new")
+    ]
+    assert stored[0].created_at is not None
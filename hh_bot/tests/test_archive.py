@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from archive import VacancyArchiver
+from models import Application, ArchivedApplication, ArchivedVacancy, Resume, Vacancy
+
+def test_archiver_moves_expired_vacancies_with_applications_in_batches(db):
+    now = datetime.utcnow()
+
+    async def scenario():
+        async with db() as session:
+            resume = Resume(user_id=200, title="Продавец", description="", experience="")
+            vacancies = {
+                "expired": [
+                    Vacancy(user_id=100, title=f"Истекшая {i}", company="Ромашка", salary="1",
+                            created_at=now - timedelta(days=40), expires_at=now - timedelta(days=1))
+                    for i in range(3)
+                ],
+                # Срок не задан: считается от created_at
+                "legacy": [Vacancy(user_id=100, title="Старая", created_at=now - timedelta(days=400))],
+                "active": [Vacancy(user_id=100, title="Активная", created_at=now, expires_at=now + timedelta(days=10))],
+                # Удаленные вакансии забирает очистка, а не архив
+                "deleted": [Vacancy(user_id=100, title="Удаленная", created_at=now - timedelta(days=40),
+                                    expires_at=now - timedelta(days=1), deleted_at=now)],
+            }
+            session.add(resume)
+            session.add_all([vacancy for group in vacancies.values() for vacancy in group])
+            await session.flush()
+            applications = [
+                Application(user_id=200, vacancy_id=vacancy.id, resume_id=resume.id, status="new", created_at=now)
+                for vacancy in vacancies["expired"] + vacancies["active"]
+            ]
+            session.add_all(applications)
+            await session.commit()
+            ids = {name: [vacancy.id for vacancy in group] for name, group in vacancies.items()}
+            application_vacancies = {application.id: application.vacancy_id for application in applications}
+
+        archiver = VacancyArchiver(session_maker=db, interval=0, batch_size=2)
+        archived = await archiver.run_once()
+
+        async with db() as session:
+            remaining = set((await session.execute(select(Vacancy.id))).scalars())
+            remaining_applications = set((await session.execute(select(Application.id))).scalars())
+            archived_vacancies = {
+                row.id: row for row in (await session.execute(select(ArchivedVacancy))).scalars()
+            }
+            archived_applications = (await session.execute(select(ArchivedApplication))).scalars().all()
+        return ids, application_vacancies, archived, remaining, remaining_applications, \
+            archived_vacancies, archived_applications
+
+    ids, application_vacancies, archived, remaining, remaining_applications, \
+        archived_vacancies, archived_applications = asyncio.run(scenario())
+
+    moved = ids["expired"] + ids["legacy"]
+    assert archived == len(moved)
+    assert remaining == set(ids["active"] + ids["deleted"])
+    assert sorted(row.vacancy_id for row in archived_vacancies.values()) == sorted(moved)
+    assert all(row.archived_at is not None and row.user_id == 100 for row in archived_vacancies.values())
+
+    # Отклик ссылается на строку архива, а не на исходный id вакансии
+    assert len(archived_applications) == len(ids["expired"])
+    for row in archived_applications:
+        assert archived_vacancies[row.archived_vacancy_id].vacancy_id == application_vacancies[row.application_id]
+    assert remaining_applications == {
+        application_id for application_id, vacancy_id in application_vacancies.items()
+        if vacancy_id in ids["active"]
+    }
+
+def test_archiver_keeps_renewed_vacancies(db):
+    now = datetime.utcnow()
+
+    async def scenario():
+        async with db() as session:
+            session.add(Vacancy(user_id=100, title="Продленная", created_at=now - timedelta(days=400),
+                                expires_at=now + timedelta(days=30)))
+            await session.commit()
+        archived = await VacancyArchiver(session_maker=db, interval=0, batch_size=2).run_once()
+        async with db() as session:
+            return archived, len((await session.execute(select(Vacancy.id))).all())
+
+    assert asyncio.run(scenario()) == (0, 1)
+
+def test_search_hides_expired_vacancies_before_archiving(db):
+    from search import fetch_search_page
+    now = datetime.utcnow()
+
+    async def scenario():
+        async with db() as session:
+            active = Vacancy(user_id=100, title="Python активная", created_at=now, expires_at=now + timedelta(days=1))
+            session.add_all([
+                active,
+                Vacancy(user_id=100, title="Python истекшая", created_at=now - timedelta(days=40),
+                        expires_at=now - timedelta(days=1)),
+                Vacancy(user_id=100, title="Python старая", created_at=now - timedelta(days=400)),
+            ])
+            await session.commit()
+            page = await fetch_search_page(session, "python", limit=10)
+            return active.id, [vacancy.id for vacancy in page.vacancies]
+
+    active_id, found = asyncio.run(scenario())
+    assert found == [active_id]
@@ -0,0 +1,88 @@
+import asyncio
+from typing import List, Optional
+import pytest
+from aiogram.fsm.state import State, StatesGroup
+from callbacks import CallbackTable, ViewVacancy
+
+class FakeCallback:
+    def __init__(self, data: str):
+        self.data = data
+        self.answers: List[str] = []
+
+    async def answer(self, text: Optional[str] = None, **kwargs):
+        self.answers.append(text)
+
+class FakeState:
+    def __init__(self, state: Optional[str] = None):
+        self.state = state
+
+    async def get_state(self) -> Optional[str]:
+        return self.state
+
+class Form(StatesGroup):
+    waiting = State()
+
+def test_dispatch_plain_key_passes_only_declared_arguments():
+    table = CallbackTable()
+    calls = []
+
+    @table.register("employer")
+    async def employer(callback, session):
+        calls.append((callback.data, session))
+
+    callback = FakeCallback("employer")
+    asyncio.run(table.dispatch(callback, session="db", state=FakeState(), bot="bot"))
+    assert calls == [("employer", "db")]
+    assert callback.answers == []
+
+def test_dispatch_unpacks_callback_data():
+    table = CallbackTable()
+    calls = []
+
+    @table.register(ViewVacancy)
+    async def view_vacancy(callback, callback_data: ViewVacancy, **kwargs):
+        calls.append(callback_data.vacancy_id)
+
+    asyncio.run(table.dispatch(FakeCallback(ViewVacancy(vacancy_id=42).pack()), state=FakeState()))
+    assert calls == [42]
+    assert table.handler_for("vv:1") is view_vacancy
+
+@pytest.mark.parametrize("data", ["unknown", "", "vv:not-a-number", "vv"])
+def test_dispatch_answers_stale_buttons(data):
+    table = CallbackTable()
+
+    @table.register(ViewVacancy)
+    async def view_vacancy(callback, callback_data):
+        raise AssertionError("обработчик не должен вызываться")
+
+    callback = FakeCallback(data)
+    asyncio.run(table.dispatch(callback, state=FakeState()))
+    assert len(callback.answers) == 1
+    assert "устарела" in callback.answers[0]
+
+def test_dispatch_checks_state():
+    table = CallbackTable()
+    calls = []
+
+    @table.register("skip_file", state=Form.waiting)
+    async def skip_file(callback):
+        calls.append(callback.data)
+
+    stale = FakeCallback("skip_file")
+    asyncio.run(table.dispatch(stale, state=FakeState(None)))
+    assert calls == [] and len(stale.answers) == 1
+
+    asyncio.run(table.dispatch(FakeCallback("skip_file"), state=FakeState(Form.waiting.state)))
+    assert calls == ["skip_file"]
+
+def test_register_rejects_duplicate_and_invalid_keys():
+    table = CallbackTable()
+
+    @table.register(ViewVacancy)
+    async def view_vacancy(callback):
+        pass
+
+    with pytest.raises(ValueError):
+        table.register("vv")(view_vacancy)
+    with pytest.raises(ValueError):
+        table.register("a:b")(view_vacancy)
@@ -0,0 +1,69 @@
+import asyncio
+from types import SimpleNamespace
+from sqlalchemy import select
+from attachments import attachment_store
+from downloads import Attachment, DownloadQueue, FILE_TOO_LARGE
+from models import Resume, Vacancy
+
+class LargeFileBot:
+    """Telegram сообщает размер файла больше лимита"""
+    def __init__(self):
+        self.requested = []
+
+    async def get_file(self, file_id):
+        self.requested.append(file_id)
+        return SimpleNamespace(file_size=100, file_path=f"documents/{file_id}.pdf")
+
+def test_oversized_file_is_marked_and_not_requeued(db):
+    async def scenario():
+        async with db() as session:
+            resume = Resume(user_id=200, title="Продавец", file_id="big", file_unique_id="big", file_type="document")
+            session.add(resume)
+            await session.commit()
+
+        queue = DownloadQueue(workers=1, max_size=10, max_retries=1)
+        bot = LargeFileBot()
+        queue.submit(bot, Resume, resume.id, Attachment("big", "big", "document", ".pdf", file_size=100))
+        await queue._queue.join()
+        # Размер известен из сообщения: get_file не вызывается
+        requested = list(bot.requested)
+
+        await queue.start(bot)
+        await queue._queue.join()
+        await queue.close()
+        async with db() as session:
+            row = (await session.execute(select(Resume.file_path, Resume.file_error))).one()
+        return requested, bot.requested, row
+
+    requested, requested_after_start, row = asyncio.run(scenario())
+    assert requested == [] and requested_after_start == []
+    assert row.file_path is None and row.file_error == FILE_TOO_LARGE
+
+def test_legacy_placeholder_path_is_cleared_and_downloaded_once(db):
+    async def scenario():
+        async with db() as session:
+            # Старые вакансии хранили путь-заглушку, файл по нему не скачивался
+            vacancy = Vacancy(user_id=100, title="Менеджер", file_id="legacy", file_type="document",
+                              file_path="vacancy_files/price.pdf")
+            session.add(vacancy)
+            await session.commit()
+
+        await attachment_store.collect_garbage()
+        async with db() as session:
+            cleared = await session.scalar(select(Vacancy.file_path))
+
+        # Следующий запуск ставит файл в очередь по file_id; он слишком большой - больше не ставится
+        bot = LargeFileBot()
+        for _ in range(2):
+            queue = DownloadQueue(workers=1, max_size=10, max_retries=1)
+            await queue.start(bot)
+            await queue._queue.join()
+            await queue.close()
+        async with db() as session:
+            error = await session.scalar(select(Vacancy.file_error))
+        return cleared, bot.requested, error
+
+    cleared, requested, error = asyncio.run(scenario())
+    assert cleared is None
+    assert requested == ["legacy"]
+    assert error == FILE_TOO_LARGE
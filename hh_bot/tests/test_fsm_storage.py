@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timedelta
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy import select
+from fsm_storage import SQLStorage
+from models import FSMRecord
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+def test_write_through_stores_each_key_without_buffer(db):
+    async def scenario():
+        storage = SQLStorage(session_maker=db, ttl=60, flush_interval=0, purge_interval=0)
+        await storage.set_state(KEY, "Form:title")
+        await storage.set_data(KEY, {"title": "Разработчик"})
+        # Другой процесс читает то же из базы
+        other = SQLStorage(session_maker=db, ttl=60, flush_interval=0, purge_interval=0)
+        return storage._pending, await other.get_state(KEY), await other.get_data(KEY)
+
+    pending, state, data = asyncio.run(scenario())
+    assert pending == {}
+    assert state == "Form:title" and data == {"title": "Разработчик"}
+
+def test_expired_records_are_purged_periodically(db):
+    async def scenario():
+        async with db() as session:
+            session.add_all([
+                FSMRecord(key="expired", state="Form:title", expires_at=datetime.utcnow() - timedelta(seconds=1)),
+                FSMRecord(key="alive", state="Form:title", expires_at=datetime.utcnow() + timedelta(hours=1)),
+            ])
+            await session.commit()
+
+        storage = SQLStorage(session_maker=db, ttl=60, flush_interval=0, purge_interval=0.01)
+        await storage.start()
+        await asyncio.sleep(0.2)
+        async with db() as session:
+            keys = set((await session.execute(select(FSMRecord.key))).scalars())
+        await storage.close()
+        return keys
+
+    assert asyncio.run(scenario()) == {"alive"}
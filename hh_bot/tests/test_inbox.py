@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timedelta
+from inbox import fetch_inbox_page
+from models import Application, Resume, User, Vacancy
+
+EMPLOYER_ID = 100
+
+async def create_inbox(session_maker):
+    """Отклики на две вакансии работодателя и одну чужую"""
+    started = datetime(2026, 1, 1)
+    async with session_maker() as session:
+        mine = [Vacancy(user_id=EMPLOYER_ID, title=f"Вакансия {i}") for i in range(2)]
+        foreign = Vacancy(user_id=101, title="Чужая")
+        deleted = Vacancy(user_id=EMPLOYER_ID, title="Удаленная", deleted_at=started)
+        resume = Resume(user_id=200, title="Продавец", description="", experience="5 лет")
+        session.add_all(mine + [foreign, deleted, resume, User(telegram_id=200, username="seeker")])
+        await session.flush()
+        applications = [
+            Application(user_id=200, vacancy_id=vacancy.id, resume_id=resume.id,
+                        status="new" if i % 2 else "invited", created_at=started + timedelta(minutes=i))
+            for i, vacancy in enumerate(mine * 3 + [foreign, deleted])
+        ]
+        session.add_all(applications)
+        await session.commit()
+        visible = [a.id for a in applications if a.vacancy_id in {vacancy.id for vacancy in mine}]
+        return mine[0].id, visible
+
+def test_inbox_pages_join_related_rows_and_filter(db):
+    vacancy_id, visible = asyncio.run(create_inbox(db))
+
+    async def scenario():
+        async with db() as session:
+            pages = []
+            page = await fetch_inbox_page(session, EMPLOYER_ID, limit=4)
+            pages.append(page)
+            while page.has_next:
+                page = await fetch_inbox_page(session, EMPLOYER_ID, after=page.last, limit=4)
+                pages.append(page)
+            back = await fetch_inbox_page(session, EMPLOYER_ID, before=page.first, limit=4)
+            by_vacancy = await fetch_inbox_page(session, EMPLOYER_ID, vacancy_id=vacancy_id, limit=10)
+            invited = await fetch_inbox_page(session, EMPLOYER_ID, status="invited", limit=10)
+            return pages, back, by_vacancy, invited
+
+    pages, back, by_vacancy, invited = asyncio.run(scenario())
+    items = [item for page in pages for item in page.items]
+    # Новые сверху, чужие вакансии и удаленные вакансии не показываются
+    assert [item.application_id for item in items] == sorted(visible, reverse=True)
+    assert items[0].applicant_username == "seeker" and items[0].resume_experience == "5 лет"
+    assert back.items == pages[0].items and back.has_next and not back.has_prev
+    assert {item.vacancy_id for item in by_vacancy.items} == {vacancy_id}
+    assert {item.status for item in invited.items} == {"invited"}
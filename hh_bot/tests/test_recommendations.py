@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from models import Vacancy
+from recommendations import VacancyRecommender, resume_fields, vacancy_fields
+
+VACANCIES = {
+    1: ("Python разработчик", "Backend на Django и PostgreSQL", "Ромашка"),
+    2: ("Java разработчик", "Spring, микросервисы", "Лютик"),
+    3: ("Менеджер по продажам", "Продажи B2B, холодные звонки", "Ромашка"),
+    4: ("Senior Python developer", "Python, asyncio, PostgreSQL", "Василек"),
+    5: ("Бухгалтер", "Первичная документация", "Лютик"),
+}
+
+PYTHON_RESUME = resume_fields("Python разработчик", "Django, asyncio, PostgreSQL", "5 лет")
+
+def recommender(merge_rows: int = 100) -> VacancyRecommender:
+    engine = VacancyRecommender(session_maker=None, n_features=2 ** 14, merge_rows=merge_rows, refresh_interval=0)
+    for vacancy_id, (title, description, company) in VACANCIES.items():
+        engine.add(vacancy_id, vacancy_fields(title, description, company))
+    return engine
+
+def test_recommend_ranks_similar_vacancies_first():
+    result = recommender().recommend(PYTHON_RESUME, limit=5)
+    assert set(result[:2]) == {1, 4}
+    assert 5 not in result
+
+def test_merge_keeps_ranking_and_clears_pending():
+    pending = recommender()
+    assert pending._pending_ids and pending._matrix.shape[0] == 0
+    merged = recommender()
+    merged._merge()
+
+    assert merged._pending_ids == [] and merged._matrix.shape[0] == len(VACANCIES)
+    assert merged._rows == {vacancy_id: row for row, vacancy_id in enumerate(VACANCIES)}
+    assert set(merged.recommend(PYTHON_RESUME, limit=2)) == set(pending.recommend(PYTHON_RESUME, limit=2)) == {1, 4}
+
+def test_removed_and_excluded_vacancies_are_hidden():
+    engine = recommender(merge_rows=3)
+    # merge_rows=3: часть вакансий уже влита в основную матрицу, часть ждет слияния
+    assert engine._matrix.shape[0] == 3 and len(engine._pending_ids) == 2
+
+    engine.remove(1)
+    assert 1 not in engine.recommend(PYTHON_RESUME)
+    assert 4 not in engine.recommend(PYTHON_RESUME, exclude=[4])
+
+    engine._merge()
+    assert 1 not in engine._rows and len(engine) == 4
+    assert engine.recommend(PYTHON_RESUME, limit=1) == [4]
+
+def test_add_replaces_existing_vacancy():
+    engine = recommender()
+    engine.add(5, vacancy_fields("Python разработчик", "Django", "Лютик"))
+    engine._merge()
+    assert len(engine) == len(VACANCIES)
+    assert 5 in engine.recommend(PYTHON_RESUME, limit=3)
+
+def test_empty_index_and_empty_resume():
+    engine = VacancyRecommender(session_maker=None, n_features=2 ** 10, merge_rows=10, refresh_interval=0)
+    assert engine.recommend(PYTHON_RESUME) == []
+    assert recommender().recommend(resume_fields("", None, None)) == []
+
+def test_refresh_prunes_vacancies_removed_by_other_processes(db):
+    now = datetime.utcnow()
+
+    async def scenario():
+        async with db() as session:
+            vacancies = [
+                Vacancy(user_id=100, title=title, description=description, company=company,
+                        created_at=now, expires_at=now + timedelta(days=10))
+                for title, description, company in VACANCIES.values()
+            ]
+            # Истекшая вакансия в индекс не попадает
+            stale = Vacancy(user_id=100, title="Python разработчик", description="Django", company="Лютик",
+                            created_at=now - timedelta(days=40), expires_at=now - timedelta(days=1))
+            session.add_all(vacancies + [stale])
+            await session.commit()
+            ids = [vacancy.id for vacancy in vacancies]
+
+        engine = VacancyRecommender(session_maker=db, n_features=2 ** 14, merge_rows=100, refresh_interval=0)
+        await engine.load()
+        loaded = set(engine._rows)
+
+        # Другие процессы удалили одну вакансию, архивировали вторую и продлевать не стали третью
+        async with db() as session:
+            await session.execute(
+                Vacancy.__table__.update().where(Vacancy.id == ids[0]).values(deleted_at=now)
+            )
+            await session.execute(delete(Vacancy).where(Vacancy.id == ids[3]))
+            await session.execute(
+                Vacancy.__table__.update().where(Vacancy.id == ids[2]).values(expires_at=now - timedelta(days=1))
+            )
+            await session.commit()
+
+        removed = await engine.prune()
+        return ids, stale.id, loaded, removed, set(engine._rows), engine.recommend(PYTHON_RESUME, limit=5)
+
+    ids, stale_id, loaded, removed, rows, result = asyncio.run(scenario())
+    assert loaded == set(ids) and stale_id not in loaded
+    assert removed == 3
+    assert rows == {ids[1], ids[4]}
+    assert ids[0] not in result and ids[3] not in result
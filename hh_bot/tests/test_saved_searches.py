@@ -0,0 +1,77 @@
+import asyncio
+from datetime import datetime, timedelta
+import saved_searches as saved_searches_module
+from cards import invalidate_vacancy_card
+from config import config
+from delivery import DeliveryQueue
+from models import SearchHistory, Vacancy
+from saved_searches import SavedSearchIndex, SavedSearches
+
+def words(text: str):
+    return set(text.lower().split())
+
+def test_match_requires_every_word_as_prefix():
+    index = SavedSearchIndex()
+    index.add(1, 100, "python")
+    index.add(2, 101, "Python разраб")
+    index.add(3, 102, "java")
+    index.add(4, 103, "py django")
+
+    assert sorted(index.match(words("python разработчик в Ромашку"))) == [1, 2]
+    assert sorted(index.match(words("pythonista django"))) == [1, 4]
+    assert index.match(words("go")) == []
+
+def test_remove_and_replace():
+    index = SavedSearchIndex()
+    index.add(1, 100, "менеджер продаж")
+    index.add(2, 101, "менеджер")
+    assert len(index) == 2
+
+    index.remove(1)
+    assert index.match(words("менеджер по продажам")) == [2]
+    # Повторное добавление с тем же id заменяет запрос
+    index.add(2, 101, "бухгалтер")
+    assert index.match(words("менеджер")) == []
+    assert index.match(words("главный бухгалтер")) == [2]
+    assert index.owner(2) == 101
+    index.remove(42)
+
+def test_empty_query_is_ignored():
+    index = SavedSearchIndex()
+    index.add(1, 100, "  !!! ")
+    assert len(index) == 0
+    assert index.owner(1) is None
+
+class RecordingBot:
+    def __init__(self):
+        self.chats = []
+
+    async def __call__(self, method):
+        self.chats.append(method.chat_id)
+
+def test_fan_out_reaches_every_batch_without_global_rate(db, monkeypatch):
+    # DELIVERY_GLOBAL_RATE=0 - без общего лимита; рассылка не должна обрываться после первой пачки
+    monkeypatch.setattr(config, "DELIVERY_GLOBAL_RATE", 0)
+    monkeypatch.setattr(saved_searches_module, "delivery_queue", DeliveryQueue(global_rate=0, chat_interval=0))
+    subscribers = list(range(300, 307))
+    now = datetime.utcnow()
+
+    async def scenario():
+        async with db() as session:
+            vacancy = Vacancy(user_id=100, title="Python разработчик", description="Django", company="Ромашка",
+                              created_at=now, expires_at=now + timedelta(days=1))
+            session.add(vacancy)
+            session.add_all([SearchHistory(user_id=user_id, query="python") for user_id in subscribers])
+            await session.commit()
+            invalidate_vacancy_card(vacancy.id)
+
+        searches = SavedSearches(session_maker=db, batch_size=2, refresh_interval=0)
+        await searches.load()
+        searches.ready = True
+        bot = RecordingBot()
+        searches.notify(bot, vacancy)
+        await searches.close()
+        await saved_searches_module.delivery_queue.close()
+        return bot.chats
+
+    assert sorted(asyncio.run(scenario())) == subscribers
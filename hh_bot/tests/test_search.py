@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timedelta
+from models import Vacancy
+from search import fetch_search_page
+
+def test_search_pages_cover_all_matches_in_both_directions(db):
+    now = datetime.utcnow()
+
+    async def scenario():
+        async with db() as session:
+            matching = [
+                Vacancy(user_id=100, title=f"Python разработчик {i}", description="Django" * (i + 1),
+                        company="Ромашка", created_at=now, expires_at=now + timedelta(days=1))
+                for i in range(5)
+            ]
+            session.add_all(matching)
+            session.add(Vacancy(user_id=100, title="Бухгалтер", description="", company="",
+                                created_at=now, expires_at=now + timedelta(days=1)))
+            await session.commit()
+
+            pages = []
+            page = await fetch_search_page(session, "python", limit=2)
+            assert not page.has_prev
+            pages.append([vacancy.id for vacancy in page.vacancies])
+            while page.has_next:
+                page = await fetch_search_page(session, "python", after=page.last, limit=2)
+                assert page.has_prev
+                pages.append([vacancy.id for vacancy in page.vacancies])
+            previous = await fetch_search_page(session, "python", before=page.first, limit=2)
+            return [vacancy.id for vacancy in matching], pages, previous
+
+    matching_ids, pages, previous = asyncio.run(scenario())
+    seen = [vacancy_id for page in pages for vacancy_id in page]
+    assert sorted(seen) == sorted(matching_ids)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [vacancy.id for vacancy in previous.vacancies] == pages[-2]
+    assert previous.has_next
+
+def test_empty_query(db):
+    async def scenario():
+        async with db() as session:
+            return await fetch_search_page(session, " !? ", limit=2)
+
+    page = asyncio.run(scenario())
+    assert page.vacancies == [] and not page.has_prev and not page.has_next
@@ -0,0 +1,62 @@
+import asyncio
+import io
+import os
+from types import SimpleNamespace
+import pytest
+import vacancy_import
+from vacancy_import import ImportFileError, _json_rows, download_document
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Маленькие порции чтения: элементы и разделители попадают на границы буфера
+    monkeypatch.setattr(vacancy_import, "_READ_CHUNK", 7)
+
+def rows(text: str):
+    return list(_json_rows(io.StringIO(text)))
+
+def test_reads_items_split_across_chunks():
+    items = [{"title": f"Python developer {i}", "company": "Ромашка", "description": "x" * 30} for i in range(5)]
+    text = "\n [\n" + ",\n  ".join(
+        '{"title": "%s", "company": "%s", "description": "%s"}' % (item["title"], item["company"], item["description"])
+        for item in items
+    ) + "\n]\n"
+    assert rows(text) == list(enumerate(items, start=1))
+
+def test_empty_array():
+    assert rows("  [ ]  ") == []
+
+def test_items_are_yielded_lazily():
+    iterator = _json_rows(io.StringIO('[{"a": 1}, {"a": 2}, oops'))
+    assert next(iterator) == (1, {"a": 1})
+    assert next(iterator) == (2, {"a": 2})
+    with pytest.raises(ImportFileError):
+        next(iterator)
+
+@pytest.mark.parametrize("text, message", [
+    ("", "файл пуст"),
+    ('{"title": "a"}', "ожидается массив"),
+    ('[{"a": 1} {"a": 2}]', "ожидается ','"),
+    ('[{"a": 1}, {"a": ', "элемент 2"),
+    ('[{"a": 1},', "файл оборвался"),
+])
+def test_malformed_files(text, message):
+    with pytest.raises(ImportFileError, match=message):
+        rows(text)
+
+def test_failed_download_leaves_no_temp_file():
+    paths = []
+
+    class FailingBot:
+        async def get_file(self, file_id):
+            return SimpleNamespace(file_path="documents/file.csv")
+
+        async def download_file(self, file_path, destination, timeout):
+            paths.append(destination)
+            with open(destination, "w") as file:
+                file.write("title,com")
+            raise asyncio.TimeoutError
+
+    document = SimpleNamespace(file_id="file", file_unique_id="unique")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(download_document(FailingBot(), document))
+    assert len(paths) == 1 and not os.path.exists(paths[0])
@@ -0,0 +1,99 @@
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, Router
+from config import config
+from webhook import BoundedRequestHandler, build_app
+
+SECRET = "test-secret"
+
+def message_update(update_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": "/start",
+        },
+    }
+
+async def post(client: TestClient, update_id: int, secret: str = SECRET) -> int:
+    response = await client.post(
+        config.WEBHOOK_PATH, json=message_update(update_id),
+        headers={"X-Telegram-Bot-Api-Secret-Token": secret}
+    )
+    return response.status
+
+def test_updates_are_handled_in_background():
+    async def scenario():
+        dp = Dispatcher()
+        handled = []
+
+        @dp.message()
+        async def on_message(message):
+            handled.append(message.message_id)
+
+        bot = Bot("42:TEST")
+        async with TestClient(TestServer(build_app(dp, bot, SECRET))) as client:
+            statuses = [await post(client, update_id) for update_id in (1, 2, 3)]
+            unauthorized = await post(client, 4, secret="wrong")
+            await asyncio.sleep(0.1)
+        await bot.session.close()
+        return statuses, unauthorized, handled
+
+    statuses, unauthorized, handled = asyncio.run(scenario())
+    assert statuses == [200, 200, 200]
+    assert unauthorized == 401
+    assert sorted(handled) == [1, 2, 3]
+
+def test_full_backlog_is_rejected_with_503():
+    async def scenario():
+        dp = Dispatcher()
+        release = asyncio.Event()
+        handled = []
+
+        @dp.message()
+        async def on_message(message):
+            await release.wait()
+            handled.append(message.message_id)
+
+        bot = Bot("42:TEST")
+        app = web.Application()
+        BoundedRequestHandler(
+            dispatcher=dp, bot=bot, secret_token=SECRET,
+            max_concurrency=1, max_backlog=2
+        ).register(app, path=config.WEBHOOK_PATH)
+        async with TestClient(TestServer(app)) as client:
+            statuses = [await post(client, update_id) for update_id in (1, 2, 3)]
+            release.set()
+            await asyncio.sleep(0.1)
+            # Очередь освободилась - обновления снова принимаются
+            statuses.append(await post(client, 4))
+            await asyncio.sleep(0.1)
+        await bot.session.close()
+        return statuses, handled
+
+    statuses, handled = asyncio.run(scenario())
+    assert statuses == [200, 200, 503, 200]
+    assert sorted(handled) == [1, 2, 4]
+
+def test_singleton_jobs_start_only_in_primary_worker(monkeypatch):
+    import main
+
+    def startup_jobs():
+        # Роутер обработчиков подключается только к одному диспетчеру
+        monkeypatch.setattr(main, "router", Router())
+        return {handler.callback.__qualname__ for handler in main.create_dispatcher().startup.handlers}
+
+    monkeypatch.setattr(config, "WORKER_INDEX", 0)
+    primary = startup_jobs()
+    monkeypatch.setattr(config, "WORKER_INDEX", 1)
+    secondary = startup_jobs()
+
+    singletons = {"AttachmentStore.start", "CleanupWorker.start", "VacancyArchiver.start", "DownloadQueue.start"}
+    assert singletons <= primary
+    assert not singletons & secondary
+    # Индексы в памяти нужны каждому процессу
+    assert {"VacancyRecommender.start", "SavedSearches.start"} <= secondary
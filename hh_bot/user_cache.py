@@ -0,0 +1,64 @@
+from dataclasses import dataclass, replace
+from typing import Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config
+from models import User
+from ttl_cache import TTLCache
+
+# Кэш пользователей в памяти процесса: LRU с ограничением времени жизни.
+# Создание пользователя и смена роли записываются в базу и сразу в кэш.
+
+@dataclass(frozen=True)
+class CachedUser:
+    id: int
+    telegram_id: int
+    username: Optional[str]
+    role: Optional[str]
+
+    @classmethod
+    def from_model(cls, user: User) -> "CachedUser":
+        return cls(id=user.id, telegram_id=user.telegram_id, username=user.username, role=user.role)
+
+class UserService:
+    """Доступ к пользователям через кэш"""
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache  # telegram_id -> CachedUser
+
+    async def get(self, session: AsyncSession, telegram_id: int) -> Optional[CachedUser]:
+        user = self.cache.get(telegram_id)
+        if user is not None:
+            return user
+
+        result = await session.execute(select(User).where(User.telegram_id == telegram_id))
+        model = result.scalar_one_or_none()
+        if model is None:
+            return None
+        user = CachedUser.from_model(model)
+        self.cache.put(user.telegram_id, user)
+        return user
+
+    async def create(self, session: AsyncSession, telegram_id: int, username: Optional[str]) -> CachedUser:
+        model = User(telegram_id=telegram_id, username=username)
+        session.add(model)
+        await session.commit()
+        user = CachedUser.from_model(model)
+        self.cache.put(user.telegram_id, user)
+        return user
+
+    async def set_role(self, session: AsyncSession, telegram_id: int, role: str) -> Optional[CachedUser]:
+        """Сохраняет роль пользователя; если роль не изменилась, в базу не пишет"""
+        user = await self.get(session, telegram_id)
+        if user is None or user.role == role:
+            return user
+
+        await session.execute(
+            update(User).where(User.telegram_id == telegram_id).values(role=role)
+        )
+        await session.commit()
+        user = replace(user, role=role)
+        self.cache.put(user.telegram_id, user)
+        return user
+
+user_service = UserService(TTLCache(config.USER_CACHE_SIZE, config.USER_CACHE_TTL))
@@ -0,0 +1,273 @@
+import asyncio
+import csv
+import itertools
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+from aiogram import Bot
+from aiogram.types import Document
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import config
+from models import Vacancy
+from archive import vacancy_expires_at
+from attachments import attachment_store
+from recommendations import recommender
+from saved_searches import saved_searches
+
+# Массовый импорт вакансий из CSV или JSON. Файл скачивается во временный
+# файл и читается построчно (в отдельном потоке, пачками), в памяти
+# находится только текущая пачка. Строки проверяются по одной: ошибочные
+# пропускаются и попадают в отчет, остальные вставляются пачками через
+# executemany в одной транзакции - ошибка разбора файла или базы
+# откатывает весь импорт.
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = (".csv", ".json", ".jsonl")
+
+# Колонки файла: поле вакансии -> допустимые названия
+FIELD_ALIASES = {
+    "title": ("title", "должность", "название"),
+    "company": ("company", "компания"),
+    "salary": ("salary", "зарплата"),
+    "description": ("description", "описание")
+}
+REQUIRED_FIELDS = ("title", "company", "description")
+FIELD_LIMITS = {"title": 200, "company": 200, "salary": 100, "description": 3500}
+DEFAULT_SALARY = "По договоренности"
+
+# В отчете показываются первые ошибки, остальные только считаются
+MAX_REPORTED_ERRORS = 20
+
+_READ_CHUNK = 64 * 1024
+
+_COLUMNS = {alias: name for name, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+class ImportFileError(ValueError):
+    """Файл не удалось разобрать целиком"""
+
+@dataclass
+class ImportReport:
+    imported: int = 0
+    processed: int = 0
+    error_count: int = 0
+    errors: List[str] = field(default_factory=list)
+    truncated: bool = False  # в файле больше строк, чем VACANCY_IMPORT_MAX_ROWS
+    vacancy_ids: List[int] = field(default_factory=list)
+
+    def add_error(self, row_number: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"строка {row_number}: {message}")
+
+    def render(self) -> str:
+        lines = [f"✅ Импортировано вакансий: {self.imported} из {self.processed}"]
+        if self.truncated:
+            lines.append(f"Обработаны только первые {config.VACANCY_IMPORT_MAX_ROWS} строк.")
+        if self.error_count:
+            lines.append(f"\nПропущено строк с ошибками: {self.error_count}")
+            lines.extend(self.errors)
+            if self.error_count > len(self.errors):
+                lines.append(f"... и еще {self.error_count - len(self.errors)}")
+        return "\n".join(lines)
+
+def parse_row(raw: Dict[str, Any]) -> Dict[str, str]:
+    """Значения полей вакансии из строки файла; ValueError, если строка неверна"""
+    if not isinstance(raw, dict):
+        raise ValueError("ожидается объект с полями вакансии")
+
+    values: Dict[str, str] = {}
+    for key, value in raw.items():
+        name = _COLUMNS.get(str(key).strip().lower())
+        if name is None or value is None:
+            continue
+        value = str(value).strip()
+        if len(value) > FIELD_LIMITS[name]:
+            raise ValueError(f"поле {name} длиннее {FIELD_LIMITS[name]} символов")
+        values[name] = value
+
+    missing = [name for name in REQUIRED_FIELDS if not values.get(name)]
+    if missing:
+        raise ValueError(f"не заполнены поля: {', '.join(missing)}")
+    values.setdefault("salary", DEFAULT_SALARY)
+    values["salary"] = values["salary"] or DEFAULT_SALARY
+    return values
+
+def _csv_rows(file: TextIO) -> Iterator[Tuple[int, Any]]:
+    sample = file.read(_READ_CHUNK)
+    file.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(file, dialect=dialect)
+    if not reader.fieldnames or not any(str(name).strip().lower() in _COLUMNS for name in reader.fieldnames):
+        raise ImportFileError("в первой строке нет названий колонок (title, company, salary, description)")
+    try:
+        for row in reader:
+            # Пустые строки DictReader пропускает сам, номер - строка файла
+            row.pop(None, None)
+            yield reader.line_num, row
+    except csv.Error as e:
+        raise ImportFileError(f"строка {reader.line_num}: {e}") from e
+
+def _jsonl_rows(file: TextIO) -> Iterator[Tuple[int, Any]]:
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ImportFileError(f"строка {number}: {e.msg}") from e
+
+def _json_rows(file: TextIO) -> Iterator[Tuple[int, Any]]:
+    """Элементы JSON-массива по одному, без чтения всего файла"""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    expect = "["  # "[", затем элемент или "]", затем "," или "]"
+    number = 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ImportFileError("файл оборвался: ожидается ']'" if expect != "[" else "файл пуст")
+            chunk = file.read(_READ_CHUNK)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+
+        char = buffer[pos]
+        if expect == "[":
+            if char != "[":
+                raise ImportFileError("ожидается массив объектов: [{...}, {...}]")
+            pos += 1
+            expect = "item"
+            continue
+        if char == "]" and expect in ("item", ","):
+            return
+        if expect == ",":
+            if char != ",":
+                raise ImportFileError(f"после элемента {number} ожидается ',' или ']'")
+            pos += 1
+            expect = "next"
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise ImportFileError(f"элемент {number + 1}: {e.msg}") from e
+            # Элемент не поместился в буфер - дочитываем
+            chunk = file.read(_READ_CHUNK)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        number += 1
+        yield number, value
+        pos = end
+        expect = ","
+
+def read_rows(file: TextIO, extension: str) -> Iterator[Tuple[int, Any]]:
+    """(номер строки или элемента, сырая строка) из открытого файла"""
+    if extension == ".csv":
+        return _csv_rows(file)
+    if extension == ".jsonl":
+        return _jsonl_rows(file)
+    return _json_rows(file)
+
+def document_extension(document: Document) -> Optional[str]:
+    extension = os.path.splitext(document.file_name or "")[1].lower()
+    return extension if extension in EXTENSIONS else None
+
+async def download_document(bot: Bot, document: Document) -> str:
+    """Скачивает документ во временный файл хранилища"""
+    path = attachment_store.temp_path(f"import-{document.file_unique_id}-{time.monotonic_ns()}")
+    try:
+        file = await bot.get_file(document.file_id)
+        await bot.download_file(file.file_path, path, timeout=config.DOWNLOAD_TIMEOUT)
+    except Exception:
+        # Недокачанный файл не оставляем
+        if os.path.exists(path):
+            await asyncio.to_thread(os.remove, path)
+        raise
+    return path
+
+async def import_vacancies(
+    session: AsyncSession,
+    user_id: int,
+    path: str,
+    extension: str,
+    on_progress: Optional[Callable[[ImportReport], Awaitable[None]]] = None,
+    batch_size: int = config.VACANCY_IMPORT_BATCH_SIZE,
+    max_rows: int = config.VACANCY_IMPORT_MAX_ROWS
+) -> ImportReport:
+    """Импортирует вакансии из файла и фиксирует транзакцию.
+
+    При ImportFileError или ошибке базы ничего не сохраняется.
+    """
+    report = ImportReport()
+    progress_at = time.monotonic() + config.VACANCY_IMPORT_PROGRESS_INTERVAL
+    stmt = insert(Vacancy).returning(Vacancy.id)
+
+    file = await asyncio.to_thread(open, path, encoding="utf-8-sig", newline="")
+    try:
+        rows = read_rows(file, extension)
+        while True:
+            # Чтение и разбор пачки - блокирующий ввод-вывод, выполняется в потоке
+            batch = await asyncio.to_thread(list, itertools.islice(rows, batch_size))
+            if not batch:
+                break
+
+            values = []
+            for row_number, raw in batch:
+                if report.processed == max_rows:
+                    report.truncated = True
+                    break
+                report.processed += 1
+                try:
+                    values.append({**parse_row(raw), "user_id": user_id, "expires_at": vacancy_expires_at()})
+                except ValueError as e:
+                    report.add_error(row_number, str(e))
+
+            if values:
+                result = await session.execute(stmt, values)
+                report.vacancy_ids.extend(result.scalars())
+                report.imported += len(values)
+            if report.truncated:
+                break
+
+            if on_progress is not None and time.monotonic() >= progress_at:
+                progress_at = time.monotonic() + config.VACANCY_IMPORT_PROGRESS_INTERVAL
+                await on_progress(report)
+    except UnicodeDecodeError as e:
+        await session.rollback()
+        raise ImportFileError("файл должен быть в кодировке UTF-8") from e
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await asyncio.to_thread(file.close)
+
+    await session.commit()
+    return report
+
+async def publish_imported(bot: Bot, session: AsyncSession, vacancy_ids: List[int],
+                           batch_size: int = config.VACANCY_IMPORT_BATCH_SIZE):
+    """То же, что после создания одной вакансии: индекс рекомендаций и
+    уведомления подписчикам. Вакансии читаются из базы пачками."""
+    for start in range(0, len(vacancy_ids), batch_size):
+        result = await session.execute(
+            select(Vacancy).where(Vacancy.id.in_(vacancy_ids[start:start + batch_size])).order_by(Vacancy.id)
+        )
+        vacancies = result.scalars().all()
+        for vacancy in vacancies:
+            recommender.add_vacancy(vacancy)
+        saved_searches.notify_many(bot, vacancies)
+        # Не занимаем цикл событий надолго
+        await asyncio.sleep(0)
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import multiprocessing
+import secrets
+from typing import Any, Callable, Dict, Set
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.methods import TelegramMethod
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from config import config
+
+# Режим webhook: aiohttp-сервер принимает обновления от Telegram.
+# Несколько процессов слушают один порт (SO_REUSEPORT) и делят состояние
+# через общее хранилище FSM, число одновременно обрабатываемых
+# обновлений в каждом процессе ограничено. Если очередь процесса
+# заполнена, обновление не принимается (503) и Telegram повторит его позже.
+# Фоновые задачи над общей базой запускает только процесс с номером 0.
+
+logger = logging.getLogger(__name__)
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """Обработчик webhook, который сразу отвечает Telegram и ограничивает
+    число обновлений, обрабатываемых одновременно и ожидающих обработки.
+
+    Фоновая обработка своя, а не handle_in_background aiogram: используются
+    только публичные методы (resolve_bot, verify_secret, feed_raw_update)."""
+
+    def __init__(
+        self,
+        *args: Any,
+        max_concurrency: int = config.WEBHOOK_MAX_CONCURRENCY,
+        max_backlog: int = config.WEBHOOK_MAX_BACKLOG,
+        **kwargs: Any
+    ):
+        super().__init__(*args, **kwargs)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.max_backlog = max_backlog
+        # Принятые обновления: обрабатываются или ждут семафора
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        bot = await self.resolve_bot(request)
+        if not self.verify_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), bot):
+            return web.Response(body="Unauthorized", status=401)
+        if len(self._tasks) >= self.max_backlog:
+            return web.Response(status=503, text="Too many pending updates")
+
+        update = await request.json(loads=bot.session.json_loads)
+        task = asyncio.create_task(self._feed_update(bot, update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            try:
+                result = await self.dispatcher.feed_raw_update(bot=bot, update=update, **self.data)
+                # Обработчик может вернуть метод API вместо вызова
+                if isinstance(result, TelegramMethod):
+                    await self.dispatcher.silent_call_request(bot=bot, result=result)
+            except Exception:
+                logger.exception("Ошибка при обработке обновления %s", update.get("update_id"))
+
+def build_app(dp: Dispatcher, bot: Bot, secret_token: str) -> web.Application:
+    """Создает aiohttp-приложение, принимающее обновления по config.WEBHOOK_PATH"""
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=secret_token
+    )
+    handler.register(app, path=config.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+async def serve(
+    create_bot: Callable[[], Bot],
+    create_dispatcher: Callable[[], Dispatcher],
+    secret_token: str,
+    reuse_port: bool = False
+):
+    """Запускает webhook-сервер в текущем процессе"""
+    app = build_app(create_dispatcher(), create_bot(), secret_token)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, config.WEBAPP_HOST, config.WEBAPP_PORT, reuse_port=reuse_port)
+    await site.start()
+    logger.info("Webhook-сервер слушает %s:%s%s", config.WEBAPP_HOST, config.WEBAPP_PORT, config.WEBHOOK_PATH)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+def _run_worker(index: int, create_bot, create_dispatcher, secret_token: str):
+    logging.basicConfig(level=logging.INFO)
+    config.WORKER_INDEX = index
+    asyncio.run(serve(create_bot, create_dispatcher, secret_token, reuse_port=True))
+
+async def run_webhook(
+    bot: Bot,
+    create_bot: Callable[[], Bot],
+    create_dispatcher: Callable[[], Dispatcher]
+):
+    """Регистрирует webhook в Telegram и запускает config.WEBHOOK_WORKERS процессов"""
+    # Секрет должен совпадать во всех процессах, поэтому генерируем его здесь
+    secret_token = config.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+    workers = max(1, config.WEBHOOK_WORKERS)
+
+    await bot.set_webhook(
+        url=config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH,
+        secret_token=secret_token,
+        max_connections=min(100, workers * config.WEBHOOK_MAX_CONCURRENCY)
+    )
+    await bot.session.close()
+
+    if workers == 1:
+        await serve(create_bot, create_dispatcher, secret_token)
+        return
+
+    # spawn: дочерние процессы не наследуют соединения с базой и event loop
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_run_worker, args=(index, create_bot, create_dispatcher, secret_token))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            await asyncio.to_thread(process.join)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()